@@ -21,3 +21,224 @@ CREATE TABLE IF NOT EXISTS dlm.outbox (
 
 -- Index to help the background worker find unsent messages instantly
 CREATE INDEX idx_outbox_pending ON dlm.outbox (status, created_at);
+
+--changeset dlm:2.3-migration-queue context:2.3-release
+
+--
+-- Migration queue: copies are queued with the rclone request and submitted
+-- by the migration manager, job_id and URL are only known once submitted.
+--
+ALTER TABLE dlm.migration ADD COLUMN IF NOT EXISTS state varchar NOT NULL DEFAULT 'SUBMITTED';
+ALTER TABLE dlm.migration ADD COLUMN IF NOT EXISTS request jsonb DEFAULT NULL;
+ALTER TABLE dlm.migration ALTER COLUMN job_id DROP NOT NULL;
+ALTER TABLE dlm.migration ALTER COLUMN URL DROP NOT NULL;
+-- Completed migrations are COMPLETED if their rclone job succeeded, FAILED otherwise
+UPDATE dlm.migration
+    SET state = CASE
+        WHEN job_status->>'success' = 'true' AND COALESCE(job_status->>'error', '') = ''
+            THEN 'COMPLETED'
+        ELSE 'FAILED'
+    END
+    WHERE complete;
+
+-- Index to help the migration manager drain the queue in submission order
+CREATE INDEX IF NOT EXISTS idx_migration_queued ON dlm.migration ("date", migration_id)
+    WHERE state = 'QUEUED';
+
+--changeset dlm:2.3-outbox-notify context:2.3-release splitStatements:false
+
+-- Notify the outbox relay of new events, once per inserting statement
+CREATE OR REPLACE FUNCTION dlm.notify_outbox() RETURNS trigger AS $$
+  BEGIN
+    PERFORM pg_notify('dlm_outbox', '');
+    RETURN NULL;
+  END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_outbox ON dlm.outbox;
+CREATE TRIGGER notify_outbox
+AFTER INSERT ON dlm.outbox
+FOR EACH STATEMENT EXECUTE FUNCTION dlm.notify_outbox();
+
+--changeset dlm:2.3-outbox-retry context:2.3-release
+
+-- Failed outbox events are retried from next_attempt_at until they are DEAD
+ALTER TABLE dlm.outbox ADD COLUMN IF NOT EXISTS next_attempt_at timestamp without time zone NOT NULL DEFAULT now();
+UPDATE dlm.outbox SET next_attempt_at = COALESCE(created_at, now()) WHERE status = 'PENDING';
+
+-- Index to help the relay find pending events and due retries in one pass
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON dlm.outbox (next_attempt_at)
+    WHERE status IN ('PENDING', 'FAILED');
+
+--changeset dlm:2.3-outbox-partitions context:2.3-release splitStatements:false
+
+-- Create the daily partitions of dlm.outbox from first_day for the given number of days.
+-- Events of a day which landed in the default partition, e.g. while maintenance
+-- was down, are moved into the new partition of their day.
+CREATE OR REPLACE FUNCTION dlm.create_outbox_partitions(first_day date, days integer)
+RETURNS integer AS $$
+  DECLARE
+    day date;
+    part text;
+    created integer := 0;
+  BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('dlm.outbox_partitions'));
+    FOR i IN 0 .. days - 1 LOOP
+      day := first_day + i;
+      part := 'outbox_p' || to_char(day, 'YYYYMMDD');
+      IF to_regclass('dlm.' || part) IS NOT NULL THEN
+        CONTINUE;
+      END IF;
+      IF EXISTS (
+        SELECT 1 FROM dlm.outbox_default WHERE created_at >= day AND created_at < day + 1
+      ) THEN
+        EXECUTE format('CREATE TABLE dlm.%I (LIKE dlm.outbox INCLUDING DEFAULTS)', part);
+        EXECUTE format(
+          'WITH moved AS (DELETE FROM dlm.outbox_default '
+          'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+          'INSERT INTO dlm.%I SELECT * FROM moved',
+          day, day + 1, part
+        );
+        EXECUTE format(
+          'ALTER TABLE dlm.outbox ATTACH PARTITION dlm.%I FOR VALUES FROM (%L) TO (%L)',
+          part, day, day + 1
+        );
+      ELSE
+        EXECUTE format(
+          'CREATE TABLE dlm.%I PARTITION OF dlm.outbox FOR VALUES FROM (%L) TO (%L)',
+          part, day, day + 1
+        );
+      END IF;
+      created := created + 1;
+    END LOOP;
+    RETURN created;
+  END
+$$ LANGUAGE plpgsql;
+
+-- Drop the daily partitions of dlm.outbox ending before the cutoff day which
+-- hold no events still to be delivered
+CREATE OR REPLACE FUNCTION dlm.drop_outbox_partitions(cutoff date)
+RETURNS integer AS $$
+  DECLARE
+    part record;
+    undelivered boolean;
+    dropped integer := 0;
+  BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('dlm.outbox_partitions'));
+    FOR part IN
+      SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+      WHERE i.inhparent = 'dlm.outbox'::regclass
+        AND n.nspname = 'dlm'
+        AND c.relname ~ '^outbox_p[0-9]{8}$'
+        AND to_date(substring(c.relname FROM 9), 'YYYYMMDD') + 1 <= cutoff
+    LOOP
+      EXECUTE format(
+        'SELECT EXISTS (SELECT 1 FROM dlm.%I WHERE status IN (''PENDING'', ''FAILED''))',
+        part.relname
+      ) INTO undelivered;
+      IF NOT undelivered THEN
+        EXECUTE format('DROP TABLE dlm.%I', part.relname);
+        dropped := dropped + 1;
+      END IF;
+    END LOOP;
+    RETURN dropped;
+  END
+$$ LANGUAGE plpgsql;
+
+-- Convert dlm.outbox into a table partitioned by day of creation
+DO $$
+  DECLARE first_day date;
+  BEGIN
+    IF EXISTS (
+      SELECT 1 FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+      WHERE n.nspname = 'dlm' AND c.relname = 'outbox' AND c.relkind = 'r'
+    ) THEN
+      ALTER TABLE dlm.outbox RENAME TO outbox_unpartitioned;
+      DROP INDEX IF EXISTS dlm.idx_outbox_pending;
+      DROP INDEX IF EXISTS dlm.idx_outbox_due;
+
+      CREATE TABLE dlm.outbox (
+          outbox_id       uuid DEFAULT gen_random_uuid(),
+          event_type      varchar NOT NULL,
+          payload         jsonb NOT NULL,
+          destination     varchar DEFAULT NULL,
+          routing_key     varchar DEFAULT NULL,
+          status          varchar NOT NULL DEFAULT 'PENDING',
+          attempts        integer DEFAULT 0,
+          created_at      timestamp without time zone NOT NULL DEFAULT now(),
+          last_attempt    timestamp without time zone DEFAULT NULL,
+          sent_at         timestamp without time zone DEFAULT NULL,
+          next_attempt_at timestamp without time zone NOT NULL DEFAULT now(),
+          PRIMARY KEY (outbox_id, created_at)
+      ) PARTITION BY RANGE (created_at);
+      -- catches events outside of the created daily partitions
+      CREATE TABLE dlm.outbox_default PARTITION OF dlm.outbox DEFAULT;
+
+      SELECT COALESCE(min(created_at)::date, current_date) INTO first_day
+        FROM dlm.outbox_unpartitioned;
+      PERFORM dlm.create_outbox_partitions(first_day, current_date - first_day + 7);
+      INSERT INTO dlm.outbox (
+          outbox_id, event_type, payload, destination, routing_key, status, attempts,
+          created_at, last_attempt, sent_at, next_attempt_at
+      )
+      SELECT outbox_id, event_type, payload, destination, routing_key, status, attempts,
+             COALESCE(created_at, now()), last_attempt, sent_at, next_attempt_at
+        FROM dlm.outbox_unpartitioned;
+      DROP TABLE dlm.outbox_unpartitioned;
+
+      CREATE INDEX idx_outbox_pending ON dlm.outbox (status, created_at);
+      CREATE INDEX idx_outbox_due ON dlm.outbox (next_attempt_at)
+          WHERE status IN ('PENDING', 'FAILED');
+      CREATE TRIGGER notify_outbox
+      AFTER INSERT ON dlm.outbox
+      FOR EACH STATEMENT EXECUTE FUNCTION dlm.notify_outbox();
+    END IF;
+  END
+$$;
+
+--changeset dlm:2.3-expiry-indexes context:2.3-release
+
+-- expiry scans of the heuristic engine, keyset paginated by (expiration, id)
+CREATE INDEX IF NOT EXISTS idx_data_item_uid_expiration
+    ON dlm.data_item USING btree (uid_expiration, uid) WHERE deleted IS FALSE;
+CREATE INDEX IF NOT EXISTS idx_data_item_oid_expiration
+    ON dlm.data_item USING btree (oid_expiration, oid) WHERE deleted IS FALSE AND oid IS NOT NULL;
+
+--changeset dlm:2.3-storage-changed-events context:2.3-release splitStatements:false
+
+-- Publish writes of the storage lookups through the outbox, so that services
+-- can invalidate their storage cache
+CREATE OR REPLACE FUNCTION dlm.storage_changed_event() RETURNS trigger
+SECURITY DEFINER SET search_path = dlm, pg_temp AS $$
+  BEGIN
+    INSERT INTO dlm.outbox (event_type, payload)
+    VALUES ('storage.changed', jsonb_build_object('table', TG_TABLE_NAME, 'operation', TG_OP));
+    RETURN NULL;
+  END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS storage_changed_event ON dlm.location;
+CREATE TRIGGER storage_changed_event
+AFTER INSERT OR UPDATE OR DELETE ON dlm.location
+FOR EACH STATEMENT EXECUTE FUNCTION dlm.storage_changed_event();
+
+DROP TRIGGER IF EXISTS storage_changed_event ON dlm.storage_config;
+CREATE TRIGGER storage_changed_event
+AFTER INSERT OR UPDATE OR DELETE ON dlm.storage_config
+FOR EACH STATEMENT EXECUTE FUNCTION dlm.storage_changed_event();
+
+-- usage and health check updates are not published
+DROP TRIGGER IF EXISTS storage_changed_event ON dlm.storage;
+CREATE TRIGGER storage_changed_event
+AFTER INSERT OR DELETE OR UPDATE OF storage_name, location_id, root_directory, storage_type,
+    storage_interface, storage_phase, storage_capacity, storage_permissions, storage_available,
+    storage_retired ON dlm.storage
+FOR EACH STATEMENT EXECUTE FUNCTION dlm.storage_changed_event();
+
+--changeset dlm:2.3-outbox-failed-keys context:2.3-release
+
+-- ordered relays hold back the events created after a FAILED event of their routing key
+CREATE INDEX IF NOT EXISTS idx_outbox_failed_key
+    ON dlm.outbox (coalesce(routing_key, event_type), created_at) WHERE status = 'FAILED';
@@ -20,7 +20,7 @@ from requests import HTTPError
 from ska_dlm.dlm_db.db_access import DBQueryError
 from ska_dlm.exception_handling_typer import ExceptionHandlingTyper
 from ska_dlm.exceptions import UnmetPreconditionForOperation
-from ska_dlm.typer_utils import dump_short_stacktrace
+from ska_dlm.typer_utils import dump_short_stacktrace, print_result
 
 from .data_item.data_item_requests import cli as item_app
 from .dlm_ingest.dlm_ingest_requests import cli as ingest_app
@@ -28,7 +28,7 @@ from .dlm_migration.dlm_migration_requests import cli as migration_app
 from .dlm_request.dlm_request_requests import cli as request_app
 from .dlm_storage.dlm_storage_requests import cli as storage_app
 
-app = ExceptionHandlingTyper(pretty_exceptions_show_locals=False, result_callback=print)
+app = ExceptionHandlingTyper(pretty_exceptions_show_locals=False, result_callback=print_result)
 app.add_typer(ingest_app, name="ingest", help="Ingest data items")
 app.add_typer(item_app, name="data-item", help="Manage data_item information")
 app.add_typer(request_app, name="request", help="Request queries")
@@ -85,6 +85,16 @@ class OutboxStatus(str, Enum):
     PENDING = "PENDING"
     SENT = "SENT"
     FAILED = "FAILED"
+    DEAD = "DEAD"
+
+
+class MigrationState(str, Enum):
+    """Migration job state."""
+
+    QUEUED = "QUEUED"
+    SUBMITTED = "SUBMITTED"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
 
 
 class ChecksumMethod(str, Enum):
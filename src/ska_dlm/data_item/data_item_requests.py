@@ -1,8 +1,11 @@
 """Convenience functions to update data_item records."""
 
+import json
 import logging
+from collections.abc import Iterator
 
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 
 from ska_dlm import CONFIG
 from ska_dlm.common_types import ItemState
@@ -30,7 +33,8 @@ def query_data_item(
 ) -> list[dict]:
     """Query a data_item.
 
-    params or item_name/oid/uid is required.
+    params or item_name/oid/uid is required. At most 1000 data_items are
+    returned, query_data_item_page and iter_data_items return all of them.
 
     Parameters
     ----------
@@ -50,10 +54,18 @@ def query_data_item(
     list[dict]
         data item ids.
     """
+    params = _data_item_params(item_name, oid, uid, storage_id, params)
+    params["limit"] = 1000
+    return DB.select(CONFIG.DLM.dlm_table, params=params)
+
+
+def _data_item_params(
+    item_name: str, oid: str, uid: str, storage_id: str, params: dict | None
+) -> dict:
+    """Build the data_item query params of the query_data_item arguments."""
     if bool(params) == (item_name or oid or uid):
         raise InvalidQueryParameters("give either params or item_name/oid/uid")
     params = dict(params) if params else {}
-    params["limit"] = 1000
     if uid:
         params["uid"] = f"eq.{uid}"
     elif oid:
@@ -63,8 +75,134 @@ def query_data_item(
 
     if storage_id:
         params["storage_id"] = f"eq.{storage_id}"
+    return params
 
-    return DB.select(CONFIG.DLM.dlm_table, params=params)
+
+@cli.command()
+@rest.get("/request/query_data_item_page", response_model=dict)
+def query_data_item_page(
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    item_name: str = "",
+    oid: str = "",
+    uid: str = "",
+    storage_id: str = "",
+    params: str | None = None,
+    limit: int = 1000,
+    cursor: str = "",
+) -> dict:
+    """Query one page of data_items ordered by UID.
+
+    params or item_name/oid/uid is required. The next page is queried with the
+    same arguments and the cursor returned with the previous page.
+
+    Parameters
+    ----------
+    item_name
+        Return data_items with the item_name provided.
+    oid
+        Return data_items referred to by the OID provided.
+    uid
+        Return data_item referred to by the UID provided.
+    storage_id
+        Return data_items referred to by a given storage_id.
+    params
+        specify the query parameters
+    limit
+        maximum number of data_items of the page.
+    cursor
+        the next_cursor of the previous page, empty for the first page.
+
+    Returns
+    -------
+    dict
+        the data_items of the page as items and the cursor of the next page as
+        next_cursor, empty after the last page.
+    """
+    params = _data_item_params(item_name, oid, uid, storage_id, params)
+    items, next_cursor = DB.select_page(
+        CONFIG.DLM.dlm_table, key="uid", params=params, limit=limit, cursor=cursor
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@cli.command()
+def iter_data_items(
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    item_name: str = "",
+    oid: str = "",
+    uid: str = "",
+    storage_id: str = "",
+    params: str | None = None,
+    page_size: int = 1000,
+) -> Iterator[dict]:
+    """Iterate over all matching data_items, querying them page by page.
+
+    params or item_name/oid/uid is required. On the command line the
+    data_items are written as newline-delimited JSON.
+
+    Parameters
+    ----------
+    item_name
+        Return data_items with the item_name provided.
+    oid
+        Return data_items referred to by the OID provided.
+    uid
+        Return data_item referred to by the UID provided.
+    storage_id
+        Return data_items referred to by a given storage_id.
+    params
+        specify the query parameters
+    page_size
+        number of data_items queried per page.
+
+    Returns
+    -------
+    Iterator[dict]
+        the data_items ordered by UID.
+    """
+    params = _data_item_params(item_name, oid, uid, storage_id, params)
+    return DB.iter_select(CONFIG.DLM.dlm_table, key="uid", params=params, page_size=page_size)
+
+
+@rest.get("/request/stream_data_item", response_class=StreamingResponse)
+def stream_data_item(
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    item_name: str = "",
+    oid: str = "",
+    uid: str = "",
+    storage_id: str = "",
+    params: str | None = None,
+    page_size: int = 1000,
+) -> StreamingResponse:
+    """Stream all matching data_items as newline-delimited JSON.
+
+    params or item_name/oid/uid is required. See iter_data_items.
+
+    Parameters
+    ----------
+    item_name
+        Return data_items with the item_name provided.
+    oid
+        Return data_items referred to by the OID provided.
+    uid
+        Return data_item referred to by the UID provided.
+    storage_id
+        Return data_items referred to by a given storage_id.
+    params
+        specify the query parameters
+    page_size
+        number of data_items queried per page.
+
+    Returns
+    -------
+    StreamingResponse
+        the data_items ordered by UID, one JSON object per line.
+    """
+    items = iter_data_items(item_name, oid, uid, storage_id, params, page_size)
+    return StreamingResponse(
+        (json.dumps(item, default=str) + "\n" for item in items),
+        media_type="application/x-ndjson",
+    )
 
 
 @cli.command()
@@ -1,12 +1,18 @@
 """DB access classes, interfaces and utilities."""
 
+import asyncio
+import base64
+import binascii
 import contextlib
+import json as jsonlib
 import logging
+from collections.abc import Iterator
 
+import httpx
 import requests
 
 from .. import CONFIG
-from ..exceptions import DatabaseOperationError, DataLifecycleError
+from ..exceptions import DatabaseOperationError, DataLifecycleError, InvalidQueryParameters
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +58,137 @@ class DBQueryError(DataLifecycleError):
 
 
 _DEFAULT_HEADERS = {"Prefer": "missing=default, return=representation"}
+_COUNT_HEADERS = {"Prefer": "count=exact"}
+
+
+def _content_range_total(content_range: str) -> int:
+    """Parse the total row count of a PostgREST Content-Range header, e.g. 0-24/3573."""
+    _, _, total = content_range.rpartition("/")
+    try:
+        return int(total)
+    except ValueError as ex:
+        raise DataLifecycleError(f"No row count in Content-Range: {content_range!r}") from ex
+
+
+def _raise_query_error(
+    ex: Exception, response, url: str, method: str, params: dict | list | None
+) -> None:
+    """Raise the DLM exception of a PostgREST error response, if it has one.
+
+    Shared by the sync and async clients, ``response`` is either a requests
+    or an httpx response. Other status codes are left to the caller to raise.
+
+    Parameters
+    ----------
+    ex : Exception
+        The HTTP error of the response.
+    response : requests.Response | httpx.Response
+        The error response.
+    url : str
+        The query url.
+    method : str
+        The query HTTP method.
+    params : dict | list | None
+        The query HTTP params.
+
+    Raises
+    ------
+    DBQueryError
+        When PostgREST rejected the query (400).
+    DatabaseOperationError
+        When the query conflicts with existing rows (409).
+    """
+    match response.status_code:
+        case 400:
+            json = response.json()
+            raise DBQueryError(url=url, method=method, params=params, json=json) from ex
+        case 409:
+            try:
+                message = response.json().get("message", str(ex))
+            except (ValueError, AttributeError):
+                message = str(ex)
+            raise DatabaseOperationError(f"Database conflict on {method} {url}", message) from ex
+
+
+def postgrest_in(values: list[str]) -> str:
+    """Format values as a PostgREST ``in`` filter, quoting reserved characters."""
+    quoted = ('"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values)
+    return f"in.({','.join(quoted)})"
+
+
+def encode_cursor(key: str, value) -> str:
+    """Encode the key column value of the last row of a page into a cursor token."""
+    token = jsonlib.dumps({"key": key, "after": value}, default=str)
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(key: str, cursor: str):
+    """Decode a cursor token into the key column value the next page starts after.
+
+    Parameters
+    ----------
+    key : str
+        The unique column the rows are ordered and paginated by.
+    cursor : str
+        The cursor returned with the previous page.
+
+    Returns
+    -------
+    Any
+        The key column value of the last row of the previous page.
+
+    Raises
+    ------
+    InvalidQueryParameters
+        When the cursor is malformed or was issued for another key column.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        token = jsonlib.loads(base64.urlsafe_b64decode(padded.encode()))
+        if token["key"] == key:
+            return token["after"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as ex:
+        raise InvalidQueryParameters(f"Invalid cursor: {cursor}") from ex
+    raise InvalidQueryParameters(f"Cursor not issued for key {key}: {cursor}")
+
+
+def keyset_params(key: str, params: dict | None, limit: int, cursor: str = "") -> dict:
+    """Extend query params to select one page ordered by a unique key column.
+
+    Parameters
+    ----------
+    key : str
+        The unique column the rows are ordered and paginated by.
+    params : dict | None
+        The PostgREST query params, their order and limit are replaced.
+    limit : int
+        The maximum number of rows of the page.
+    cursor : str
+        The cursor returned with the previous page, empty for the first page.
+
+    Returns
+    -------
+    dict
+        The query params of the page.
+    """
+    if limit < 1:
+        raise InvalidQueryParameters("The page limit must be positive")
+    params = dict(params) if params else {}
+    select = params.get("select")
+    if select and select != "*" and key not in select.split(","):
+        # the cursor is taken from the key of the last row
+        params["select"] = f"{select},{key}"
+    params["order"] = f"{key}.asc"
+    params["limit"] = limit
+    if cursor:
+        after = f"gt.{decode_cursor(key, cursor)}"
+        existing = params.get(key)
+        if existing is None:
+            params[key] = after
+        else:
+            # repeated filters of a column are combined with AND
+            params[key] = [*(existing if isinstance(existing, list) else [existing]), after]
+    return params
 
 
 class PostgRESTAccess(contextlib.AbstractContextManager):
@@ -72,9 +209,11 @@ class PostgRESTAccess(contextlib.AbstractContextManager):
         """Close the underlying requests session."""
         self._session.close()
 
-    def insert(self, table: str, *, json: object | None) -> list[dict]:
+    def insert(
+        self, table: str, *, json: object | None, params: dict | list | None = None
+    ) -> list[dict]:
         """Perform an insertion query, returning the JSON-encoded result as an object."""
-        return self._query(table, "POST", json=json)
+        return self._query(table, "POST", params=params, json=json)
 
     def update(
         self, table: str, *, json: object | None, params: dict | list | None = None
@@ -90,6 +229,85 @@ class PostgRESTAccess(contextlib.AbstractContextManager):
         """Perform a deletion query."""
         self._query(table, "DELETE", params=params)
 
+    def select_page(
+        # pylint: disable=too-many-arguments
+        self,
+        table: str,
+        *,
+        key: str,
+        params: dict | None = None,
+        limit: int = 1000,
+        cursor: str = "",
+    ) -> tuple[list[dict], str]:
+        """Perform a keyset-paginated selection query.
+
+        Parameters
+        ----------
+        table : str
+            The table to select from.
+        key : str
+            The unique column the rows are ordered and paginated by.
+        params : dict | None
+            The PostgREST query params.
+        limit : int
+            The maximum number of rows of the page.
+        cursor : str
+            The cursor returned with the previous page, empty for the first page.
+
+        Returns
+        -------
+        tuple[list[dict], str]
+            The rows of the page and the cursor of the next page, empty after the last page.
+        """
+        rows = self.select(table, params=keyset_params(key, params, limit, cursor))
+        next_cursor = encode_cursor(key, rows[-1][key]) if len(rows) == limit else ""
+        return rows, next_cursor
+
+    def iter_select(
+        self, table: str, *, key: str, params: dict | None = None, page_size: int = 1000
+    ) -> Iterator[dict]:
+        """Iterate over all rows of a selection query, fetching them page by page.
+
+        Only one page is held in memory, rows inserted or deleted during the
+        iteration are seen if they sort after the current page.
+
+        Parameters
+        ----------
+        table : str
+            The table to select from.
+        key : str
+            The unique column the rows are ordered and paginated by.
+        params : dict | None
+            The PostgREST query params.
+        page_size : int
+            The number of rows fetched per page.
+
+        Yields
+        ------
+        dict
+            The rows of the selection in key order.
+        """
+        cursor = ""
+        while True:
+            rows, cursor = self.select_page(
+                table, key=key, params=params, limit=page_size, cursor=cursor
+            )
+            yield from rows
+            if not cursor:
+                return
+
+    def exists(self, table: str, *, key: str, params: dict | None = None) -> bool:
+        """Check whether a row matches the query, fetching only the key of one row."""
+        params = dict(params) if params else {}
+        params["select"] = key
+        params["limit"] = 1
+        return bool(self.select(table, params=params))
+
+    def count(self, table: str, *, params: dict | None = None) -> int:
+        """Count the rows matching the query with a HEAD request, fetching no rows."""
+        response = self._request(table, "HEAD", params=params, headers=_COUNT_HEADERS)
+        return _content_range_total(response.headers.get("Content-Range", ""))
+
     def _query(
         self,
         table: str,
@@ -98,6 +316,16 @@ class PostgRESTAccess(contextlib.AbstractContextManager):
         json: dict | None = None,
         **kwargs,
     ) -> list[dict]:
+        return self._request(table, method, params=params, json=json, **kwargs).json()
+
+    def _request(
+        self,
+        table: str,
+        method: str,
+        params: dict | list | None = None,
+        json: dict | None = None,
+        **kwargs,
+    ) -> requests.Response:
         url = f"{self.api_url}/{table}"
         try:
             response = self._session.request(
@@ -107,24 +335,163 @@ class PostgRESTAccess(contextlib.AbstractContextManager):
         except requests.RequestException as ex:
             if ex.response is None:
                 raise
-            match ex.response.status_code:
-                case 400:
-                    json = ex.response.json()
-                    raise DBQueryError(url=url, method=method, params=params, json=json) from ex
-                case 409:
-                    try:
-                        message = ex.response.json().get("message", str(ex))
-                    except (ValueError, json.JSONDecodeError, AttributeError):
-                        message = str(ex)
-                    raise DatabaseOperationError(
-                        f"Database conflict on {method} {url}", message
-                    ) from ex
-                case _:
-                    raise
+            _raise_query_error(ex, ex.response, url, method, params)
+            raise
+        return response
+
+
+class AsyncPostgRESTAccess(contextlib.AbstractAsyncContextManager):
+    """Async SQL database client accessed through the PostgREST HTTP API.
+
+    Offers the same select/insert/update/delete surface as ``PostgRESTAccess``
+    but awaits the requests on a connection-pooled HTTP/1.1 keep-alive client,
+    so async callers do not block their event loop or worker threads.
+
+    The pooled client is bound to the event loop it is first used on and is
+    recreated transparently when used from a different event loop, which
+    allows a single module-level instance to serve services as well as
+    one-off ``asyncio.run`` calls.
+    """
+
+    def __init__(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        api_url: str,
+        timeout: int | float = 10,
+        headers: dict | None = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: int | float = 30,
+    ):
+        """Create the async DB access.
+
+        Parameters
+        ----------
+        api_url : str
+            The PostgREST base URL.
+        timeout : int | float
+            Timeout in seconds of every request.
+        headers : dict | None
+            Request headers, by default the PostgREST representation headers.
+        max_connections : int
+            Maximum number of concurrent connections of the pool.
+        max_keepalive_connections : int
+            Maximum number of idle keep-alive connections kept in the pool.
+        keepalive_expiry : int | float
+            Time in seconds after which idle keep-alive connections are closed.
+        """
+        self.api_url = api_url
+        self._headers = dict(headers if headers else _DEFAULT_HEADERS)
+        self._timeout = httpx.Timeout(timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def __aenter__(self):
+        """Open the pooled HTTP client."""
+        self._get_client()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_value, _traceback) -> None:
+        """Close the pooled HTTP client."""
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client, it is reopened on the next query."""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # connections of a client can not be shared between event loops
+            self._client = httpx.AsyncClient(
+                headers=self._headers, timeout=self._timeout, limits=self._limits
+            )
+            self._loop = loop
+        return self._client
+
+    async def insert(
+        self, table: str, *, json: object | None, params: dict | list | None = None
+    ) -> list[dict]:
+        """Perform an insertion query, returning the JSON-encoded result as an object."""
+        return await self._query(table, "POST", params=params, json=json)
+
+    async def update(
+        self, table: str, *, json: object | None, params: dict | list | None = None
+    ) -> list[dict]:
+        """Perform an update query, returning the JSON-encoded result as an object."""
+        return await self._query(table, "PATCH", params=params, json=json)
+
+    async def select(self, table: str, *, params: dict | list | None = None) -> list[dict]:
+        """Perform a selection query, returning the JSON-encoded result as an object."""
+        return await self._query(table, "GET", params=params)
+
+    async def delete(self, table: str, *, params: dict | list | None = None) -> None:
+        """Perform a deletion query."""
+        await self._query(table, "DELETE", params=params)
+
+    async def exists(self, table: str, *, key: str, params: dict | None = None) -> bool:
+        """Check whether a row matches the query, fetching only the key of one row."""
+        params = dict(params) if params else {}
+        params["select"] = key
+        params["limit"] = 1
+        return bool(await self.select(table, params=params))
+
+    async def count(self, table: str, *, params: dict | None = None) -> int:
+        """Count the rows matching the query with a HEAD request, fetching no rows."""
+        response = await self._request(table, "HEAD", params=params, headers=_COUNT_HEADERS)
+        return _content_range_total(response.headers.get("Content-Range", ""))
+
+    async def _query(
+        self,
+        table: str,
+        method: str,
+        params: dict | list | None = None,
+        json: dict | None = None,
+        **kwargs,
+    ) -> list[dict]:
+        response = await self._request(table, method, params=params, json=json, **kwargs)
+        if not response.content:
+            return []
         return response.json()
 
+    async def _request(
+        self,
+        table: str,
+        method: str,
+        params: dict | list | None = None,
+        json: dict | None = None,
+        **kwargs,
+    ) -> httpx.Response:
+        url = f"{self.api_url}/{table}"
+        try:
+            response = await self._get_client().request(
+                method, url, params=params, json=json, **kwargs
+            )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as ex:
+            _raise_query_error(ex, ex.response, url, method, params)
+            raise
+        return response
+
 
 # global access object for convenience, already primed
 DB = PostgRESTAccess(CONFIG.REST.base_url)
 # pylint: disable-next=unnecessary-dunder-call
 DB.__enter__()
+
+# global async access object, the pooled client is opened on first use
+ASYNC_DB = AsyncPostgRESTAccess(
+    CONFIG.REST.base_url,
+    timeout=CONFIG.get("REST.timeout", 10),
+    max_connections=CONFIG.get("REST.pool.max_connections", 100),
+    max_keepalive_connections=CONFIG.get("REST.pool.max_keepalive_connections", 20),
+    keepalive_expiry=CONFIG.get("REST.pool.keepalive_expiry", 30),
+)
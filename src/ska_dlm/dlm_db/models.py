@@ -12,6 +12,7 @@ from ska_dlm.common_types import (
     ItemState,
     LocationCountry,
     LocationType,
+    MigrationState,
     MimeType,
     OutboxStatus,
     PhaseType,
@@ -329,9 +330,9 @@ class Migration(Base):
     __table_args__ = {"schema": "dlm"}
 
     migration_id = Column(BigInteger, primary_key=True)
-    job_id = Column(BigInteger, nullable=False)
+    job_id = Column(BigInteger, nullable=True)
     oid = Column(UUID(as_uuid=True), nullable=False)
-    url = Column(String, nullable=False)
+    url = Column(String, nullable=True)
     source_storage_id = Column(
         UUID(as_uuid=True), ForeignKey("dlm.storage.storage_id"), nullable=False
     )
@@ -346,6 +347,8 @@ class Migration(Base):
     date = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
     completion_date = Column(DateTime(timezone=False), nullable=True)
     command = Column(String, nullable=True)
+    state = Column(String, nullable=False, default=MigrationState.SUBMITTED.value)
+    request = Column(JSONB, nullable=True)
 
     source_storage = relationship("Storage", foreign_keys=[source_storage_id])
     destination_storage = relationship("Storage", foreign_keys=[destination_storage_id])
@@ -368,3 +371,4 @@ class Outbox(Base):
     created_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
     last_attempt = Column(DateTime(timezone=False), nullable=True)
     sent_at = Column(DateTime(timezone=False), nullable=True)
+    next_attempt_at = Column(DateTime(timezone=False), nullable=False, server_default=func.now())
@@ -8,6 +8,7 @@ from .heuristics import (
     IdentifyTargetStorageHeuristic,
     IncreaseOidPhaseHeuristic,
     OidPhaseEnforceHeuristic,
+    OidPhaseSweepHeuristic,
 )
 
 __all__ = [
@@ -17,5 +18,6 @@ __all__ = [
     "DecreaseOidPhaseHeuristic",
     "DeleteUidHeuristic",
     "OidPhaseEnforceHeuristic",
+    "OidPhaseSweepHeuristic",
     "IdentifyTargetStorageHeuristic",
 ]
@@ -18,24 +18,133 @@ class for heuristics and the OID Phase heuristics as one implementation.
 # pylint: disable=broad-exception-caught
 # pylint: disable=too-many-return-statements
 
+import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List, Optional, Union
 from uuid import UUID
 
-from sqlalchemy import func, select, update
+import numpy as np
+from sqlalchemy import case, func, literal_column, or_, select, true, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ska_dlm.common_types import ItemState, PhaseType
-from ska_dlm.dlm_db.models import DataItem, Storage
+from ska_dlm.common_types import ConfigType, ItemState, PhaseType
+from ska_dlm.dlm_db.models import DataItem, Storage, StorageConfig
 from ska_dlm.dlm_migration import _copy_data_item
 from ska_dlm.dlm_storage import dlm_storage_requests
+from ska_dlm.dlm_storage.deletion_executor import DeletionExecutor
+
+from .sharding import OidShard
 
 logger = logging.getLogger(__name__)
 
 PHASE_ORDER = {v: p for p, v in enumerate(PhaseType)}
 PHASE_ORDER[PhaseType.SOLID] = 4
 n_PHASE_ORDER = {v: k for k, v in PHASE_ORDER.items()}
+# phase codes of the batch API are the positions of the phases in PhaseType
+PHASE_CODES = {phase: code for code, phase in enumerate(PhaseType)}
+_CODE_WEIGHTS = np.array([PHASE_ORDER[phase] for phase in PhaseType], dtype=np.int64)
+# code of the combined phase for a weight sum capped at 4, with 3 == LIQUID
+_COMBINED_CODES = np.array(
+    [PHASE_CODES[n_PHASE_ORDER[2 if weight == 3 else weight]] for weight in range(5)],
+    dtype=np.int8,
+)
+
+
+def _phase_order_sql(column):
+    """Return the SQL expression mapping a phase column to its PHASE_ORDER weight."""
+    return case(
+        {phase: literal_column(str(order)) for phase, order in PHASE_ORDER.items()},
+        value=column,
+        else_=literal_column("0"),
+    )
+
+
+def _in_shard(stmt, shard: Optional[OidShard]):
+    """Restrict a data_item query to the OIDs of a shard, if any."""
+    if shard is None:
+        return stmt
+    return stmt.where(shard.where(DataItem.OID))
+
+
+def _combined_order_sql(weight):
+    """Return the SQL expression combining summed UID weights like CombineUidPhasesHeuristic."""
+    return case(
+        (weight >= 4, literal_column("4")), (weight == 3, literal_column("2")), else_=weight
+    )
+
+
+class ExpiryWatermark:
+    """Keyset position of an expiry scan kept between heuristic runs.
+
+    The expired rows are scanned in (expiration, id) order, served by the
+    partial expiration indexes of data_item, starting after the position
+    reached by the previous run. A run thus only considers the rows which
+    expired since, however large the catalogue. Rows left behind, e.g. because
+    their deletion would violate the resilience policy, are considered again
+    by a full scan every ``rescan_interval`` seconds or when the scope (the
+    shard) of the scan changes. The position is only advanced once the
+    deletions of the scanned rows are committed.
+    """
+
+    def __init__(self, rescan_interval: float = 3600):
+        self.rescan_interval = rescan_interval
+        self.position: Optional[tuple] = None
+        self._scope = None
+        self._last_rescan: Optional[float] = None
+
+    def start(self, scope=None) -> Optional[tuple]:
+        """Start a scan, returning the position to scan after, None for a full scan.
+
+        Parameters
+        ----------
+        scope : Any
+            Scope of the scan, a different scope than the last one rescans.
+
+        Returns
+        -------
+        Optional[tuple]
+            The (expiration, id) position reached by the previous scan
+        """
+        now = time.monotonic()
+        if (
+            self._last_rescan is None
+            or scope != self._scope
+            or now - self._last_rescan >= self.rescan_interval
+        ):
+            self.position = None
+            self._scope = scope
+            self._last_rescan = now
+        return self.position
+
+    def advance(self, expiration, key) -> None:
+        """Record the (expiration, id) position of the last scanned row."""
+        self.position = (expiration, key)
+
+    def advance_handled(self, rows: list, handled: list[bool]) -> None:
+        """Advance to the last of the scanned rows before the first one not handled.
+
+        Parameters
+        ----------
+        rows : list
+            The scanned (id, expiration) rows in scan order.
+        handled : list[bool]
+            Whether the deletions of every row committed successfully.
+        """
+        for row, row_handled in zip(rows, handled):
+            if not row_handled:
+                break
+            self.advance(row[1], row[0])
+
+
+def _after(expiration_column, key_column, position: Optional[tuple]):
+    """Return the keyset condition of the rows after an (expiration, id) position."""
+    if position is None:
+        return true()
+    return tuple_(expiration_column, key_column) > tuple_(*position)
 
 
 class HeuristicResult:
@@ -127,6 +236,74 @@ class CombineUidPhasesHeuristic(BaseHeuristic):
             f"Combined phase: {combined_phase}", {"actual_phase": combined_phase}
         )
 
+    @staticmethod
+    def encode_phases(phases: List[PhaseType]) -> np.ndarray:
+        """Encode phases as an array of phase codes for :meth:`combine_batch`.
+
+        Args
+        ----
+        phases : List[PhaseType]
+            List of phases
+
+        Returns
+        -------
+        np.ndarray
+            The PHASE_CODES of the phases
+        """
+        return np.fromiter(
+            (PHASE_CODES[PhaseType(phase)] for phase in phases), dtype=np.int8, count=len(phases)
+        )
+
+    @staticmethod
+    def decode_phases(codes: np.ndarray) -> List[PhaseType]:
+        """Decode an array of phase codes into phases.
+
+        Args
+        ----
+        codes : np.ndarray
+            Array of PHASE_CODES
+
+        Returns
+        -------
+        List[PhaseType]
+            The phases of the codes
+        """
+        phases = list(PhaseType)
+        return [phases[code] for code in codes.tolist()]
+
+    @staticmethod
+    def combine_batch(
+        oid_index: np.ndarray, phase_codes: np.ndarray, n_oids: Optional[int] = None
+    ) -> np.ndarray:
+        """Combine the UID phases of many OIDs at once.
+
+        Applies the same rules as :meth:`execute` to every OID in one grouped
+        integer pass: the PHASE_ORDER weights of the UID phases are summed per
+        OID, capped at SOLID, and a sum of 3 is LIQUID. OIDs without UIDs
+        combine to PLASMA.
+
+        Args
+        ----
+        oid_index : np.ndarray
+            Index of the OID of every UID, from 0 to n_oids - 1
+        phase_codes : np.ndarray
+            PHASE_CODES of the phase of every UID
+        n_oids : Optional[int]
+            Number of OIDs, defaults to the largest OID index + 1
+
+        Returns
+        -------
+        np.ndarray
+            The PHASE_CODES of the combined phase of every OID
+        """
+        oid_index = np.asarray(oid_index, dtype=np.intp)
+        weights = _CODE_WEIGHTS[np.asarray(phase_codes, dtype=np.intp)]
+        if n_oids is None:
+            n_oids = int(oid_index.max()) + 1 if oid_index.size else 0
+        sums = np.zeros(n_oids, dtype=np.int64)
+        np.add.at(sums, oid_index, weights)
+        return _COMBINED_CODES[np.minimum(sums, 4)]
+
 
 class ChangeOidPhaseHeuristic(BaseHeuristic):
     """Heuristic to change the OID phase based on the change_oid_phase sequence diagram.
@@ -298,11 +475,74 @@ class ChangeOidPhaseHeuristic(BaseHeuristic):
             )
 
 
+async def _payload_deletion_jobs(session: AsyncSession, uids: List[UUID]) -> dict[UUID, dict]:
+    """Resolve the rclone volume and path of the payloads of READY UIDs.
+
+    Args
+    ----
+    session : AsyncSession
+        The database session.
+    uids : List[UUID]
+        The UIDs to resolve.
+
+    Returns
+    -------
+    dict[UUID, dict]
+        ``DeletionExecutor.delete_payload`` keyword arguments keyed by UID,
+        UIDs which are not READY or not on an rclone storage are omitted.
+    """
+    stmt = select(
+        DataItem.UID,
+        DataItem.storage_id,
+        DataItem.uri,
+        Storage.root_directory,
+        StorageConfig.config,
+    ).where(
+        DataItem.UID.in_(uids),
+        DataItem.item_state == ItemState.READY,
+        DataItem.storage_id == Storage.storage_id,
+        StorageConfig.storage_id == Storage.storage_id,
+        StorageConfig.config_type == ConfigType.RCLONE,
+    )
+    result = await session.execute(stmt)
+    jobs = {}
+    for uid, storage_id, uri, root_directory, config in result.fetchall():
+        jobs[uid] = {
+            "uid": str(uid),
+            "storage_id": str(storage_id),
+            "volume": f"{config['name']}:{config.get('root_path', '/')}",
+            "path": f"{root_directory}/{uri}".replace("//", "/"),
+        }
+    return jobs
+
+
+@dataclass
+class _UidDeletion:
+    """A UID deletion approved by the resilience check, awaiting its payload deletion."""
+
+    uid: UUID
+    oid: UUID
+    data_item: DataItem
+    result_phase: PhaseType
+
+    @property
+    def item_type(self) -> str:
+        """The item_type of the data_item, file if unknown."""
+        item_type = getattr(self.data_item, "item_type", None)
+        return item_type if isinstance(item_type, str) and item_type else "file"
+
+
 class DeleteUidHeuristic(BaseHeuristic):
-    """Heuristic to safely delete a UID payload while preserving OID resilience."""
+    """Heuristic to safely delete a UID payload while preserving OID resilience.
 
-    def __init__(self, session: AsyncSession):
+    If a ``DeletionExecutor`` is given the rclone calls of the payload deletion
+    are awaited on the executor's pooled client instead of blocking the event
+    loop, which allows several deletions to be in flight at once.
+    """
+
+    def __init__(self, session: AsyncSession, executor: Optional[DeletionExecutor] = None):
         super().__init__(session)
+        self.executor = executor
         self.combine_heuristic = CombineUidPhasesHeuristic(session)
 
     async def _mark_uid_as_deleted(self, uid: UUID) -> None:
@@ -384,162 +624,286 @@ class DeleteUidHeuristic(BaseHeuristic):
             HeuristicResult
         """
         try:
-            # Step 0: Verify target storage/item accessibility before deleting anything
-            # This makes sure that items which had been deleted as part of a container will
-            # be marked as deleted.
-
-            # Get full data_item information
-            stmt = select(DataItem).where(DataItem.UID == uid)
-            result = await self.session.execute(stmt)
-            data_item = result.scalar()
+            deletion = await self._plan_deletion(uid)
+            if isinstance(deletion, HeuristicResult):
+                return deletion
+            # Step 5: Delete payload from storage manager
+            if self.executor is not None:
+                delete_result = (await self._delete_payloads([deletion]))[0]
+            else:
+                delete_result = self._delete_payload(deletion)
+            return await self._finish_deletion(deletion, delete_result)
 
-            if not data_item:
-                return HeuristicResult(False, f"No data found for UID {uid}")
+        except Exception as exc:
+            # Any other exception: roll back
+            await self.session.rollback()
+            return HeuristicResult(False, f"Error executing UID deletion heuristic: {str(exc)}")
 
-            if not data_item.OID:
-                return HeuristicResult(False, f"UID {uid} has no associated OID")
+    async def execute_many(self, uids: List[UUID]) -> List[HeuristicResult]:
+        """Delete several UIDs, deleting their payloads concurrently if an executor is set.
 
-            # Step 1: resolve OID
-            oid = data_item.OID
-            target_phase = data_item.target_phase
-            (
-                storage_accessible,
-                item_accessible,
-                storage_id,
-            ) = self._get_storage_accessibility(uid, data_item)
-
-            # If the item is not accessible on storage,
-            # mark the UID as deleted to keep DB state consistent.
-            if not item_accessible and isinstance(storage_id, (UUID, str)) and storage_accessible:
-                await self._mark_uid_as_deleted(uid)
-                await self.session.commit()
-                return self.success_result(
-                    f"UID {uid} marked as deleted.",
-                    {
-                        "uid": uid,
-                        "oid": oid,
-                        "storage_id": storage_id,
-                        "storage_accessible": storage_accessible,
-                        "item_accessible": item_accessible,
-                    },
-                )
+        The database steps of every UID run one after the other on the session,
+        only the payload deletions are handed to the executor at once. UIDs of an
+        OID which already has a deletion in flight are deferred to the next
+        round, so that every resilience check sees the previous deletions.
 
-            # Step 2: Fetch other UIDs for same OID that are not already deleted
-            uid_stmt = select(Storage.storage_phase, DataItem.UID).where(
-                DataItem.OID == oid,
-                DataItem.deleted.is_(False),
-                DataItem.storage_id == Storage.storage_id,
-            )
-            uid_result = await self.session.execute(uid_stmt)
-            remaining_rows = [r for r in uid_result.fetchall() if r[1] != uid]
-            remaining_phases = [r[0] for r in remaining_rows]
+        Parameters
+        ----------
+        uids : List[UUID]
+            The UIDs to delete.
 
-            if remaining_phases:
-                combine_result = await self.combine_heuristic.execute(remaining_phases)
-                if not combine_result.success:
-                    return combine_result
-                # Step 3: Get resulting phase after deletion
-                result_phase = combine_result.data["actual_phase"]
-            else:
-                # No remaining replicas; resilience phase reduces to GAS
-                result_phase = PhaseType.GAS
+        Returns
+        -------
+        List[HeuristicResult]
+            One result per UID, in the order of the UIDs.
+        """
+        if self.executor is None:
+            return [await self.execute(uid) for uid in uids]
+        results: dict[UUID, HeuristicResult] = {}
+        remaining = list(uids)
+        while remaining:
+            deletions: dict[UUID, _UidDeletion] = {}
+            deferred = []
+            for uid in remaining:
+                deletion = await self._try_plan_deletion(uid)
+                if isinstance(deletion, HeuristicResult):
+                    results[uid] = deletion
+                elif deletion.oid in deletions:
+                    deferred.append(uid)
+                else:
+                    deletions[deletion.oid] = deletion
+            for deletion, success in zip(
+                deletions.values(), await self._delete_payloads(list(deletions.values()))
+            ):
+                try:
+                    results[deletion.uid] = await self._finish_deletion(deletion, success)
+                except Exception as exc:
+                    await self.session.rollback()
+                    results[deletion.uid] = HeuristicResult(
+                        False, f"Error executing UID deletion heuristic: {str(exc)}"
+                    )
+            remaining = deferred
+        return [results[uid] for uid in uids]
 
-            # Step 4: Reject if result phase < target phase
-            if PHASE_ORDER[result_phase] < PHASE_ORDER[target_phase]:
-                # Here we could try to create another copy by
-                # calling the IncreaseOidPhaseHeuristic, once implemented
-                return HeuristicResult(
-                    False,
-                    "Deletion would violate resilience policy",
-                    {
-                        "oid": oid,
-                        "uid": uid,
-                        "result_phase": result_phase,
-                        "target_phase": target_phase,
-                    },
-                )
+    async def _try_plan_deletion(self, uid: UUID) -> Union[HeuristicResult, _UidDeletion]:
+        """Plan the deletion of a UID, returning a failed result on errors."""
+        try:
+            return await self._plan_deletion(uid)
+        except Exception as exc:
+            await self.session.rollback()
+            return HeuristicResult(False, f"Error executing UID deletion heuristic: {str(exc)}")
 
-            # Step 5: Delete payload from storage manager
-            delete_kwargs = {}
-            item_type = getattr(data_item, "item_type", None)
-            item_name = getattr(data_item, "item_name", None)
-            if isinstance(item_type, str) and item_type:
-                delete_kwargs["item_type"] = item_type
-            if isinstance(item_name, str) and item_name:
-                delete_kwargs["item_name"] = item_name
+    async def _plan_deletion(self, uid: UUID) -> Union[HeuristicResult, _UidDeletion]:
+        """Run steps 0 to 4 of the deletion of a UID.
 
-            try:
-                delete_result = dlm_storage_requests.delete_data_item_payload(
-                    str(uid), **delete_kwargs
-                )
-            except TypeError as exc:
-                if "item_name" not in str(exc) and "unexpected keyword argument" not in str(exc):
-                    raise
-                delete_kwargs.pop("item_name", None)
-                delete_result = dlm_storage_requests.delete_data_item_payload(
-                    str(uid), **delete_kwargs
-                )
+        Returns the result of the UID if it is decided without deleting its
+        payload, otherwise the deletion to carry out.
+        """
+        # Step 0: Verify target storage/item accessibility before deleting anything
+        # This makes sure that items which had been deleted as part of a container will
+        # be marked as deleted.
 
-            if not delete_result:
-                item_name = item_name or str(uid)
-                return HeuristicResult(False, f"Failed to delete payload for {item_name} {uid}")
+        # Get full data_item information
+        stmt = select(DataItem).where(DataItem.UID == uid)
+        result = await self.session.execute(stmt)
+        data_item = result.scalar()
+
+        if not data_item:
+            return HeuristicResult(False, f"No data found for UID {uid}")
+
+        if not data_item.OID:
+            return HeuristicResult(False, f"UID {uid} has no associated OID")
+
+        # Step 1: resolve OID
+        oid = data_item.OID
+        target_phase = data_item.target_phase
+        if self.executor is None:
+            accessibility = self._get_storage_accessibility(uid, data_item)
+        else:
+            accessibility = await asyncio.to_thread(
+                self._get_storage_accessibility, uid, data_item
+            )
+        storage_accessible, item_accessible, storage_id = accessibility
 
-            # Step 6: Update UID metadata
+        # If the item is not accessible on storage,
+        # mark the UID as deleted to keep DB state consistent.
+        if not item_accessible and isinstance(storage_id, (UUID, str)) and storage_accessible:
             await self._mark_uid_as_deleted(uid)
-
-            # All children need to be marked as DELETED as well
-            if data_item.item_type is not None and data_item.item_type.lower() == "container":
-                stmt = select(DataItem.UID).where(DataItem.parents == uid)
-                result = await self.session.execute(stmt)
-                child_uids = result.scalars().all()
-                for child_uid in child_uids:
-                    if await self._check_parent_deleted(child_uid):
-                        await self._mark_uid_as_deleted(child_uid)
-                        logger.debug("Marked child_uid as deleted: %s", child_uid)
-
-            # Update OID phase for the OID group
-            update_oid_stmt = (
-                update(DataItem).where(DataItem.OID == oid).values(OID_phase=result_phase)
+            await self.session.commit()
+            return self.success_result(
+                f"UID {uid} marked as deleted.",
+                {
+                    "uid": uid,
+                    "oid": oid,
+                    "storage_id": storage_id,
+                    "storage_accessible": storage_accessible,
+                    "item_accessible": item_accessible,
+                },
             )
-            await self.session.execute(update_oid_stmt)
 
-            await self.session.commit()
+        # Step 2: Fetch other UIDs for same OID that are not already deleted
+        uid_stmt = select(Storage.storage_phase, DataItem.UID).where(
+            DataItem.OID == oid,
+            DataItem.deleted.is_(False),
+            DataItem.storage_id == Storage.storage_id,
+        )
+        uid_result = await self.session.execute(uid_stmt)
+        remaining_rows = [r for r in uid_result.fetchall() if r[1] != uid]
+        remaining_phases = [r[0] for r in remaining_rows]
 
-            return self.success_result(
-                f"Deleted UID {uid} payload and updated OID {oid} phase to {result_phase}",
-                {"uid": uid, "oid": oid, "result_phase": result_phase},
+        if remaining_phases:
+            combine_result = await self.combine_heuristic.execute(remaining_phases)
+            if not combine_result.success:
+                return combine_result
+            # Step 3: Get resulting phase after deletion
+            result_phase = combine_result.data["actual_phase"]
+        else:
+            # No remaining replicas; resilience phase reduces to GAS
+            result_phase = PhaseType.GAS
+
+        # Step 4: Reject if result phase < target phase
+        if PHASE_ORDER[result_phase] < PHASE_ORDER[target_phase]:
+            # Here we could try to create another copy by
+            # calling the IncreaseOidPhaseHeuristic, once implemented
+            return HeuristicResult(
+                False,
+                "Deletion would violate resilience policy",
+                {
+                    "oid": oid,
+                    "uid": uid,
+                    "result_phase": result_phase,
+                    "target_phase": target_phase,
+                },
+            )
+        return _UidDeletion(uid, oid, data_item, result_phase)
+
+    def _delete_payload(self, deletion: _UidDeletion) -> bool:
+        """Delete the payload of a planned deletion with the storage requests."""
+        delete_kwargs = {}
+        item_type = getattr(deletion.data_item, "item_type", None)
+        item_name = getattr(deletion.data_item, "item_name", None)
+        if isinstance(item_type, str) and item_type:
+            delete_kwargs["item_type"] = item_type
+        if isinstance(item_name, str) and item_name:
+            delete_kwargs["item_name"] = item_name
+        try:
+            return dlm_storage_requests.delete_data_item_payload(
+                str(deletion.uid), **delete_kwargs
+            )
+        except TypeError as exc:
+            message = str(exc)
+            if "item_name" not in message and "unexpected keyword argument" not in message:
+                raise
+            delete_kwargs.pop("item_name", None)
+            return dlm_storage_requests.delete_data_item_payload(
+                str(deletion.uid), **delete_kwargs
             )
 
-        except Exception as exc:
-            # Any other exception: roll back
-            await self.session.rollback()
-            return HeuristicResult(False, f"Error executing UID deletion heuristic: {str(exc)}")
+    async def _finish_deletion(
+        self, deletion: _UidDeletion, delete_result: bool
+    ) -> HeuristicResult:
+        """Run step 6 of a planned deletion once its payload deletion returned."""
+        uid, oid, data_item = deletion.uid, deletion.oid, deletion.data_item
+        if not delete_result:
+            item_name = getattr(data_item, "item_name", None)
+            if not isinstance(item_name, str) or not item_name:
+                item_name = str(uid)
+            return HeuristicResult(False, f"Failed to delete payload for {item_name} {uid}")
+
+        # Step 6: Update UID metadata
+        await self._mark_uid_as_deleted(uid)
+
+        # All children need to be marked as DELETED as well
+        if data_item.item_type is not None and data_item.item_type.lower() == "container":
+            stmt = select(DataItem.UID).where(DataItem.parents == uid)
+            result = await self.session.execute(stmt)
+            child_uids = result.scalars().all()
+            for child_uid in child_uids:
+                if await self._check_parent_deleted(child_uid):
+                    await self._mark_uid_as_deleted(child_uid)
+                    logger.debug("Marked child_uid as deleted: %s", child_uid)
+
+        # Update OID phase for the OID group
+        update_oid_stmt = (
+            update(DataItem).where(DataItem.OID == oid).values(OID_phase=deletion.result_phase)
+        )
+        await self.session.execute(update_oid_stmt)
+
+        await self.session.commit()
+
+        return self.success_result(
+            f"Deleted UID {uid} payload and updated OID {oid} phase to {deletion.result_phase}",
+            {"uid": uid, "oid": oid, "result_phase": deletion.result_phase},
+        )
+
+    async def _delete_payloads(self, deletions: List[_UidDeletion]) -> List[bool]:
+        """Delete the payloads of planned deletions concurrently through the executor."""
+        if not deletions:
+            return []
+        jobs = await _payload_deletion_jobs(self.session, [d.uid for d in deletions])
+        submitted = []
+        for deletion in deletions:
+            if deletion.uid in jobs:
+                submitted.append(deletion)
+            else:
+                logger.warning("Unable to resolve the payload location of UID %s", deletion.uid)
+        results = await self.executor.delete_payloads(
+            [{**jobs[d.uid], "item_type": d.item_type} for d in submitted]
+        )
+        succeeded = {d.uid for d, result in zip(submitted, results) if result["success"]}
+        return [d.uid in succeeded for d in deletions]
 
 
 class UidExpiryHeuristic(BaseHeuristic):
     """Heuristic to discover expired UIDs and delegate deletion."""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        batch_size: int = 0,
+        executor: Optional[DeletionExecutor] = None,
+        shard: Optional[OidShard] = None,
+        watermark: Optional[ExpiryWatermark] = None,
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
         super().__init__(session)
-        self.delete_heuristic = DeleteUidHeuristic(session)
+        self.batch_size = batch_size
+        self.executor = executor
+        self.shard = shard
+        self.watermark = watermark
+        self.delete_heuristic = DeleteUidHeuristic(session, executor=executor)
+        self.combine_heuristic = CombineUidPhasesHeuristic(session)
 
     async def execute(self) -> HeuristicResult:
         """Execute the UID expiry heuristic.
 
         The heuristic discovers any UIDs whose expiration timestamp has passed,
-        then delegates their cleanup to the delete heuristic.
+        then delegates their cleanup to the delete heuristic, which deletes the
+        payloads concurrently if a deletion executor is set. If a batch_size
+        is configured the expired UIDs are processed in set-based batches
+        instead, see ``_execute_batched``. With a shard only the UIDs of the
+        OIDs of the shard are considered. With a watermark only the UIDs which
+        expired since the previous run are considered, see ExpiryWatermark.
 
         Returns
         -------
         HeuristicResult
             The result of the expiry scan and delegated deletions.
         """
+        if self.batch_size > 0:
+            return await self._execute_batched()
         try:
-            stmt = select(DataItem.UID).where(
-                DataItem.UID_expiration < func.now(),  # pylint: disable=not-callable
-                DataItem.deleted.is_(False),
+            position = self._start_scan()
+            stmt = (
+                select(DataItem.UID, DataItem.UID_expiration)
+                .where(
+                    DataItem.UID_expiration < func.now(),  # pylint: disable=not-callable
+                    DataItem.deleted.is_(False),
+                    _after(DataItem.UID_expiration, DataItem.UID, position),
+                )
+                .order_by(DataItem.UID_expiration, DataItem.UID)
             )
-            result = await self.session.execute(stmt)
+            result = await self.session.execute(_in_shard(stmt, self.shard))
             expired_rows = result.fetchall()
             expired_uids = [row[0] for row in expired_rows]
 
@@ -547,8 +911,8 @@ class UidExpiryHeuristic(BaseHeuristic):
                 return self.success_result("No expired UIDs found", {"expired_uids": []})
 
             deletion_results = []
-            for uid in expired_uids:
-                delete_result = await self.delete_heuristic.execute(uid)
+            delete_results = await self.delete_heuristic.execute_many(expired_uids)
+            for uid, delete_result in zip(expired_uids, delete_results):
                 deletion_results.append(
                     {
                         "uid": uid,
@@ -558,6 +922,62 @@ class UidExpiryHeuristic(BaseHeuristic):
                 )
                 if not delete_result.success:
                     logger.info("Deletion of UID %s failed: %s", uid, delete_result.message)
+            if self.watermark is not None:
+                # failed deletions are retried by the next run
+                self.watermark.advance_handled(
+                    expired_rows, [delete_result.success for delete_result in delete_results]
+                )
+
+            success = all(item["success"] for item in deletion_results)
+            message = "Deleted expired UIDs" if success else "Some expired UID deletions failed"
+
+            return HeuristicResult(
+                success,
+                message,
+                {"expired_uids": expired_uids, "deletion_results": deletion_results},
+            )
+
+        except Exception as exc:
+            await self.session.rollback()
+            return HeuristicResult(False, f"Error executing UID expiry heuristic: {str(exc)}")
+
+    async def _execute_batched(self) -> HeuristicResult:
+        """Execute the UID expiry heuristic in set-based batches.
+
+        Expired UIDs are paged by expiration and UID (keyset pagination) in
+        batches of ``batch_size``. For every batch the OID siblings and their storage
+        phases are loaded with a single query, the resilience check is
+        evaluated in memory and the resulting state changes are written
+        with one multi-row UPDATE before the batch is committed, see
+        ``_commit_batch``.
+
+        Returns
+        -------
+        HeuristicResult
+            The result of the expiry scan and batched deletions.
+        """
+        try:
+            expired_uids = []
+            deletion_results = []
+            position = self._start_scan()
+            while True:
+                batch = await self._fetch_expired_batch(position)
+                if not batch:
+                    break
+                position = (batch[-1].UID_expiration, batch[-1].UID)
+                expired_uids.extend(row.UID for row in batch)
+                deletion_results.extend(await self._process_expired_batch(batch))
+                if self.watermark is not None:
+                    self.watermark.advance(*position)
+                if len(batch) < self.batch_size:
+                    break
+
+            if not expired_uids:
+                return self.success_result("No expired UIDs found", {"expired_uids": []})
+
+            for item in deletion_results:
+                if not item["success"]:
+                    logger.info("Deletion of UID %s failed: %s", item["uid"], item["message"])
 
             success = all(item["success"] for item in deletion_results)
             message = "Deleted expired UIDs" if success else "Some expired UID deletions failed"
@@ -572,19 +992,266 @@ class UidExpiryHeuristic(BaseHeuristic):
             await self.session.rollback()
             return HeuristicResult(False, f"Error executing UID expiry heuristic: {str(exc)}")
 
+    def _start_scan(self) -> Optional[tuple]:
+        """Return the position to continue the scan from, None for a full scan."""
+        if self.watermark is None:
+            return None
+        return self.watermark.start(self.shard.index if self.shard else None)
+
+    async def _fetch_expired_batch(self, position: Optional[tuple]) -> list:
+        """Return the page of expired, not yet deleted, data_item rows after a position.
+
+        Like the check_item_on_storage step of the non-batched mode only READY
+        items are deleted, so that e.g. the INITIALISED destination of an
+        in-flight copy, which inherits the expiration of its source, is kept.
+        DELETED items are selected to synchronise their flags.
+        """
+        stmt = select(
+            DataItem.UID,
+            DataItem.UID_expiration,
+            DataItem.OID,
+            DataItem.target_phase,
+            DataItem.storage_id,
+            DataItem.item_state,
+            DataItem.item_type,
+            DataItem.item_name,
+        ).where(
+            DataItem.UID_expiration < func.now(),  # pylint: disable=not-callable
+            DataItem.deleted.is_(False),
+            DataItem.item_state.in_([ItemState.READY, ItemState.DELETED]),
+            _after(DataItem.UID_expiration, DataItem.UID, position),
+        )
+        stmt = (
+            _in_shard(stmt, self.shard)
+            .order_by(DataItem.UID_expiration, DataItem.UID)
+            .limit(self.batch_size)
+        )
+        result = await self.session.execute(stmt)
+        return result.fetchall()
+
+    async def _process_expired_batch(self, batch: list) -> list[dict]:
+        """Evaluate and apply the deletion of one batch of expired UIDs."""
+        oids = {row.OID for row in batch if row.OID}
+        replicas: dict[UUID, dict[UUID, PhaseType]] = defaultdict(dict)
+        if oids:
+            sibling_stmt = select(DataItem.OID, DataItem.UID, Storage.storage_phase).where(
+                DataItem.OID.in_(oids),
+                DataItem.deleted.is_(False),
+                DataItem.storage_id == Storage.storage_id,
+            )
+            sibling_result = await self.session.execute(sibling_stmt)
+            for oid, uid, phase in sibling_result.fetchall():
+                replicas[oid][uid] = phase
+        # replicas still present once all planned deletions of the batch are done
+        planned = {oid: dict(uid_phases) for oid, uid_phases in replicas.items()}
+
+        storage_access: dict[UUID, bool] = {}
+        deleted_uids = []
+        container_uids = []
+        pending = []
+        deletion_results = {}
+
+        def _record(uid: UUID, success: bool, message: str) -> None:
+            deletion_results[uid] = {"uid": uid, "success": success, "message": message}
+
+        for row in batch:
+            uid, oid = row.UID, row.OID
+            if not oid:
+                _record(uid, False, f"UID {uid} has no associated OID")
+                continue
+
+            # Payloads on an unreachable storage can not be deleted this round
+            if row.storage_id is not None:
+                if row.storage_id not in storage_access:
+                    storage_access[row.storage_id] = await self._check_storage_access(
+                        row.storage_id
+                    )
+                if not storage_access[row.storage_id]:
+                    _record(uid, False, f"Storage {row.storage_id} of UID {uid} not accessible")
+                    continue
+
+            # The payload is already gone (e.g. deleted with its container), sync the flags
+            if row.item_state == ItemState.DELETED:
+                deleted_uids.append(uid)
+                planned[oid].pop(uid, None)
+                replicas[oid].pop(uid, None)
+                _record(uid, True, f"UID {uid} marked as deleted.")
+                continue
+
+            remaining_phases = [phase for r_uid, phase in planned[oid].items() if r_uid != uid]
+            if remaining_phases:
+                combine_result = await self.combine_heuristic.execute(remaining_phases)
+                if not combine_result.success:
+                    _record(uid, False, combine_result.message)
+                    continue
+                result_phase = combine_result.data["actual_phase"]
+            else:
+                # No remaining replicas; resilience phase reduces to GAS
+                result_phase = PhaseType.GAS
+
+            if PHASE_ORDER[result_phase] < PHASE_ORDER[row.target_phase]:
+                _record(uid, False, "Deletion would violate resilience policy")
+                continue
+
+            # Later UIDs of the same OID are checked assuming this deletion succeeds
+            planned[oid].pop(uid, None)
+            pending.append(row)
+
+        for row, success in zip(pending, await self._delete_payloads(pending)):
+            uid, oid = row.UID, row.OID
+            if not success:
+                _record(uid, False, f"Failed to delete payload for {row.item_name or uid} {uid}")
+                continue
+            deleted_uids.append(uid)
+            replicas[oid].pop(uid, None)
+            if (row.item_type or "file").lower() == "container":
+                container_uids.append(uid)
+            _record(uid, True, f"Deleted UID {uid} payload and updated OID {oid} phase")
+
+        # Resulting phase of every OID which lost a replica in this batch
+        changed_oids = list({row.OID for row in pending if row.UID in deleted_uids})
+        await self._commit_batch(deleted_uids, container_uids, changed_oids, replicas)
+        return [deletion_results[row.UID] for row in batch]
+
+    async def _commit_batch(
+        self,
+        deleted_uids: list[UUID],
+        container_uids: list[UUID],
+        changed_oids: list[UUID],
+        replicas: dict[UUID, dict[UUID, PhaseType]],
+    ) -> None:
+        """Write and commit the state changes of one batch.
+
+        The payloads of the batch are already deleted at this point, so if
+        writing the OID phases fails the DELETED flags are still committed on
+        their own before the error is raised. The OID phases are then
+        corrected by the OidPhaseSweepHeuristic.
+        """
+        try:
+            oid_phases = self._oid_phases(changed_oids, replicas)
+            await self._apply_batch_updates(deleted_uids, container_uids, oid_phases)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            if deleted_uids:
+                logger.exception(
+                    "Unable to update the OID phases of a batch, recording %d deletions only",
+                    len(deleted_uids),
+                )
+                await self._apply_batch_updates(deleted_uids, container_uids, {})
+                await self.session.commit()
+            raise
+
+    def _oid_phases(
+        self, oids: list[UUID], replicas: dict[UUID, dict[UUID, PhaseType]]
+    ) -> dict[UUID, PhaseType]:
+        """Return the phase of every OID resulting from its remaining replicas."""
+        remaining = [
+            (index, phase) for index, oid in enumerate(oids) for phase in replicas[oid].values()
+        ]
+        combined = self.combine_heuristic.decode_phases(
+            self.combine_heuristic.combine_batch(
+                np.array([index for index, _ in remaining], dtype=np.intp),
+                self.combine_heuristic.encode_phases([phase for _, phase in remaining]),
+                len(oids),
+            )
+        )
+        return {
+            # no remaining replicas; resilience phase reduces to GAS
+            oid: phase if replicas[oid] else PhaseType.GAS
+            for oid, phase in zip(oids, combined)
+        }
+
+    async def _delete_payloads(self, rows: list) -> list[bool]:
+        """Delete the payloads of the given rows, concurrently if an executor is set."""
+        if self.executor is None:
+            results = []
+            for row in rows:
+                # A failing deletion must not lose the flags of the ones done before it
+                try:
+                    success = dlm_storage_requests.delete_data_item_payload(
+                        str(row.UID),
+                        item_type=row.item_type or "file",
+                        item_name=row.item_name or "",
+                    )
+                except Exception:
+                    logger.exception("Deletion of the payload of UID %s failed", row.UID)
+                    success = False
+                results.append(bool(success))
+            return results
+        jobs = await _payload_deletion_jobs(self.session, [row.UID for row in rows])
+        submitted = [row for row in rows if row.UID in jobs]
+        results = await self.executor.delete_payloads(
+            [{**jobs[row.UID], "item_type": row.item_type or "file"} for row in submitted]
+        )
+        succeeded = {row.UID for row, result in zip(submitted, results) if result["success"]}
+        return [row.UID in succeeded for row in rows]
+
+    async def _check_storage_access(self, storage_id: UUID) -> bool:
+        """Return whether a storage is accessible, treating errors as inaccessible."""
+        try:
+            return bool(
+                await asyncio.to_thread(
+                    dlm_storage_requests.check_storage_access, storage_id=str(storage_id)
+                )
+            )
+        except Exception:
+            logger.exception("Storage access check failed for %s", storage_id)
+            return False
+
+    async def _apply_batch_updates(
+        self,
+        deleted_uids: list[UUID],
+        container_uids: list[UUID],
+        oid_phases: dict[UUID, PhaseType],
+    ) -> None:
+        """Write the state changes of one batch with multi-row UPDATE statements."""
+        deleted_values = {
+            "item_state": ItemState.DELETED,
+            "deleted": True,
+            "UID_deletion": func.now(),  # pylint: disable=not-callable
+        }
+        if deleted_uids:
+            await self.session.execute(
+                update(DataItem).where(DataItem.UID.in_(deleted_uids)).values(**deleted_values)
+            )
+        if container_uids:
+            # All children of deleted containers need to be marked as DELETED as well
+            await self.session.execute(
+                update(DataItem)
+                .where(DataItem.parents.in_(container_uids), DataItem.deleted.is_(False))
+                .values(**deleted_values)
+            )
+        oids_by_phase: dict[PhaseType, list[UUID]] = defaultdict(list)
+        for oid, phase in oid_phases.items():
+            oids_by_phase[phase].append(oid)
+        for phase, oids in oids_by_phase.items():
+            await self.session.execute(
+                update(DataItem).where(DataItem.OID.in_(oids)).values(OID_phase=phase)
+            )
+
 
 class OidExpiryHeuristic(BaseHeuristic):
     """Heuristic to discover expired OIDs and delete their UIDs."""
 
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        shard: Optional[OidShard] = None,
+        watermark: Optional[ExpiryWatermark] = None,
+    ):
         super().__init__(session)
         self.delete_heuristic = DeleteUidHeuristic(session)
+        self.shard = shard
+        self.watermark = watermark
 
     async def execute(self) -> HeuristicResult:
         """Execute the OID expiry heuristic.
 
-        The heuristic discovers any expired OIDs and delegates deletion of their
-        associated UIDs to the delete heuristic.
+        The heuristic discovers any expired OIDs, only those of the shard if
+        one is set, and delegates deletion of their associated UIDs to the
+        delete heuristic. With a watermark only the OIDs which expired since
+        the previous run are considered, see ExpiryWatermark.
 
         Returns
         -------
@@ -592,18 +1259,23 @@ class OidExpiryHeuristic(BaseHeuristic):
             The result of the OID expiry scan and delegated UID deletions.
         """
         try:
+            position = None
+            if self.watermark is not None:
+                position = self.watermark.start(self.shard.index if self.shard else None)
             stmt = (
-                select(DataItem.OID)
+                select(DataItem.OID, DataItem.OID_expiration)
                 .distinct()
                 .where(
                     DataItem.OID_expiration < func.now(),  # pylint: disable=not-callable
                     DataItem.deleted.is_(False),
                     DataItem.OID.is_not(None),
+                    _after(DataItem.OID_expiration, DataItem.OID, position),
                 )
+                .order_by(DataItem.OID_expiration, DataItem.OID)
             )
-            result = await self.session.execute(stmt)
+            result = await self.session.execute(_in_shard(stmt, self.shard))
             expired_rows = result.fetchall()
-            expired_oids = [row[0] for row in expired_rows]
+            expired_oids = list(dict.fromkeys(row[0] for row in expired_rows))
 
             if not expired_oids:
                 return self.success_result("No expired OIDs found", {"expired_oids": []})
@@ -627,6 +1299,12 @@ class OidExpiryHeuristic(BaseHeuristic):
                             "message": delete_result.message,
                         }
                     )
+            if self.watermark is not None:
+                # the OIDs of failed deletions are retried by the next run
+                failed = {item["oid"] for item in deletion_results if not item["success"]}
+                self.watermark.advance_handled(
+                    expired_rows, [row[0] not in failed for row in expired_rows]
+                )
 
             success = all(item["success"] for item in deletion_results)
             message = "Deleted expired OIDs" if success else "Some expired OID deletions failed"
@@ -736,6 +1414,124 @@ class OidPhaseEnforceHeuristic(BaseHeuristic):
             return HeuristicResult(False, f"Error executing OID Phase Enforce heuristic: {str(e)}")
 
 
+class OidPhaseSweepHeuristic(BaseHeuristic):
+    """Heuristic to enforce the phases of all OIDs with one grouped query.
+
+    The actual phase of every OID is combined in SQL by summing the PHASE_ORDER
+    weights of the storage phases of its UIDs. Only the OIDs whose actual phase
+    differs from their target phase are passed on to the increase or decrease
+    heuristics, and stale OID phases are corrected with one update per phase.
+    With a shard only the OIDs of the shard are swept.
+    """
+
+    def __init__(self, session: AsyncSession, shard: Optional[OidShard] = None):
+        super().__init__(session)
+        self.shard = shard
+        self.increase_heuristic = IncreaseOidPhaseHeuristic(session)
+        self.decrease_heuristic = DecreaseOidPhaseHeuristic(session)
+
+    async def _fetch_inconsistent_oids(self) -> list:
+        """Return the actual and target phase orders of the OIDs with inconsistent phases."""
+        per_oid = select(
+            DataItem.OID.label("oid"),
+            func.sum(_phase_order_sql(Storage.storage_phase)).label("weight"),
+            func.max(_phase_order_sql(DataItem.target_phase)).label("target_order"),
+            func.min(_phase_order_sql(DataItem.OID_phase)).label("oid_order_min"),
+            func.max(_phase_order_sql(DataItem.OID_phase)).label("oid_order_max"),
+        ).join(Storage, DataItem.storage_id == Storage.storage_id)
+        per_oid = (
+            _in_shard(per_oid, self.shard)
+            .where(DataItem.OID.is_not(None), DataItem.deleted.is_(False))
+            .group_by(DataItem.OID)
+            .subquery()
+        )
+        actual_order = _combined_order_sql(per_oid.c.weight)
+        stmt = select(
+            per_oid.c.oid.label("OID"),
+            actual_order.label("actual_order"),
+            per_oid.c.target_order,
+        ).where(
+            or_(
+                actual_order != per_oid.c.target_order,
+                per_oid.c.oid_order_min != actual_order,
+                per_oid.c.oid_order_max != actual_order,
+            )
+        )
+        result = await self.session.execute(stmt)
+        return result.fetchall()
+
+    async def execute(self) -> HeuristicResult:
+        """Execute the OID phase sweep over the whole catalogue.
+
+        This heuristic:
+        1. Combines the UID phases of every OID in one grouped query, selecting
+           only the OIDs inconsistent with their target or OID phase
+        2. Updates the stale OID_phase of the OIDs at their target phase
+        3. Calls the decrease or increase heuristic for the other OIDs
+
+        Returns
+        -------
+        HeuristicResult
+            The result of the sweep and of the dispatched phase changes
+        """
+        try:
+            rows = await self._fetch_inconsistent_oids()
+            if not rows:
+                return self.success_result("All OID phases are consistent", {"changes": []})
+
+            stale: dict[PhaseType, list[UUID]] = defaultdict(list)
+            changes = []
+            for row in rows:
+                actual_phase = n_PHASE_ORDER[row.actual_order]
+                target_phase = n_PHASE_ORDER[row.target_order]
+                if row.target_order == row.actual_order:
+                    stale[actual_phase].append(row.OID)
+                    continue
+                if row.target_order < row.actual_order:
+                    change_result = await self.decrease_heuristic.execute(
+                        row.OID, actual_phase, target_phase
+                    )
+                else:
+                    change_result = await self.increase_heuristic.execute(
+                        row.OID, actual_phase, target_phase
+                    )
+                changes.append(
+                    {
+                        "oid": row.OID,
+                        "actual_phase": actual_phase,
+                        "target_phase": target_phase,
+                        "success": change_result.success,
+                        "message": change_result.message,
+                    }
+                )
+
+            for actual_phase, oids in stale.items():
+                update_stmt = (
+                    update(DataItem)
+                    .where(DataItem.OID.in_(oids))
+                    .values(OID_phase=actual_phase)
+                    .execution_options(synchronize_session=False)
+                )
+                await self.session.execute(update_stmt)
+            if stale:
+                await self.session.commit()
+
+            success = all(change["success"] for change in changes)
+            updated = sum(len(oids) for oids in stale.values())
+            return HeuristicResult(
+                success,
+                f"Updated {updated} OID phase(s), changed {len(changes)} OID phase(s)",
+                {
+                    "updated_oids": [oid for oids in stale.values() for oid in oids],
+                    "changes": changes,
+                },
+            )
+
+        except Exception as e:
+            await self.session.rollback()
+            return HeuristicResult(False, f"Error executing OID phase sweep heuristic: {str(e)}")
+
+
 class IncreaseOidPhaseHeuristic(BaseHeuristic):
     """Heuristic to increase OID phase resilience by creating additional UID instances.
 
@@ -0,0 +1,292 @@
+"""Scheduler running the heuristics of the heuristic engine.
+
+Every heuristic is registered with its own interval, priority, timeout and
+concurrency and runs in its own loop, so a slow heuristic such as the UID
+expiry deleting payloads does not delay phase enforcement or capacity
+checks. Each run gets a new database session, which is committed when the
+heuristic completes and rolled back when it fails or times out.
+
+A heuristic which is still running when its next interval starts keeps
+running, the tick is skipped unless the heuristic allows further concurrent
+runs. The optional global limit of concurrent runs hands free slots to the
+waiting heuristics in priority order.
+
+The runtime of every run is logged and accumulated in the statistics of the
+heuristic, a warning is logged when a run takes longer than its interval.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ska_dlm.dlm_db import create_async_sql_session
+
+from .heuristics import HeuristicResult
+
+logger = logging.getLogger(__name__)
+
+HeuristicRun = Callable[[AsyncSession], Awaitable[HeuristicResult | None]]
+"""Coroutine function running a heuristic in the given session."""
+
+
+@dataclass
+class HeuristicSettings:
+    """Interval, priority, timeout and concurrency of a scheduled heuristic."""
+
+    interval: float
+    priority: int = 0
+    timeout: float = 0
+    concurrency: int = 1
+
+
+@dataclass
+class HeuristicStats:
+    """Runtime statistics of a scheduled heuristic."""
+
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    last_runtime: float = 0.0
+    total_runtime: float = 0.0
+
+
+class ScheduledHeuristic:
+    """A heuristic registered with the scheduler and its runtime statistics."""
+
+    def __init__(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        name: str,
+        run: HeuristicRun,
+        interval: float,
+        priority: int = 0,
+        timeout: float = 0,
+        concurrency: int = 1,
+    ):
+        """Create the scheduled heuristic.
+
+        Parameters
+        ----------
+        name : str
+            Name of the heuristic in logs and statistics.
+        run : HeuristicRun
+            Coroutine function running the heuristic in a session.
+        interval : float
+            Seconds between the starts of two runs.
+        priority : int
+            Priority for the global concurrency limit, higher runs first.
+        timeout : float
+            Seconds after which a run is cancelled, 0 for no timeout.
+        concurrency : int
+            Maximum number of concurrent runs of the heuristic.
+        """
+        if interval <= 0:
+            raise ValueError(f"Interval of heuristic {name} must be positive")
+        self.name = name
+        self.run = run
+        self.settings = HeuristicSettings(interval, priority, timeout, max(1, concurrency))
+        self.statistics = HeuristicStats()
+        self.active = 0
+
+    def record_run(self, runtime: float) -> None:
+        """Count a finished run and its runtime in the statistics."""
+        self.statistics.runs += 1
+        self.statistics.last_runtime = runtime
+        self.statistics.total_runtime += runtime
+
+    def stats(self) -> dict:
+        """Return the runtime statistics of the heuristic."""
+        statistics = self.statistics
+        return {
+            "runs": statistics.runs,
+            "failures": statistics.failures,
+            "timeouts": statistics.timeouts,
+            "skipped": statistics.skipped,
+            "active": self.active,
+            "last_runtime": statistics.last_runtime,
+            "average_runtime": (
+                statistics.total_runtime / statistics.runs if statistics.runs else 0.0
+            ),
+        }
+
+
+class _PrioritySlots:
+    """Semaphore granting free slots to the waiter with the highest priority."""
+
+    def __init__(self, slots: int):
+        self._free = slots
+        self._waiters: list = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        """Acquire a slot, waiting behind waiters of higher or equal priority."""
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-priority, next(self._order), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was granted while being cancelled
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Release a slot to the highest priority waiter."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._free += 1
+
+
+class HeuristicScheduler:
+    """Run registered heuristics concurrently at their own intervals."""
+
+    def __init__(self, engine, max_concurrent: int = 0):
+        """Create the scheduler.
+
+        Parameters
+        ----------
+        engine : AsyncEngine
+            Engine of the DLM database, every run gets its own session.
+        max_concurrent : int
+            Maximum number of concurrent runs of all heuristics, 0 for no limit.
+        """
+        self.engine = engine
+        self.heuristics: dict[str, ScheduledHeuristic] = {}
+        self._slots = _PrioritySlots(max_concurrent) if max_concurrent > 0 else None
+
+    def register(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        name: str,
+        run: HeuristicRun,
+        interval: float,
+        priority: int = 0,
+        timeout: float = 0,
+        concurrency: int = 1,
+    ) -> ScheduledHeuristic:
+        """Register a heuristic, see ``ScheduledHeuristic`` for the parameters."""
+        if name in self.heuristics:
+            raise ValueError(f"Heuristic {name} already registered")
+        heuristic = ScheduledHeuristic(name, run, interval, priority, timeout, concurrency)
+        self.heuristics[name] = heuristic
+        return heuristic
+
+    def stats(self) -> dict[str, dict]:
+        """Return the runtime statistics of all heuristics."""
+        return {name: heuristic.stats() for name, heuristic in self.heuristics.items()}
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Run all heuristics until the stop event is set.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event stopping the scheduler when set.
+        """
+        await asyncio.gather(
+            *(self._schedule(heuristic, stop_event) for heuristic in self.heuristics.values())
+        )
+
+    async def _schedule(self, heuristic: ScheduledHeuristic, stop_event: asyncio.Event) -> None:
+        """Start the runs of a heuristic at its interval until stopped."""
+        loop = asyncio.get_running_loop()
+        running: set[asyncio.Task] = set()
+        try:
+            while not stop_event.is_set():
+                start = loop.time()
+                if heuristic.active < heuristic.settings.concurrency:
+                    heuristic.active += 1
+                    task = asyncio.create_task(self.run_once(heuristic))
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                else:
+                    heuristic.statistics.skipped += 1
+                    logger.warning(
+                        "Heuristic %s still running, skipping this interval", heuristic.name
+                    )
+                try:
+                    await asyncio.wait_for(
+                        stop_event.wait(),
+                        max(0, heuristic.settings.interval - (loop.time() - start)),
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def run_once(self, heuristic: ScheduledHeuristic) -> HeuristicResult | None:
+        """Run a heuristic once in a new session, recording its runtime.
+
+        The heuristic is expected to be counted as active, it is no longer
+        active once the run ends.
+
+        Parameters
+        ----------
+        heuristic : ScheduledHeuristic
+            The heuristic to run.
+
+        Returns
+        -------
+        HeuristicResult | None
+            The result of the heuristic, None if it failed or timed out.
+        """
+        loop = asyncio.get_running_loop()
+        result = None
+        try:
+            if self._slots is not None:
+                await self._slots.acquire(heuristic.settings.priority)
+            try:
+                start = loop.time()
+                try:
+                    async with create_async_sql_session(self.engine) as session:
+                        result = await asyncio.wait_for(
+                            heuristic.run(session), heuristic.settings.timeout or None
+                        )
+                        await session.commit()
+                except asyncio.TimeoutError:
+                    heuristic.statistics.timeouts += 1
+                    logger.warning(
+                        "Heuristic %s timed out after %s s",
+                        heuristic.name,
+                        heuristic.settings.timeout,
+                    )
+                except Exception:  # pylint: disable=broad-exception-caught
+                    heuristic.statistics.failures += 1
+                    logger.exception("Heuristic %s failed", heuristic.name)
+                runtime = loop.time() - start
+            finally:
+                if self._slots is not None:
+                    self._slots.release()
+        finally:
+            heuristic.active -= 1
+
+        heuristic.record_run(runtime)
+        if result is not None:
+            logger.info(
+                "Heuristic %s returned in %.2f s: %s", heuristic.name, runtime, result.message
+            )
+            logger.debug("Heuristics data: %s", result.data)
+            if not result.success:
+                heuristic.statistics.failures += 1
+        if runtime > heuristic.settings.interval:
+            logger.warning(
+                "Heuristic %s took %.2f s, longer than its interval of %s s",
+                heuristic.name,
+                runtime,
+                heuristic.settings.interval,
+            )
+        return result
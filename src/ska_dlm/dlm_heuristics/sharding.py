@@ -0,0 +1,155 @@
+"""Sharding of the heuristic work between heuristic engine replicas.
+
+Every replica claims one of ``replicas`` slots with a PostgreSQL advisory
+lock held on a dedicated connection. The OIDs are sharded by the hash of
+their value into as many shards as slots, and the replica holding slot
+``i`` only handles the data items of shard ``i``, so the UIDs of an OID are
+always handled by the same replica and replicas never race on the same
+expired UIDs. Data items without an OID belong to slot 0, whose holder also
+runs the heuristics which are not sharded, e.g. the storage capacity check.
+
+The advisory lock is released by PostgreSQL when the connection of a
+replica is lost, its slot is then claimed by a replacement or a standby
+replica. A replica finding all slots taken waits as a standby and retries
+at every refresh.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import Text, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+HEURISTIC_LOCK_CLASS = 0x444C4D48
+"""First key of the advisory locks of the replica slots, the second is the slot."""
+
+
+class OidShard:
+    """The shard of OIDs handled by one replica."""
+
+    def __init__(self, index: int, count: int):
+        """Create the shard.
+
+        Parameters
+        ----------
+        index : int
+            Index of the shard, from 0 to count - 1.
+        count : int
+            Number of shards.
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Shard {index} out of range for {count} shards")
+        self.index = index
+        self.count = count
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether the shard runs the heuristics which are not sharded."""
+        return self.index == 0
+
+    def where(self, oid_column):
+        """Return the SQL condition selecting the data items of the shard.
+
+        Parameters
+        ----------
+        oid_column : Column
+            The OID column of the data items.
+
+        Returns
+        -------
+        ColumnElement
+            Condition true for the OIDs of the shard.
+        """
+        # hashtext is signed, normalise the remainder to 0..count-1
+        remainder = func.mod(func.hashtext(cast(oid_column, Text)), self.count)
+        condition = func.mod(remainder + self.count, self.count) == self.index
+        if self.is_leader:
+            return or_(condition, oid_column.is_(None))
+        return condition
+
+
+class ReplicaSlot:
+    """Claim and hold the slot of a heuristic engine replica."""
+
+    def __init__(self, engine, replicas: int, refresh_interval: float = 30):
+        """Create the replica slot.
+
+        Parameters
+        ----------
+        engine : AsyncEngine
+            Engine of the DLM database providing the lock connection.
+        replicas : int
+            Number of slots, the configured number of replicas.
+        refresh_interval : float
+            Seconds between checks of the held lock or claim attempts.
+        """
+        if replicas < 1:
+            raise ValueError("At least one replica slot is required")
+        self.engine = engine
+        self.replicas = replicas
+        self.refresh_interval = refresh_interval
+        self.index: int | None = None
+        self._connection: AsyncConnection | None = None
+
+    def shard(self) -> OidShard | None:
+        """Return the shard of the held slot, None without slot."""
+        if self.index is None:
+            return None
+        return OidShard(self.index, self.replicas)
+
+    async def refresh(self) -> None:
+        """Check that the held slot is still locked or try to claim a free slot."""
+        try:
+            if self._connection is None:
+                self._connection = await self.engine.connect()
+            if self.index is not None:
+                await self._connection.execute(select(1))
+                await self._connection.commit()
+                return
+            for index in range(self.replicas):
+                result = await self._connection.execute(
+                    select(func.pg_try_advisory_lock(HEURISTIC_LOCK_CLASS, index))
+                )
+                claimed = result.scalar_one()
+                await self._connection.commit()
+                if claimed:
+                    self.index = index
+                    logger.info("Claimed heuristic replica slot %s of %s", index, self.replicas)
+                    return
+            logger.info("All %s heuristic replica slots taken, standing by", self.replicas)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # the lock is gone with the connection
+            logger.exception("Lost the heuristic replica slot connection")
+            await self.release()
+
+    async def release(self) -> None:
+        """Release the slot by discarding the lock connection."""
+        self.index = None
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                # not returned to the pool, closing the database session drops the lock
+                await connection.invalidate()
+                await connection.close()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to close the heuristic replica slot connection")
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Hold or claim a slot until the stop event is set, then release it.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event stopping the replica slot when set.
+        """
+        try:
+            while not stop_event.is_set():
+                await self.refresh()
+                try:
+                    await asyncio.wait_for(stop_event.wait(), self.refresh_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self.release()
@@ -1,5 +1,5 @@
 """DLM ingest module for ska-data-lifecycle."""
 
-from .dlm_ingest_requests import init_data_item, register_data_item
+from .dlm_ingest_requests import init_data_item, register_data_item, register_data_items
 
-__all__ = ["init_data_item", "register_data_item"]
+__all__ = ["init_data_item", "register_data_item", "register_data_items"]
@@ -1,35 +1,58 @@
 """DLM ingest API module."""
 
+import asyncio
+import json
 import logging
 import re
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Annotated
 
 from fastapi import FastAPI, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 
 import ska_dlm
 from ska_dlm.common_types import ItemType, PhaseType
 from ska_dlm.exception_handling_typer import ExceptionHandlingTyper
 from ska_dlm.fastapi_utils import decode_bearer, fastapi_auto_annotate
-from ska_dlm.typer_types import JsonObjectOption
+from ska_dlm.typer_types import JsonArrayOrNdjsonArg, JsonObjectOption
 from ska_dlm.typer_utils import dump_short_stacktrace
 
 from .. import CONFIG
-from ..data_item import set_metadata, set_state, set_uri
-from ..dlm_db.db_access import DB
+from ..dlm_db.db_access import DB, DBQueryError, postgrest_in
 from ..dlm_request import query_data_item
 from ..dlm_storage import check_storage_access, query_storage
-from ..exceptions import InvalidQueryParameters, UnmetPreconditionForOperation, ValueAlreadyInDB
+from ..dlm_storage.storage_cache import start_storage_cache_invalidator
+from ..exceptions import (
+    DatabaseOperationError,
+    InvalidQueryParameters,
+    UnmetPreconditionForOperation,
+    ValueAlreadyInDB,
+)
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Run the storage cache invalidator while the application runs."""
+    stop_event = asyncio.Event()
+    invalidator = start_storage_cache_invalidator(stop_event)
+    yield
+    stop_event.set()
+    if invalidator is not None:
+        await invalidator
+
+
 rest = fastapi_auto_annotate(
     FastAPI(
         title="SKA-DLM: Ingest Manager REST API",
         description="REST interface of the SKA-DLM Ingest Manager",
         version=ska_dlm.__version__,
         license_info={"name": "BSD-3-Clause", "identifier": "BSD-3-Clause"},
+        lifespan=lifespan,
     )
 )
 
@@ -116,6 +139,218 @@ def init_data_item(
     return DB.insert(CONFIG.DLM.dlm_table, json=post_data)[0]["uid"]
 
 
+REGISTER_BATCH_SIZE = 1000
+"""Number of items per existence query and multi-row insert of register_data_items."""
+
+_BULK_ITEM_FIELDS = {
+    "item_name",
+    "uri",
+    "item_type",
+    "target_phase",
+    "uid_expiration",
+    "oid_expiration",
+    "parents",
+    "metadata",
+}
+
+
+def _data_item_row(
+    # pylint: disable=too-many-arguments
+    storage: dict,
+    username: str | None,
+    *,
+    item_name: str,
+    uri: str,
+    item_type: ItemType = ItemType.FILE,
+    target_phase: PhaseType = PhaseType.SOLID,
+    uid_expiration: datetime | str | None = None,
+    oid_expiration: datetime | str | None = None,
+    parents: str | None = None,
+    metadata: dict | None = None,
+) -> dict:
+    """Build the complete READY data_item row of an item registered on storage.
+
+    The UID is generated here so that the metadata can reference it and the
+    row can be written with a single insert.
+
+    Parameters
+    ----------
+    storage : dict
+        The storage row the item is registered on.
+    username : str | None
+        The owner of the item, None if unauthenticated.
+    item_name : str
+        The item name.
+    uri : str
+        The relative access path to the payload.
+    item_type : ItemType
+        The type of the data item.
+    target_phase : PhaseType
+        The proposed phase of the data item.
+    uid_expiration : datetime | str | None
+        Expiration of this copy of the data_item, None for the database default.
+    oid_expiration : datetime | str | None
+        Expiration of all copies of the data_item, None for the database default.
+    parents : str | None
+        UID of the parent item.
+    metadata : dict | None
+        Metadata provided by the client.
+
+    Returns
+    -------
+    dict
+        The data_item row.
+
+    Raises
+    ------
+    ValueError
+        When the item type or target phase is invalid.
+    """
+    try:
+        item_type = ItemType(item_type)
+    except ValueError as exc:
+        raise ValueError(
+            f"Invalid item type {item_type}. Must be one of {[e.value for e in ItemType]}"
+        ) from exc
+    target_phase = PhaseType(target_phase)
+
+    uid = str(uuid.uuid4())
+    metadata = dict(metadata or {})
+    metadata["uid"] = uid
+    metadata["item_name"] = item_name
+    row = {
+        "uid": uid,
+        "item_name": item_name,
+        "storage_id": storage["storage_id"],
+        "uri": uri,
+        "uid_phase": storage["storage_phase"],
+        "target_phase": target_phase,
+        "item_type": item_type,
+        "item_state": "READY",
+        "parents": parents,
+        "metadata": metadata,
+    }
+    if username is not None:
+        row["item_owner"] = username
+    if uid_expiration is not None:
+        row["uid_expiration"] = uid_expiration
+    if oid_expiration is not None:
+        row["oid_expiration"] = oid_expiration
+    return row
+
+
+def _bulk_item_row(item: dict, storage: dict, username: str | None) -> dict:
+    """Validate a bulk register item and build its complete data_item row."""
+    if not isinstance(item, dict):
+        raise InvalidQueryParameters("Item is not a JSON object")
+    unknown = set(item) - _BULK_ITEM_FIELDS
+    if unknown:
+        raise InvalidQueryParameters(f"Unknown item fields: {sorted(unknown)}")
+    if not item.get("item_name") or not item.get("uri"):
+        raise InvalidQueryParameters("item_name and uri are required")
+    return _data_item_row(storage, username, **item)
+
+
+def _bulk_item_rows(
+    items: list, storage: dict, username: str | None
+) -> tuple[list[dict], dict[int, dict]]:
+    """Validate the bulk register items and build the rows of the valid ones.
+
+    Parameters
+    ----------
+    items : list
+        The items to register.
+    storage : dict
+        The storage the items are registered on.
+    username : str | None
+        The owner of the items.
+
+    Returns
+    -------
+    tuple[list[dict], dict[int, dict]]
+        The result of every item, with the error of the invalid ones, and the
+        rows of the valid items keyed by their index.
+    """
+    results = []
+    rows = {}
+    names = set()
+    for index, item in enumerate(items):
+        item_name = item.get("item_name") if isinstance(item, dict) else None
+        results.append({"item_name": item_name, "uid": None, "error": None})
+        try:
+            row = _bulk_item_row(item, storage, username)
+        except (InvalidQueryParameters, ValueError) as exc:
+            results[index]["error"] = str(exc)
+            continue
+        if item_name in names:
+            results[index]["error"] = f"Duplicate item in request: {item_name}"
+            continue
+        names.add(item_name)
+        rows[index] = row
+    return results, rows
+
+
+def _register_item_rows(storage_id: str, rows: list[dict], results: list[dict]) -> None:
+    """Insert the data_item rows of one batch which are not yet registered on the storage.
+
+    Parameters
+    ----------
+    storage_id : str
+        The storage of the rows.
+    rows : list[dict]
+        The complete data_item rows.
+    results : list[dict]
+        The results of the rows, in the order of the rows.
+    """
+    existing = DB.select(
+        CONFIG.DLM.dlm_table,
+        params={
+            "select": "item_name",
+            "storage_id": f"eq.{storage_id}",
+            "item_name": postgrest_in([row["item_name"] for row in rows]),
+        },
+    )
+    registered = {entry["item_name"] for entry in existing}
+    pending = []
+    for row, result in zip(rows, results):
+        if row["item_name"] in registered:
+            result["error"] = f"Item is already registered on storage! {row['item_name']}"
+        else:
+            pending.append((row, result))
+    if pending:
+        _insert_item_rows([row for row, _ in pending], [result for _, result in pending])
+
+
+def _insert_item_rows(rows: list[dict], results: list[dict]) -> None:
+    """Insert data_item rows with one multi-row insert, setting the uid of their results.
+
+    If the multi-row insert is rejected, e.g. because of a single invalid row,
+    the rows are inserted one by one so that only the invalid rows fail.
+
+    Parameters
+    ----------
+    rows : list[dict]
+        The complete data_item rows.
+    results : list[dict]
+        The results of the rows, in the order of the rows.
+    """
+    columns = sorted({column for row in rows for column in row})
+    try:
+        DB.insert(CONFIG.DLM.dlm_table, json=rows, params={"columns": ",".join(columns)})
+    except (DBQueryError, DatabaseOperationError) as exc:
+        logger.warning("Bulk insert of %d items failed, inserting one by one: %s", len(rows), exc)
+        for row, result in zip(rows, results):
+            try:
+                DB.insert(CONFIG.DLM.dlm_table, json=row)
+            except (DBQueryError, DatabaseOperationError) as row_exc:
+                result["error"] = str(row_exc)
+            else:
+                result["uid"] = row["uid"]
+        return
+    for row, result in zip(rows, results):
+        result["uid"] = row["uid"]
+
+
 @cli.command()
 @rest.post("/ingest/register_data_item", response_model=str)
 def register_data_item(  # noqa: C901
@@ -135,16 +370,14 @@ def register_data_item(  # noqa: C901
 ) -> str:
     """Ingest a data_item (register function is an alias).
 
-    This high level function is a combination of init_data_item, set_uri and set_state(READY).
-    It also checks whether a data_item is already registered on the requested storage.
+    This high level function registers a complete READY data_item, with the
+    access path to the payload and the metadata, using a single insert. It
+    also checks whether a data_item is already registered on the requested storage.
 
     (1) check whether requested storage is known and accessible
     (2) check, if required, whether item is accessible/exists on that storage
     (3) check whether item is already registered on that storage
-    (4) initialise the item on the storage
-    (5) set the access path to the payload
-    (6) set state to READY
-    (7) save metadata in the data_item table
+    (4) insert the complete READY item with uri, metadata and owner
 
     Parameters
     ----------
@@ -190,13 +423,6 @@ def register_data_item(  # noqa: C901
         username = user_info.get("preferred_username", None)
         if username is None:
             raise ValueError("Username not found in profile")
-    try:
-        ItemType(item_type)  # Check that the input is a valid enum
-    except ValueError as exc:
-        raise ValueError(
-            f"Invalid item type {item_type}. Must be one of {[e.value for e in ItemType]}"
-        ) from exc
-
     # (1)
     storages = query_storage(storage_name=storage_name, storage_id=storage_id)
     if not storages:
@@ -221,38 +447,161 @@ def register_data_item(  # noqa: C901
     if ex_data_item:
         raise ValueAlreadyInDB(f"Item is already registered on storage! {item_name}")
 
-    # (4)
-    init_item = {
-        "item_name": item_name,
-        "storage_id": storage_id,
-        "uid_phase": storages[0]["storage_phase"],
-        "target_phase": target_phase,
-        "item_type": item_type,
-        "item_owner": username,
-        "parents": parents,
-    }
+    # (4) the row is written complete and READY in one statement, if the insert
+    # fails nothing has been registered and the error is raised to the caller.
+    if metadata is None:
+        logger.warning("No metadata provided. Initialising metadata with uid and item_name.")
+    row = _data_item_row(
+        storages[0],
+        username,
+        item_name=item_name,
+        uri=uri,
+        item_type=item_type,
+        target_phase=target_phase,
+        uid_expiration=uid_expiration,
+        oid_expiration=oid_expiration,
+        parents=parents,
+        metadata=metadata,
+    )
+    return DB.insert(CONFIG.DLM.dlm_table, json=row)[0]["uid"]
 
-    if uid_expiration is not None:
-        init_item["uid_expiration"] = uid_expiration
 
-    if oid_expiration is not None:
-        init_item["oid_expiration"] = oid_expiration
+@cli.command()
+def register_data_items(
+    items: JsonArrayOrNdjsonArg,
+    storage_name: str = "",
+    storage_id: str = "",
+    do_storage_access_check: bool = True,
+    authorization: Annotated[str | None, Header()] = None,
+) -> list[dict]:
+    """Ingest many data_items on one storage in bulk.
 
-    uid = init_data_item(json_data=init_item)
+    Every item is registered READY with its uri and metadata like with
+    register_data_item, but the storage is resolved and checked once, the
+    existence of all item names is checked with one query per batch and the
+    complete rows are written with one multi-row insert per batch.
 
-    # (5)
-    set_uri(uid, uri, storage_id)
+    Parameters
+    ----------
+    items
+        the items to register, a JSON array or NDJSON of objects with the fields
+        item_name, uri, item_type, target_phase, uid_expiration, oid_expiration,
+        parents and metadata as accepted by register_data_item. On the command
+        line @<path> reads the items from a file.
+    storage_name
+        the name of the configured storage volume (name or ID required).
+    storage_id
+        the ID of the configured storage.
+    do_storage_access_check
+        perform check_storage_access() against provided storage.
+    authorization
+        Validated Bearer token with UserInfo.
 
-    # (6) Set data_item state to READY
-    set_state(uid, "READY")
+    Returns
+    -------
+    list[dict]
+        one result per item in the order of the items with the item_name, the
+        registered uid (None on failure) and the error message (None on success).
 
-    # (7) Populate the metadata column in the database
-    if metadata is None:
-        logger.warning("No metadata provided. Initialising metadata with uid and item_name.")
-        metadata = {}
+    Raises
+    ------
+    UnmetPreconditionForOperation
+    """
+    username = None
+    user_info = decode_bearer(authorization)
+    if user_info:
+        username = user_info.get("preferred_username", None)
+        if username is None:
+            raise ValueError("Username not found in profile")
 
-    metadata["uid"] = uid
-    metadata["item_name"] = item_name
-    set_metadata(uid, metadata)
+    storages = query_storage(storage_name=storage_name, storage_id=storage_id)
+    if not storages:
+        raise UnmetPreconditionForOperation(
+            f"No storages found for {storage_name=}, {storage_id=}"
+        )
+    storage = storages[0]
+    if do_storage_access_check and not check_storage_access(storage_id=storage["storage_id"]):
+        raise UnmetPreconditionForOperation(
+            f"Storage is not accessible: {storage_name=}, storage_id={storage['storage_id']}"
+        )
+
+    results, rows = _bulk_item_rows(items, storage, username)
+    indices = list(rows)
+    for start in range(0, len(indices), REGISTER_BATCH_SIZE):
+        batch = indices[start : start + REGISTER_BATCH_SIZE]
+        _register_item_rows(
+            storage["storage_id"],
+            [rows[index] for index in batch],
+            [results[index] for index in batch],
+        )
+
+    failed = sum(1 for result in results if result["error"] is not None)
+    logger.info("Registered %d of %d items", len(results) - failed, len(results))
+    return results
+
+
+def _append_ndjson_item(items: list, line: bytes, line_number: int) -> None:
+    """Parse one NDJSON line of a request body into items, skipping blank lines."""
+    if not line.strip():
+        return
+    try:
+        items.append(json.loads(line))
+    except ValueError as exc:
+        raise InvalidQueryParameters(f"Invalid JSON on line {line_number}: {exc}") from exc
+
+
+@rest.post("/ingest/register_data_items", response_model=list[dict])
+async def register_data_items_stream(
+    request: Request,
+    storage_name: str = "",
+    storage_id: str = "",
+    do_storage_access_check: bool = True,
+    authorization: Annotated[str | None, Header()] = None,
+) -> list[dict]:
+    """Ingest many data_items on one storage in bulk.
+
+    The request body is either a JSON array of items or, with the content type
+    application/x-ndjson, one JSON item per line. See register_data_items.
+
+    Parameters
+    ----------
+    request
+        the request with the items in its body.
+    storage_name
+        the name of the configured storage volume (name or ID required).
+    storage_id
+        the ID of the configured storage.
+    do_storage_access_check
+        perform check_storage_access() against provided storage.
+    authorization
+        Validated Bearer token with UserInfo.
 
-    return uid
+    Returns
+    -------
+    list[dict]
+        one result per item in the order of the items with the item_name, the
+        registered uid (None on failure) and the error message (None on success).
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = []
+        line_number = 0
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                _append_ndjson_item(items, line, line_number)
+        _append_ndjson_item(items, buffer, line_number + 1)
+    else:
+        items = await request.json()
+        if not isinstance(items, list):
+            raise InvalidQueryParameters("Request body must be a JSON array of items")
+    return await run_in_threadpool(
+        register_data_items,
+        items=items,
+        storage_name=storage_name,
+        storage_id=storage_id,
+        do_storage_access_check=do_storage_access_check,
+        authorization=authorization,
+    )
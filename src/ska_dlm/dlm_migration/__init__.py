@@ -1,5 +1,17 @@
 """DLM migration module for ska-data-lifecycle."""
 
-from .dlm_migration_requests import _copy_data_item, copy_data_item, query_migrations, rclone_copy
+from .dlm_migration_requests import (
+    _copy_data_item,
+    copy_data_item,
+    copy_data_items,
+    query_migrations,
+    rclone_copy,
+)
 
-__all__ = ["copy_data_item", "_copy_data_item", "query_migrations", "rclone_copy"]
+__all__ = [
+    "copy_data_item",
+    "_copy_data_item",
+    "copy_data_items",
+    "query_migrations",
+    "rclone_copy",
+]
@@ -0,0 +1,429 @@
+"""Bulk copy of many data items to one destination storage.
+
+The items, their storages and the storage configurations are resolved with
+one query per batch, the destination data items are initialised with one
+multi-row insert per batch and the copies are queued as ``QUEUED``
+migrations, submitted to rclone by the migration manager under its
+concurrency limits.
+
+Files copied to the same path of one source directory can be grouped into a
+single rclone ``sync/copy`` filtered to those files.
+"""
+
+import asyncio
+import logging
+import posixpath
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ska_dlm.common_types import ConfigType, ItemState, ItemType, MigrationState
+from ska_dlm.fastapi_utils import decode_bearer
+
+from .. import CONFIG
+from ..dlm_db import Migration
+from ..dlm_db.db_access import ASYNC_DB, DBQueryError, postgrest_in
+from ..exceptions import DatabaseOperationError, UnmetPreconditionForOperation
+
+logger = logging.getLogger(__name__)
+
+# files of one directory copied by a single rclone job by copy_data_items
+MIGRATION_COPY_GROUP_SIZE = CONFIG.get("DLM.migration_manager.copy_group_size", 100)
+
+COPY_BATCH_SIZE = 1000
+"""Number of values per lookup and rows per insert of copy_data_items."""
+
+_COPY_ITEM_KEYS = ("uid", "oid", "item_name")
+_SOURCE_ITEM_FIELDS = (
+    "uid,oid,item_name,storage_id,uri,item_type,target_phase,"
+    "uid_expiration,oid_expiration,metadata"
+)
+
+
+async def _select_in(table: str, column: str, values, params: dict | None = None) -> list[dict]:
+    """Select the rows of a table whose column is in values, one query per batch."""
+    values = list(dict.fromkeys(str(value) for value in values))
+    batches = await asyncio.gather(
+        *(
+            ASYNC_DB.select(
+                table,
+                params={
+                    **(params or {}),
+                    column: postgrest_in(values[start : start + COPY_BATCH_SIZE]),
+                },
+            )
+            for start in range(0, len(values), COPY_BATCH_SIZE)
+        )
+    )
+    return [row for batch in batches for row in batch]
+
+
+async def _resolve_copy_sources(items: list) -> list[dict | str]:
+    """Return the READY source data_item of every copy item, or its error message."""
+    refs = []
+    for item in items:
+        if not isinstance(item, dict):
+            refs.append("Item is not a JSON object")
+            continue
+        unknown = set(item) - {*_COPY_ITEM_KEYS, "path"}
+        keys = [key for key in _COPY_ITEM_KEYS if item.get(key)]
+        if unknown:
+            refs.append(f"Unknown item fields: {sorted(unknown)}")
+        elif len(keys) != 1:
+            refs.append("Either item_name or OID or UID has to be provided!")
+        else:
+            refs.append((keys[0], str(item[keys[0]])))
+
+    found = {}
+    for key in _COPY_ITEM_KEYS:
+        values = [ref[1] for ref in refs if isinstance(ref, tuple) and ref[0] == key]
+        if not values:
+            continue
+        rows = await _select_in(
+            CONFIG.DLM.dlm_table,
+            key,
+            values,
+            params={
+                "select": _SOURCE_ITEM_FIELDS,
+                "item_state": f"eq.{ItemState.READY.value}",
+                "storage_id": "not.is.null",
+            },
+        )
+        for row in rows:
+            # we pick the first data_item returned record for now
+            found.setdefault((key, str(row[key])), row)
+    return [
+        found.get(ref, "No data item found for copying") if isinstance(ref, tuple) else ref
+        for ref in refs
+    ]
+
+
+async def _select_destination(destination_name: str, destination_id: str) -> dict:
+    """Return the destination storage selected by name or ID."""
+    destination = None
+    if destination_name:
+        destination = await ASYNC_DB.select(
+            CONFIG.DLM.storage_table, params={"storage_name": f"eq.{destination_name}"}
+        )
+    elif destination_id:
+        destination = await ASYNC_DB.select(
+            CONFIG.DLM.storage_table, params={"storage_id": f"eq.{destination_id}"}
+        )
+    if not destination:
+        raise UnmetPreconditionForOperation(
+            f"Unable to get ID of destination storage: {destination_name}."
+        )
+    return destination[0]
+
+
+async def _select_storages(storage_ids: set[str]) -> tuple[dict, dict]:
+    """Return the storages and their rclone configurations by storage_id."""
+    storages, configs = await asyncio.gather(
+        _select_in(CONFIG.DLM.storage_table, "storage_id", storage_ids),
+        _select_in(
+            CONFIG.DLM.storage_config_table,
+            "storage_id",
+            storage_ids,
+            params={"config_type": f"eq.{ConfigType.RCLONE.value}"},
+        ),
+    )
+    return (
+        {row["storage_id"]: row for row in storages},
+        {row["storage_id"]: row["config"] for row in configs},
+    )
+
+
+def _copy_row(source: dict, destination: dict, path: str) -> dict:
+    """Return the INITIALISED destination data_item row of the copy of a source item."""
+    return {
+        "uid": str(uuid.uuid4()),
+        "item_name": source["item_name"],
+        "oid": source["oid"],
+        "storage_id": destination["storage_id"],
+        "item_type": source["item_type"],
+        "item_state": ItemState.INITIALISED.value,
+        "target_phase": source["target_phase"],
+        "uid_expiration": source["uid_expiration"],
+        "oid_expiration": source["oid_expiration"],
+        "uid_phase": destination["storage_phase"],
+        "metadata": source["metadata"],
+        "uri": path,
+    }
+
+
+def _plan_copies(
+    items: list, sources: list[dict | str], destination: dict, storages: dict, configs: dict
+) -> tuple[list[dict], dict[int, dict]]:
+    """Prepare the destination data_item row and the rclone request of every copy.
+
+    Parameters
+    ----------
+    items : list
+        The copy items of the request.
+    sources : list[dict | str]
+        The source data_item of every item, or its error message.
+    destination : dict
+        The destination storage.
+    storages : dict
+        The source and destination storages by storage_id.
+    configs : dict
+        The rclone configurations of the storages by storage_id.
+
+    Returns
+    -------
+    tuple[list[dict], dict[int, dict]]
+        The result of every item and the copies by the index of their item.
+    """
+    d_config = configs[destination["storage_id"]]
+    dest_backend = f"{d_config['name']}:{d_config.get('root_path', '/')}"
+
+    results = []
+    copies = {}
+    for index, (item, source) in enumerate(zip(items, sources)):
+        results.append({"item_name": None, "uid": None, "migration_id": None, "error": None})
+        if isinstance(source, str):
+            results[index]["error"] = source
+            continue
+        results[index]["item_name"] = source["item_name"]
+        source_id = source["storage_id"]
+        if source_id not in configs or source_id not in storages:
+            results[index]["error"] = "No configuration for source storage found!"
+            continue
+        s_config = configs[source_id]
+        path = item.get("path") or source["uri"]
+        copies[index] = {
+            "source": source,
+            "row": _copy_row(source, destination, path),
+            "rclone": {
+                "src_fs": f"{s_config['name']}:{s_config.get('root_path', '/')}",
+                "src_remote": source["uri"],
+                "src_root_dir": storages[source_id]["root_directory"],
+                "dst_fs": dest_backend,
+                "dst_remote": path,
+                "dest_root_dir": destination["root_directory"],
+                "item_type": source["item_type"],
+            },
+        }
+    return results, copies
+
+
+async def _insert_copy_rows(copies: dict[int, dict], results: list[dict]) -> None:
+    """Initialise the destination data items of the copies with multi-row inserts.
+
+    If a multi-row insert is rejected, e.g. because of a single invalid row,
+    the rows of the batch are inserted one by one so that only the copies of
+    the invalid rows fail. Failed copies are removed from ``copies``.
+
+    Parameters
+    ----------
+    copies : dict[int, dict]
+        The copies by the index of their item.
+    results : list[dict]
+        The result of every item.
+    """
+    indices = list(copies)
+    for start in range(0, len(indices), COPY_BATCH_SIZE):
+        batch = indices[start : start + COPY_BATCH_SIZE]
+        rows = [copies[index]["row"] for index in batch]
+        columns = sorted({column for row in rows for column in row})
+        try:
+            await ASYNC_DB.insert(
+                CONFIG.DLM.dlm_table, json=rows, params={"columns": ",".join(columns)}
+            )
+        except (DBQueryError, DatabaseOperationError) as exc:
+            logger.warning(
+                "Initialising %d copied data items failed, inserting one by one: %s",
+                len(batch),
+                exc,
+            )
+            for index in batch:
+                try:
+                    await ASYNC_DB.insert(CONFIG.DLM.dlm_table, json=copies[index]["row"])
+                except (DBQueryError, DatabaseOperationError) as row_exc:
+                    results[index]["error"] = str(row_exc)
+                    del copies[index]
+
+
+def _group_copies(copies: dict[int, dict]) -> None:
+    """Merge the rclone requests of files of one source directory into directory copies.
+
+    Files copied to the same path on the destination are grouped per source
+    storage and directory into ``sync/copy`` requests of up to
+    MIGRATION_COPY_GROUP_SIZE files, filtered to include only those files.
+
+    Parameters
+    ----------
+    copies : dict[int, dict]
+        The copies by the index of their item, their rclone requests are
+        replaced by the group request and the group ID is added.
+    """
+    directories = {}
+    for index, copy in copies.items():
+        rclone = copy["rclone"]
+        if rclone["item_type"] == ItemType.FILE and rclone["src_remote"] == rclone["dst_remote"]:
+            directory = posixpath.dirname(rclone["src_remote"])
+            key = (copy["source"]["storage_id"], directory)
+            directories.setdefault(key, []).append(index)
+
+    for (_, directory), indices in directories.items():
+        for start in range(0, len(indices), MIGRATION_COPY_GROUP_SIZE):
+            group = indices[start : start + MIGRATION_COPY_GROUP_SIZE]
+            if len(group) < 2:
+                continue
+            rclone = {
+                **copies[group[0]]["rclone"],
+                "src_remote": directory,
+                "dst_remote": directory,
+                "include": list(
+                    dict.fromkeys(
+                        posixpath.basename(copies[index]["rclone"]["src_remote"])
+                        for index in group
+                    )
+                ),
+            }
+            group_id = str(uuid.uuid4())
+            for index in group:
+                copies[index]["rclone"] = rclone
+                copies[index]["group"] = group_id
+
+
+def _migration_record(copy: dict, storages: dict, destination: dict, username: str | None):
+    """Return the QUEUED migration of a copy."""
+    request = {
+        "uid": copy["row"]["uid"],
+        "source_name": storages[copy["source"]["storage_id"]]["storage_name"],
+        "destination_name": destination["storage_name"],
+        "rclone": copy["rclone"],
+    }
+    if "group" in copy:
+        request["group"] = copy["group"]
+    return Migration(
+        oid=copy["source"]["oid"],
+        source_storage_id=copy["source"]["storage_id"],
+        destination_storage_id=destination["storage_id"],
+        user=username,
+        state=MigrationState.QUEUED.value,
+        request=request,
+    )
+
+
+async def _queue_copies(
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    session: AsyncSession,
+    copies: dict[int, dict],
+    results: list[dict],
+    storages: dict,
+    destination: dict,
+    username: str | None,
+) -> None:
+    """Queue the migrations of the copies, one transaction per batch.
+
+    The destination data items of a batch that could not be queued are deleted.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session the migrations are added with.
+    copies : dict[int, dict]
+        The copies by the index of their item.
+    results : list[dict]
+        The result of every item, updated with the uid and migration_id.
+    storages : dict
+        The source and destination storages by storage_id.
+    destination : dict
+        The destination storage.
+    username : str | None
+        The user requesting the copies.
+    """
+    indices = list(copies)
+    for start in range(0, len(indices), COPY_BATCH_SIZE):
+        batch = indices[start : start + COPY_BATCH_SIZE]
+        records = [
+            _migration_record(copies[index], storages, destination, username) for index in batch
+        ]
+        try:
+            session.add_all(records)
+            await session.flush()
+            migration_ids = [record.migration_id for record in records]
+            await session.commit()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("Queueing %d migrations failed: %s", len(batch), exc)
+            await session.rollback()
+            # if there is any error, delete the data items of the batch
+            await ASYNC_DB.delete(
+                CONFIG.DLM.dlm_table,
+                params={"uid": postgrest_in([copies[index]["row"]["uid"] for index in batch])},
+            )
+            for index in batch:
+                results[index]["error"] = str(exc)
+            continue
+        for index, migration_id in zip(batch, migration_ids):
+            results[index]["uid"] = copies[index]["row"]["uid"]
+            results[index]["migration_id"] = migration_id
+
+
+async def copy_data_items(
+    # pylint: disable=too-many-arguments
+    session: AsyncSession,
+    items: list,
+    *,
+    destination_name: str = "",
+    destination_id: str = "",
+    group_files: bool = True,
+    authorization: str | None = None,
+) -> list[dict]:
+    """Copy many data_items to one destination storage.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session the migrations are queued with.
+    items : list
+        Objects with one of item_name, oid or uid selecting the data item to
+        copy and an optional destination path.
+    destination_name : str
+        The name of the destination storage volume.
+    destination_id : str
+        The destination storage.
+    group_files : bool
+        Copy files of one source directory with a single rclone directory copy.
+    authorization : str | None
+        Validated Bearer token with UserInfo.
+
+    Returns
+    -------
+    list[dict]
+        One result per item in the order of the items.
+
+    Raises
+    ------
+    ValueError
+        The username is not in the profile of the authorization.
+    UnmetPreconditionForOperation
+        The destination storage or its configuration was not found.
+    """
+    username = None
+    user_info = decode_bearer(authorization)
+    if user_info:
+        username = user_info.get("preferred_username", None)
+        if username is None:
+            raise ValueError("Username not found in profile")
+
+    destination = await _select_destination(destination_name, destination_id)
+    sources = await _resolve_copy_sources(items)
+    storages, configs = await _select_storages(
+        {destination["storage_id"]}
+        | {source["storage_id"] for source in sources if isinstance(source, dict)}
+    )
+    if destination["storage_id"] not in configs:
+        raise UnmetPreconditionForOperation("Unable to get configuration for destination storage!")
+
+    results, copies = _plan_copies(items, sources, destination, storages, configs)
+    await _insert_copy_rows(copies, results)
+    if group_files:
+        _group_copies(copies)
+    await _queue_copies(session, copies, results, storages, destination, username)
+
+    queued = sum(1 for result in results if result["error"] is None)
+    logger.info("Queued %d of %d copies", queued, len(results))
+    return results
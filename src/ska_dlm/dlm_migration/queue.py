@@ -0,0 +1,253 @@
+"""Admission control of the persistent migration queue.
+
+Copies requested while the queue is enabled are stored as ``QUEUED`` rows of
+the ``migration`` table together with the rclone request, and the request
+returns at once. The migration manager drains the queue in submission order,
+admitting queued migrations while the number of submitted, incomplete
+migrations is below
+
+* the global limit of running migrations,
+* the limit per (source, destination) storage pair, and
+* the per rclone instance job cap of the ``RcloneScheduler``.
+
+Queued migrations sharing a ``group`` in their request (files copied by one
+rclone ``sync/copy``) are admitted together and count as a single job.
+
+Queued rows are locked with ``FOR UPDATE SKIP LOCKED`` until the transaction
+submitting them commits, so several migration managers can drain one queue.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..common_types import MigrationState
+from ..dlm_db import Migration
+from .scheduler import RcloneScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def job_key(migration: Migration) -> tuple:
+    """Return the key of the rclone job of a migration, shared by grouped migrations."""
+    group = (migration.request or {}).get("group")
+    if group:
+        return ("group", group)
+    return ("migration", migration.migration_id)
+
+
+async def submit_jobs(
+    admitted: list[tuple[Migration, str]], rclone_copy: Callable
+) -> list[Migration]:
+    """Submit admitted migrations to rclone and record the outcome on their rows.
+
+    Grouped migrations are submitted as one rclone job and the jobs are
+    requested concurrently. Submitted migrations are recorded with their
+    rclone job ID and URL, migrations rclone refused are failed.
+
+    Parameters
+    ----------
+    admitted : list[tuple[Migration, str]]
+        Admitted migrations and the URL of their rclone instance.
+    rclone_copy : Callable
+        Function requesting an rclone copy, called with the URL and the
+        rclone request of the migration and returning the status code,
+        content and command of the request.
+
+    Returns
+    -------
+    list[Migration]
+        The failed migrations.
+    """
+    jobs: dict[tuple, list[Migration]] = {}
+    urls = {}
+    for migration, url in admitted:
+        jobs.setdefault(job_key(migration), []).append(migration)
+        urls[job_key(migration)] = url
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.to_thread(rclone_copy, urls[key], **members[0].request["rclone"])
+            for key, members in jobs.items()
+        ),
+        return_exceptions=True,
+    )
+    failed = []
+    for (key, members), outcome in zip(jobs.items(), outcomes):
+        if not isinstance(outcome, Exception) and outcome[0] == 200:
+            _, content, command = outcome
+            for migration in members:
+                migration.job_id = content["jobid"]
+                migration.url = urls[key]
+                migration.command = command
+                migration.state = MigrationState.SUBMITTED.value
+            continue
+        error = str(outcome) if isinstance(outcome, Exception) else f"rclone: {outcome[1]}"
+        for migration in members:
+            logger.error("Submitting migration %s failed: %s", migration.migration_id, error)
+            migration.url = urls[key]
+            migration.state = MigrationState.FAILED.value
+            migration.complete = True
+            migration.completion_date = func.now()  # pylint: disable=not-callable
+            migration.job_status = {"finished": True, "success": False, "error": error}
+            failed.append(migration)
+    return failed
+
+
+class MigrationQueue:
+    """Admit queued migrations under global, storage pair and rclone limits."""
+
+    def __init__(self, max_active: int = 0, max_per_storage_pair: int = 0, batch_size: int = 100):
+        """Create the queue.
+
+        Parameters
+        ----------
+        max_active : int
+            Maximum number of submitted, incomplete migrations, 0 for no limit.
+        max_per_storage_pair : int
+            Maximum number of submitted, incomplete migrations per source and
+            destination storage pair, 0 for no limit.
+        batch_size : int
+            Maximum number of queued migrations considered per drain cycle.
+        """
+        self.max_active = max_active
+        self.max_per_storage_pair = max_per_storage_pair
+        self.batch_size = batch_size
+
+    @classmethod
+    def from_config(cls, config) -> "MigrationQueue":
+        """Create the queue from the DLM configuration."""
+        return cls(
+            max_active=config.get("DLM.migration_manager.queue.max_active", 0),
+            max_per_storage_pair=config.get("DLM.migration_manager.queue.max_per_storage_pair", 0),
+            batch_size=config.get("DLM.migration_manager.queue.batch_size", 100),
+        )
+
+    @staticmethod
+    async def active_pairs(session: AsyncSession) -> Counter:
+        """Return the submitted, incomplete migrations per storage pair."""
+        result = await session.execute(
+            select(
+                Migration.source_storage_id,
+                Migration.destination_storage_id,
+                func.count(func.distinct(Migration.job_id)),  # pylint: disable=not-callable
+            )
+            .where(
+                Migration.state == MigrationState.SUBMITTED.value, Migration.complete.is_(False)
+            )
+            .group_by(Migration.source_storage_id, Migration.destination_storage_id)
+        )
+        return Counter({(source, dest): count for source, dest, count in result.all()})
+
+    async def admit(
+        self, session: AsyncSession, scheduler: RcloneScheduler
+    ) -> list[tuple[Migration, str]]:
+        """Lock and return the queued migrations which can be submitted now.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            Session holding the row locks until it commits.
+        scheduler : RcloneScheduler
+            Scheduler selecting the rclone instance of every admitted migration.
+
+        Returns
+        -------
+        list[tuple[Migration, str]]
+            The admitted migrations, oldest first, with their rclone URL.
+            Grouped migrations are adjacent and share the URL.
+        """
+        pairs = await self.active_pairs(session)
+        spare = self.batch_size
+        if self.max_active:
+            spare = min(spare, self.max_active - sum(pairs.values()))
+        if spare <= 0:
+            return []
+
+        queued = await self._lock_queued(session)
+        if not queued:
+            return []
+        jobs: dict[tuple, list[Migration]] = {}
+        for migration in queued:
+            jobs.setdefault(job_key(migration), []).append(migration)
+
+        instances = await scheduler.active_jobs(session)
+        admitted = []
+        for job in jobs.values():
+            url = self._select_instance(job[0], pairs, instances, scheduler)
+            if url is False:
+                continue
+            if url is None:
+                # every rclone instance is at capacity
+                break
+            admitted.extend((member, url) for member in job)
+            spare -= 1
+            if not spare:
+                break
+
+        logger.info("admitted %s of %s queued migrations", len(admitted), len(queued))
+        return admitted
+
+    async def _lock_queued(self, session: AsyncSession) -> list[Migration]:
+        """Lock and return the oldest queued migrations and the rest of their groups."""
+        result = await session.execute(
+            select(Migration)
+            .where(Migration.state == MigrationState.QUEUED.value)
+            .order_by(Migration.date, Migration.migration_id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        queued = list(result.scalars().all())
+        groups = {key for kind, key in map(job_key, queued) if kind == "group"}
+        if groups:
+            # the rest of the groups beyond the batch
+            result = await session.execute(
+                select(Migration)
+                .where(
+                    Migration.state == MigrationState.QUEUED.value,
+                    Migration.request["group"].astext.in_(groups),
+                    Migration.migration_id.not_in([m.migration_id for m in queued]),
+                )
+                .with_for_update(skip_locked=True)
+            )
+            queued.extend(result.scalars().all())
+        return queued
+
+    def _select_instance(
+        self, migration: Migration, pairs: Counter, instances: Counter, scheduler: RcloneScheduler
+    ) -> str | bool | None:
+        """Select the rclone instance of a job and count it as active.
+
+        Parameters
+        ----------
+        migration : Migration
+            The first migration of the job.
+        pairs : Counter
+            The active jobs per storage pair, updated on admission.
+        instances : Counter
+            The active jobs per rclone instance, updated on admission.
+        scheduler : RcloneScheduler
+            Scheduler selecting the rclone instance.
+
+        Returns
+        -------
+        str | bool | None
+            The URL of the selected instance, False if the storage pair is at
+            its limit and None if every rclone instance is at capacity.
+        """
+        pair = (migration.source_storage_id, migration.destination_storage_id)
+        if self.max_per_storage_pair and pairs[pair] >= self.max_per_storage_pair:
+            return False
+        request = migration.request or {}
+        url = scheduler.select(
+            instances,
+            {str(migration.source_storage_id), request.get("source_name", "")},
+            {str(migration.destination_storage_id), request.get("destination_name", "")},
+        )
+        if url is not None:
+            instances[url] += 1
+            pairs[pair] += 1
+        return url
@@ -0,0 +1,285 @@
+"""Load-aware selection of the rclone instance running a migration.
+
+The scheduler picks the rclone instance for every new copy job based on the
+number of migrations each instance is running, taken from the outstanding
+rows of the ``migration`` table, and the recent throughput of each instance,
+taken from the rclone ``core/stats`` polled by the migration manager.
+
+Policies
+--------
+least_loaded
+    The instance running the fewest jobs, ties broken by recent throughput.
+weighted
+    The instance with the fewest jobs relative to its weight. The weight is
+    configured per instance or defaults to its recent throughput.
+locality
+    The least loaded of the instances with an affinity to the source and/or
+    destination storage (by storage name or ID), preferring instances close
+    to both, falling back to all instances.
+
+Instances running ``max_jobs_per_instance`` jobs are not selected. When all
+instances are at capacity, copies wait in a queue until a job finishes or the
+queue timeout expires.
+"""
+
+import asyncio
+import logging
+import random
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import AsyncIterator
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..dlm_db import Migration
+from ..exceptions import UnmetPreconditionForOperation
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulingPolicy(str, Enum):
+    """Policy used to select the rclone instance of a migration."""
+
+    LEAST_LOADED = "least_loaded"
+    WEIGHTED = "weighted"
+    LOCALITY = "locality"
+
+
+@dataclass
+class SchedulerSettings:
+    """Policy, limits and per instance settings of an RcloneScheduler."""
+
+    policy: SchedulingPolicy = SchedulingPolicy.LEAST_LOADED
+    max_jobs_per_instance: int = 0
+    weights: dict[str, float] = field(default_factory=dict)
+    affinity: dict[str, set[str]] = field(default_factory=dict)
+    queue_timeout: float = 300
+    throughput_smoothing: float = 0.3
+
+
+class RcloneScheduler:
+    """Select rclone instances for migrations and cap their concurrent jobs."""
+
+    def __init__(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        urls: list[str],
+        policy: SchedulingPolicy = SchedulingPolicy.LEAST_LOADED,
+        max_jobs_per_instance: int = 0,
+        weights: dict[str, float] | None = None,
+        affinity: dict[str, list[str]] | None = None,
+        queue_timeout: float = 300,
+        throughput_smoothing: float = 0.3,
+    ):
+        """Create the scheduler.
+
+        Parameters
+        ----------
+        urls : list[str]
+            URLs of the rclone RC servers.
+        policy : SchedulingPolicy
+            The instance selection policy.
+        max_jobs_per_instance : int
+            Maximum number of outstanding jobs per instance, 0 for no limit.
+        weights : dict[str, float] | None
+            Optional relative capacity per URL used by the weighted policy.
+        affinity : dict[str, list[str]] | None
+            Optional storage names or IDs close to each URL used by the
+            locality policy.
+        queue_timeout : float
+            Seconds a copy waits for a free instance before it is rejected.
+        throughput_smoothing : float
+            Weight of the latest sample in the moving average of the throughput.
+        """
+        if not urls:
+            raise ValueError("No Rclone URLs")
+        self.urls = list(urls)
+        self.settings = SchedulerSettings(
+            policy=SchedulingPolicy(policy),
+            max_jobs_per_instance=max_jobs_per_instance,
+            weights=dict(weights or {}),
+            affinity={url: set(storages) for url, storages in (affinity or {}).items()},
+            queue_timeout=queue_timeout,
+            throughput_smoothing=throughput_smoothing,
+        )
+        self.throughput: dict[str, float] = defaultdict(float)
+        self._reserved: Counter = Counter()
+        self._capacity = asyncio.Condition()
+
+    @classmethod
+    def from_config(cls, config) -> "RcloneScheduler":
+        """Create the scheduler from the DLM configuration.
+
+        The optional ``instances`` list of the scheduler configuration holds
+        the ``url``, ``weight`` and affine ``storages`` of rclone instances.
+
+        Parameters
+        ----------
+        config : Config
+            The DLM configuration.
+
+        Returns
+        -------
+        RcloneScheduler
+            The configured scheduler.
+        """
+        instances = config.get("DLM.migration_manager.scheduler.instances", None) or []
+        return cls(
+            config.RCLONE,
+            policy=config.get("DLM.migration_manager.scheduler.policy", "least_loaded"),
+            max_jobs_per_instance=config.get(
+                "DLM.migration_manager.scheduler.max_jobs_per_instance", 0
+            ),
+            weights={i["url"]: i["weight"] for i in instances if "weight" in i},
+            affinity={i["url"]: i["storages"] for i in instances if "storages" in i},
+            queue_timeout=config.get("DLM.migration_manager.scheduler.queue_timeout", 300),
+        )
+
+    def record_stats(self, url: str, stats_json: dict) -> None:
+        """Update the recent throughput of an instance from its rclone core/stats."""
+        speed = stats_json.get("speed")
+        if isinstance(speed, (int, float)):
+            smoothing = self.settings.throughput_smoothing
+            previous = self.throughput[url]
+            self.throughput[url] = smoothing * speed + (1 - smoothing) * previous
+
+    async def active_jobs(self, session: AsyncSession) -> Counter:
+        """Return the outstanding and reserved jobs per instance.
+
+        Migrations sharing an rclone job count as one job.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            Session used to count the outstanding migrations.
+
+        Returns
+        -------
+        Counter
+            The number of jobs per instance URL.
+        """
+        active = await self._outstanding_jobs(session)
+        active.update(self._reserved)
+        return active
+
+    async def _outstanding_jobs(self, session: AsyncSession) -> Counter:
+        """Return the jobs of the incomplete migrations per instance."""
+        result = await session.execute(
+            # pylint: disable-next=not-callable
+            select(Migration.url, func.count(func.distinct(Migration.job_id)))
+            .where(Migration.complete.is_(False))
+            .group_by(Migration.url)
+        )
+        return Counter({url: count for url, count in result.all() if url in self.urls})
+
+    def select(
+        self, active: Counter, source: set[str] | None = None, destination: set[str] | None = None
+    ) -> str | None:
+        """Select an instance with spare capacity according to the policy.
+
+        Parameters
+        ----------
+        active : Counter
+            Outstanding jobs per instance.
+        source : set[str] | None
+            Names and IDs of the source storage.
+        destination : set[str] | None
+            Names and IDs of the destination storage.
+
+        Returns
+        -------
+        str | None
+            The selected URL, None if all instances are at capacity.
+        """
+        limit = self.settings.max_jobs_per_instance
+        candidates = [url for url in self.urls if not limit or active[url] < limit]
+        if not candidates:
+            return None
+
+        keys = {
+            url: self._key(url, active, source or set(), destination or set())
+            for url in candidates
+        }
+        best = min(keys.values())
+        return random.choice([url for url in candidates if keys[url] == best])
+
+    def _key(self, url: str, active: Counter, source: set[str], destination: set[str]) -> tuple:
+        """Return the sort key of an instance for the policy, lower is preferred."""
+        match self.settings.policy:
+            case SchedulingPolicy.WEIGHTED:
+                weight = self.settings.weights.get(url) or self.throughput[url] or 1.0
+                return ((active[url] + 1) / weight,)
+            case SchedulingPolicy.LOCALITY:
+                near = self.settings.affinity.get(url, set())
+                closeness = bool(near & source) + bool(near & destination)
+                return (-closeness, active[url], -self.throughput[url])
+            case _:
+                return (active[url], -self.throughput[url])
+
+    @asynccontextmanager
+    async def reserve(
+        self,
+        session: AsyncSession,
+        source: set[str] | None = None,
+        destination: set[str] | None = None,
+    ) -> AsyncIterator[str]:
+        """Reserve a job slot on an instance, waiting in a queue while all are at capacity.
+
+        The slot is held until the context exits, by then the migration record of
+        the job is expected to be committed and counted as an outstanding job.
+        The outstanding jobs are counted before the reservation lock is taken,
+        so that the database query does not hold up other reservations.
+
+        Parameters
+        ----------
+        session : AsyncSession
+            Session used to count the outstanding migrations.
+        source : set[str] | None
+            Names and IDs of the source storage.
+        destination : set[str] | None
+            Names and IDs of the destination storage.
+
+        Yields
+        ------
+        str
+            The URL of the reserved instance.
+
+        Raises
+        ------
+        UnmetPreconditionForOperation
+            No instance became available within the queue timeout.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.settings.queue_timeout
+        while True:
+            outstanding = await self._outstanding_jobs(session)
+            async with self._capacity:
+                url = self.select(outstanding + self._reserved, source, destination)
+                if url is not None:
+                    self._reserved[url] += 1
+                    break
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise UnmetPreconditionForOperation(
+                        "All rclone instances are at capacity, try again later"
+                    )
+                logger.info("All rclone instances at capacity, copy queued")
+                try:
+                    # woken up by released reservations or finished jobs
+                    await asyncio.wait_for(self._capacity.wait(), min(remaining, 10))
+                except asyncio.TimeoutError:
+                    pass
+        try:
+            yield url
+        finally:
+            async with self._capacity:
+                self._reserved[url] -= 1
+                self._capacity.notify_all()
+
+    async def notify(self) -> None:
+        """Wake up queued copies, e.g. after migrations completed."""
+        async with self._capacity:
+            self._capacity.notify_all()
@@ -0,0 +1,294 @@
+"""Concurrent polling of rclone migration jobs.
+
+The poller queries the rclone RC ``job/status`` and ``core/stats`` endpoints
+of many migration jobs concurrently on a pooled async HTTP client. The number
+of requests in flight is bounded per rclone URL, so a slow or overloaded
+rclone instance only delays its own jobs, and every job is polled with its
+own timeout so that a hanging request can not stall the poll cycle.
+
+In bulk mode the jobs of every rclone instance are listed with a single
+``job/list`` request and only the jobs whose state changed since the last
+poll (first poll or finished) are queried individually, reducing the polling
+traffic from one request pair per migration to one request per instance for
+long running jobs.
+
+The poll results are turned into the batched updates of the migration rows by
+``migration_updates``, after the destination data items of the finished
+migrations have been finalised by ``finalise_migrations``.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+
+import httpx
+
+from .. import CONFIG
+from ..common_types import MigrationState
+from ..dlm_db import Migration
+from ..dlm_db.db_access import ASYNC_DB
+
+logger = logging.getLogger(__name__)
+
+
+class RcloneStatusPoller:
+    """Poll the status and stats of rclone jobs concurrently."""
+
+    def __init__(self, client: httpx.AsyncClient, max_per_url: int = 8, timeout: float = 30):
+        """Create the poller.
+
+        Parameters
+        ----------
+        client : httpx.AsyncClient
+            The pooled HTTP client used for the rclone requests.
+        max_per_url : int
+            Maximum number of jobs polled concurrently on one rclone URL.
+        timeout : float
+            Timeout in seconds of polling one job (status and stats).
+        """
+        self._client = client
+        self._timeout = timeout
+        self._semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_per_url)
+        )
+
+    async def _post(self, url: str, endpoint: str, post_data: dict) -> dict:
+        request_url = f"{url}/{endpoint}"
+        logger.debug("rclone request: %s, %s", request_url, post_data)
+        response = await self._client.post(request_url, data=post_data)
+        response.raise_for_status()
+        return response.json()
+
+    async def query_job_status(self, url: str, job_id: int) -> dict:
+        """Return the rclone job/status of a job."""
+        return await self._post(url, "job/status", {"jobid": job_id})
+
+    async def query_core_stats(self, url: str, group: str) -> dict:
+        """Return the rclone core/stats of a stats group."""
+        return await self._post(url, "core/stats", {"group": group})
+
+    async def poll_job(self, url: str, job_id: int) -> tuple[dict, dict] | None:
+        """Return the status and stats of a job, None if rclone did not answer in time.
+
+        Parameters
+        ----------
+        url : str
+            The rclone URL running the job.
+        job_id : int
+            The rclone job ID.
+
+        Returns
+        -------
+        tuple[dict, dict] | None
+            The job status and stats, None if the job could not be polled.
+        """
+
+        async def _poll() -> tuple[dict, dict]:
+            status_json = await self.query_job_status(url, job_id)
+            stats_json = await self.query_core_stats(url, status_json["group"])
+            return status_json, stats_json
+
+        async with self._semaphores[url]:
+            try:
+                return await asyncio.wait_for(_poll(), timeout=self._timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Polling rclone job %s on %s timed out", job_id, url)
+            except (httpx.HTTPError, ValueError, KeyError) as exc:
+                logger.warning("Polling rclone job %s on %s failed: %s", job_id, url, exc)
+        return None
+
+    async def list_jobs(self, url: str) -> dict | None:
+        """Return the rclone job/list of an instance, None if it did not answer in time."""
+        async with self._semaphores[url]:
+            try:
+                return await asyncio.wait_for(self._post(url, "job/list", {}), self._timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Listing rclone jobs on %s timed out", url)
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("Listing rclone jobs on %s failed: %s", url, exc)
+        return None
+
+    async def poll_jobs(self, jobs: list[tuple[str, int]]) -> list[tuple[dict, dict] | None]:
+        """Poll many jobs concurrently.
+
+        Parameters
+        ----------
+        jobs : list[tuple[str, int]]
+            The rclone URL and job ID of every job.
+
+        Returns
+        -------
+        list[tuple[dict, dict] | None]
+            One ``poll_job`` result per job, in the order of the jobs.
+        """
+        return list(await asyncio.gather(*(self.poll_job(url, job_id) for url, job_id in jobs)))
+
+    async def poll_changed_jobs(
+        self, jobs: list[tuple[str, int, bool]]
+    ) -> list[tuple[dict, dict] | None]:
+        """Poll the jobs whose state changed, using one job/list request per instance.
+
+        A job which was polled before and is still listed as running by its
+        rclone instance is skipped. Finished jobs, jobs never polled before and
+        jobs missing from the listing (e.g. expired from the rclone job list)
+        are polled individually. If an instance can not be listed, or its rclone
+        version does not report running and finished job IDs, all its jobs are
+        polled individually.
+
+        Parameters
+        ----------
+        jobs : list[tuple[str, int, bool]]
+            The rclone URL, job ID and whether the job has been polled before.
+
+        Returns
+        -------
+        list[tuple[dict, dict] | None]
+            One ``poll_job`` result per job in the order of the jobs, None for
+            skipped jobs.
+        """
+        urls = list({url for url, _, _ in jobs})
+        listings = dict(zip(urls, await asyncio.gather(*(self.list_jobs(url) for url in urls))))
+        running = {
+            url: set(listing["runningIds"])
+            for url, listing in listings.items()
+            if listing is not None and "runningIds" in listing
+        }
+
+        async def _poll_if_changed(url: str, job_id: int, polled: bool):
+            if polled and job_id in running.get(url, ()):
+                return None
+            return await self.poll_job(url, job_id)
+
+        return list(await asyncio.gather(*(_poll_if_changed(*job) for job in jobs)))
+
+    async def poll_migrations(
+        self, migrations: list[Migration], bulk: bool = False
+    ) -> dict[tuple[str, int], tuple[dict, dict] | None]:
+        """Poll the rclone jobs of submitted migrations, each job once.
+
+        Grouped migrations share one rclone job, which is polled once.
+
+        Parameters
+        ----------
+        migrations : list[Migration]
+            The submitted, incomplete migrations.
+        bulk : bool
+            Only poll the jobs whose state changed, see ``poll_changed_jobs``.
+
+        Returns
+        -------
+        dict[tuple[str, int], tuple[dict, dict] | None]
+            The poll of every job keyed by its rclone URL and job ID.
+        """
+        jobs: dict[tuple[str, int], bool] = {}
+        for migration in migrations:
+            job = (migration.url, migration.job_id)
+            jobs[job] = jobs.get(job, True) and migration.job_status is not None
+        if bulk:
+            polls = await self.poll_changed_jobs([(*job, polled) for job, polled in jobs.items()])
+        else:
+            polls = await self.poll_jobs(list(jobs))
+        return dict(zip(jobs, polls))
+
+
+def migration_state(status_json: dict) -> MigrationState:
+    """Return the state of a migration from the rclone job/status of its job."""
+    if status_json.get("finished") is not True:
+        return MigrationState.SUBMITTED
+    if status_json.get("success") is True:
+        return MigrationState.COMPLETED
+    return MigrationState.FAILED
+
+
+def migration_updates(
+    migrations: list[Migration],
+    polls: dict[tuple[str, int], tuple[dict, dict] | None],
+    skipped: set[int],
+) -> list[dict]:
+    """Return the bound values of the batched update of the polled migrations.
+
+    Parameters
+    ----------
+    migrations : list[Migration]
+        The submitted, incomplete migrations.
+    polls : dict[tuple[str, int], tuple[dict, dict] | None]
+        The poll of every job, see ``RcloneStatusPoller.poll_migrations``.
+    skipped : set[int]
+        IDs of migrations left untouched, e.g. whose finalisation failed.
+
+    Returns
+    -------
+    list[dict]
+        The ``b_`` prefixed values of every migration to update.
+    """
+    updates = []
+    for migration in migrations:
+        poll = polls[(migration.url, migration.job_id)]
+        if poll is None or migration.migration_id in skipped:
+            continue
+        status_json, stats_json = poll
+        updates.append(
+            {
+                "b_migration_id": migration.migration_id,
+                "b_job_status": status_json,
+                "b_job_stats": stats_json,
+                "b_complete": status_json.get("finished") is True,
+                "b_state": migration_state(status_json).value,
+            }
+        )
+    return updates
+
+
+async def finalise_migrated_item(migration: Migration, status_json: dict) -> None:
+    """Set the migrated data item READY, or delete it if the transfer failed."""
+    dest_data_item = await ASYNC_DB.select(
+        CONFIG.DLM.dlm_table,
+        params={
+            "oid": f"eq.{migration.oid}",
+            "storage_id": f"eq.{migration.destination_storage_id}",
+            "limit": 1000,
+        },
+    )
+    if not dest_data_item:
+        return
+    params = {"uid": f"eq.{dest_data_item[0]['uid']}"}
+    if status_json["success"] is True:
+        logger.info(
+            "Migration %s success, data item %s",
+            migration.migration_id,
+            dest_data_item[0]["uid"],
+        )
+        await ASYNC_DB.update(CONFIG.DLM.dlm_table, params=params, json={"item_state": "READY"})
+    else:
+        # delete remote data item if there is a transfer problem
+        logger.info(
+            "Migration %s failed, deleting data item %s",
+            migration.migration_id,
+            dest_data_item[0]["uid"],
+        )
+        await ASYNC_DB.delete(CONFIG.DLM.dlm_table, params=params)
+
+
+async def finalise_migrations(finished: list[tuple[Migration, dict]]) -> set[int]:
+    """Finalise the destination data items of finished migrations concurrently.
+
+    Parameters
+    ----------
+    finished : list[tuple[Migration, dict]]
+        The finished migrations with the rclone job/status of their job.
+
+    Returns
+    -------
+    set[int]
+        IDs of the migrations whose finalisation failed, to be retried.
+    """
+    outcomes = await asyncio.gather(
+        *(finalise_migrated_item(migration, status_json) for migration, status_json in finished),
+        return_exceptions=True,
+    )
+    unfinalised = set()
+    for (migration, _), outcome in zip(finished, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error("Finalising migration %s failed: %s", migration.migration_id, outcome)
+            unfinalised.add(migration.migration_id)
+    return unfinalised
@@ -2,16 +2,24 @@
 
 from .outbox import (
     add_outbox_event,
+    create_outbox_partitions,
     delete_old_sent_outbox_events,
+    drop_old_outbox_partitions,
     get_pending_outbox_events,
     mark_outbox_event_failed,
     mark_outbox_event_sent,
+    mark_outbox_events_failed,
+    mark_outbox_events_sent,
 )
 
 __all__ = [
     "add_outbox_event",
+    "create_outbox_partitions",
     "delete_old_sent_outbox_events",
+    "drop_old_outbox_partitions",
     "get_pending_outbox_events",
     "mark_outbox_event_sent",
     "mark_outbox_event_failed",
+    "mark_outbox_events_sent",
+    "mark_outbox_events_failed",
 ]
@@ -0,0 +1,108 @@
+"""PostgreSQL LISTEN connection waking up the outbox relay.
+
+A trigger on ``dlm.outbox`` issues ``NOTIFY dlm_outbox`` for every statement
+inserting events. The listener holds a dedicated asyncpg connection
+listening on that channel and sets its ``wakeup`` event on every
+notification, so the relay can drain new events immediately instead of
+waiting for its next poll. The connection is re-established after it is
+lost, and the relay is woken up on every (re)connection to pick up events
+inserted while it was not listening.
+"""
+
+import asyncio
+import logging
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_NOTIFY_CHANNEL = "dlm_outbox"
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Convert an SQLAlchemy database URL into an asyncpg DSN."""
+    return (
+        make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    )
+
+
+class OutboxListener:
+    """Listen for outbox notifications and signal them through an event."""
+
+    def __init__(
+        self,
+        database_url: str,
+        channel: str = OUTBOX_NOTIFY_CHANNEL,
+        reconnect_interval: float = 5,
+    ):
+        """Create the listener.
+
+        Parameters
+        ----------
+        database_url : str
+            SQLAlchemy or asyncpg URL of the DLM database.
+        channel : str
+            The notification channel to listen on.
+        reconnect_interval : float
+            Seconds to wait before reconnecting a lost connection.
+        """
+        self._dsn = asyncpg_dsn(database_url)
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.wakeup = asyncio.Event()
+
+    async def wait(self, stop_event: asyncio.Event, timeout: float | None = None) -> None:
+        """Wait for a notification until the stop event is set or the timeout expires.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event ending the wait when set.
+        timeout : float | None
+            Seconds to wait at most, None to wait without a timeout.
+        """
+        await wait_any(stop_event, self.wakeup, timeout=timeout)
+
+    def _notify(self, *_) -> None:
+        """Handle a notification of the channel."""
+        self.wakeup.set()
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Hold the LISTEN connection until the stop event is set.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event stopping the listener when set.
+        """
+        while not stop_event.is_set():
+            lost = asyncio.Event()
+            try:
+                connection = await asyncpg.connect(self._dsn)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+                logger.exception("Failed to connect the outbox listener")
+            else:
+                try:
+                    connection.add_termination_listener(lambda *_: lost.set())
+                    await connection.add_listener(self.channel, self._notify)
+                    logger.info("Listening for outbox notifications on %s", self.channel)
+                    # drain the events inserted while not listening
+                    self.wakeup.set()
+                    await wait_any(stop_event, lost)
+                finally:
+                    if not connection.is_closed():
+                        await connection.close()
+            if not stop_event.is_set():
+                logger.warning("Outbox listener disconnected, reconnecting")
+                await wait_any(stop_event, timeout=self.reconnect_interval)
+
+
+async def wait_any(*events: asyncio.Event, timeout: float | None = None) -> None:
+    """Wait until any of the events is set or the timeout expires."""
+    waiters = [asyncio.create_task(event.wait()) for event in events]
+    try:
+        await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for waiter in waiters:
+            waiter.cancel()
@@ -3,14 +3,27 @@
 This module provides the lightweight database operations needed by the
 transactional outbox relay. The helper functions are intentionally small
 and designed to be called within an async SQLAlchemy transaction.
+
+Failed events are retried: every failure schedules the next attempt after a
+capped exponential backoff with full jitter, ``random() * min(max_delay,
+base_delay * 2 ** attempts)`` seconds, and after ``max_attempts`` attempts
+the event is marked DEAD and no longer retried.
+
+The outbox table is partitioned by day of creation. Delivered events are
+purged by dropping whole daily partitions once they are past the retention
+period, which keeps the table and its indexes small without bloating them
+with dead rows.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
-from sqlalchemy import asc, delete, select, update
+from sqlalchemy import any_, asc, case, delete, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.functions import coalesce
 
 from ska_dlm.common_types import OutboxStatus
 from ska_dlm.dlm_db import Outbox
@@ -25,6 +38,11 @@ def _normalise_datetime(value: datetime | None) -> datetime | None:
     return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
+def _uuid_array(values: list[str]):
+    """Bind a list of UUIDs as a single array parameter."""
+    return literal([str(value) for value in values], ARRAY(UUID(as_uuid=False)))
+
+
 async def add_outbox_event(
     # pylint: disable=too-many-arguments,too-many-positional-arguments
     session: AsyncSession,
@@ -68,6 +86,7 @@ async def add_outbox_event(
     }
     if created_at is not None:
         values["created_at"] = created_at
+        values["next_attempt_at"] = _normalise_datetime(created_at)
 
     outbox_event = Outbox(**values)
     session.add(outbox_event)
@@ -75,11 +94,24 @@ async def add_outbox_event(
     return outbox_event
 
 
-async def get_pending_outbox_events(session: AsyncSession, limit: int = 100) -> list[Outbox]:
-    """Return pending outbox events ordered by creation time.
+async def get_pending_outbox_events(
+    session: AsyncSession, limit: int = 100, claim: bool = False, ordered: bool = False
+) -> list[Outbox]:
+    """Return pending outbox events and due retries of failed events.
 
     The relay worker should call this function to fetch the next batch of
-    messages ready for delivery.
+    messages ready for delivery. Events are returned in the order of their
+    next attempt time, which is the creation time for pending events.
+
+    With ``claim`` the returned rows are locked with ``FOR UPDATE SKIP LOCKED``
+    until the session commits, so concurrent relays fetch disjoint batches.
+    With ``ordered`` a relay additionally only claims events of routing keys
+    no other relay holds, using transaction level advisory locks, so that the
+    events of one routing key are published by one relay at a time in order.
+    The advisory locks are only tried for the routing keys of the first
+    ``limit`` due events, never for every due event. Events created after a
+    FAILED event of their routing key are held back until it is delivered or
+    DEAD, so that the retry backoff does not reorder the events of a key.
 
     Parameters
     ----------
@@ -87,18 +119,48 @@ async def get_pending_outbox_events(session: AsyncSession, limit: int = 100) ->
         Async SQLAlchemy session used for the query.
     limit : int
         Maximum number of pending events to return.
+    claim : bool
+        Lock the returned events for this session's transaction.
+    ordered : bool
+        Claim the events of a routing key exclusively, implies ``claim``.
 
     Returns
     -------
     list[Outbox]:
         The list of pending outbox events.
     """
-    stmt = (
-        select(Outbox)
-        .where(Outbox.status == OutboxStatus.PENDING.value)
-        .order_by(asc(Outbox.created_at))
-        .limit(limit)
+    due = (
+        Outbox.status.in_([OutboxStatus.PENDING.value, OutboxStatus.FAILED.value]),
+        Outbox.next_attempt_at <= func.now(),  # pylint: disable=not-callable
     )
+    key = coalesce(Outbox.routing_key, Outbox.event_type)
+    if ordered:
+        earlier = aliased(Outbox)
+        due += (
+            ~exists().where(
+                earlier.status == OutboxStatus.FAILED.value,
+                coalesce(earlier.routing_key, earlier.event_type) == key,
+                earlier.created_at < Outbox.created_at,
+            ),
+        )
+    stmt = select(Outbox).where(*due).order_by(asc(Outbox.next_attempt_at)).limit(limit)
+    if ordered:
+        # the due events are limited before any key is locked, PostgreSQL
+        # never pushes the volatile lock call below the LIMIT or DISTINCT
+        candidates = (
+            select(key.label("key"))
+            .where(*due)
+            .order_by(asc(Outbox.next_attempt_at))
+            .limit(limit)
+            .subquery("candidates")
+        )
+        keys = select(candidates.c.key).distinct().subquery("candidate_keys")
+        claimed = select(keys.c.key).where(
+            func.pg_try_advisory_xact_lock(func.hashtext(keys.c.key))
+        )
+        stmt = stmt.where(key.in_(claimed))
+    if claim or ordered:
+        stmt = stmt.with_for_update(skip_locked=True)
     result = await session.execute(stmt)
     return result.scalars().all()
 
@@ -137,10 +199,40 @@ async def mark_outbox_event_sent(
     return result.rowcount
 
 
+def _failed_values(
+    last_attempt: datetime | None, max_attempts: int, base_delay: float, max_delay: float
+) -> dict[str, Any]:
+    """Return the update values of a failed attempt, scheduling the retry."""
+    status = OutboxStatus.FAILED.value
+    if max_attempts:
+        status = case(
+            (Outbox.attempts + 1 >= max_attempts, OutboxStatus.DEAD.value),
+            else_=OutboxStatus.FAILED.value,
+        )
+    # pylint: disable=not-callable
+    delay = (
+        func.least(float(max_delay), float(base_delay) * func.power(2, Outbox.attempts))
+        * func.random()
+    )
+    return {
+        "status": status,
+        "last_attempt": _normalise_datetime(last_attempt or datetime.now(timezone.utc)),
+        "attempts": Outbox.attempts + 1,
+        "next_attempt_at": func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+    }
+
+
 async def mark_outbox_event_failed(
-    session: AsyncSession, outbox_id: str, last_attempt: datetime | None = None
+    # pylint: disable=too-many-arguments
+    session: AsyncSession,
+    outbox_id: str,
+    last_attempt: datetime | None = None,
+    *,
+    max_attempts: int = 0,
+    base_delay: float = 1.0,
+    max_delay: float = 300.0,
 ) -> int:
-    """Mark an outbox event as failed and record the last attempt timestamp.
+    """Mark an outbox event as failed and schedule its retry.
 
     Parameters
     ----------
@@ -150,6 +242,13 @@ async def mark_outbox_event_failed(
         UUID string for the outbox event to update.
     last_attempt : datetime
         Optional time when the publish attempt was made.
+    max_attempts : int
+        Number of attempts after which the event is marked DEAD, 0 to retry
+        forever.
+    base_delay : float
+        Seconds of the backoff before the first retry.
+    max_delay : float
+        Maximum seconds of the backoff.
 
     Returns
     -------
@@ -159,9 +258,39 @@ async def mark_outbox_event_failed(
     stmt = (
         update(Outbox)
         .where(Outbox.outbox_id == outbox_id)
+        .values(**_failed_values(last_attempt, max_attempts, base_delay, max_delay))
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+async def mark_outbox_events_sent(
+    session: AsyncSession, outbox_ids: list[str], sent_at: datetime | None = None
+) -> int:
+    """Mark many outbox events as sent with a single update.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session used for the update.
+    outbox_ids : list[str]
+        UUIDs of the outbox events to update.
+    sent_at : datetime
+        Optional timestamp for when the events were delivered.
+
+    Returns
+    -------
+    int:
+        Number of rows updated.
+    """
+    timestamp = _normalise_datetime(sent_at or datetime.now(timezone.utc))
+    stmt = (
+        update(Outbox)
+        .where(Outbox.outbox_id == any_(_uuid_array(outbox_ids)))
         .values(
-            status=OutboxStatus.FAILED.value,
-            last_attempt=_normalise_datetime(last_attempt or datetime.now(timezone.utc)),
+            status=OutboxStatus.SENT.value,
+            sent_at=timestamp,
+            last_attempt=timestamp,
             attempts=Outbox.attempts + 1,
         )
     )
@@ -169,6 +298,48 @@ async def mark_outbox_event_failed(
     return result.rowcount
 
 
+async def mark_outbox_events_failed(
+    # pylint: disable=too-many-arguments
+    session: AsyncSession,
+    outbox_ids: list[str],
+    last_attempt: datetime | None = None,
+    *,
+    max_attempts: int = 0,
+    base_delay: float = 1.0,
+    max_delay: float = 300.0,
+) -> int:
+    """Mark many outbox events as failed and schedule their retries with a single update.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session used for the update.
+    outbox_ids : list[str]
+        UUIDs of the outbox events to update.
+    last_attempt : datetime
+        Optional time when the publish attempts were made.
+    max_attempts : int
+        Number of attempts after which an event is marked DEAD, 0 to retry
+        forever.
+    base_delay : float
+        Seconds of the backoff before the first retry.
+    max_delay : float
+        Maximum seconds of the backoff.
+
+    Returns
+    -------
+    int:
+        Number of rows updated.
+    """
+    stmt = (
+        update(Outbox)
+        .where(Outbox.outbox_id == any_(_uuid_array(outbox_ids)))
+        .values(**_failed_values(last_attempt, max_attempts, base_delay, max_delay))
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
 async def delete_old_sent_outbox_events(
     session: AsyncSession, cutoff: datetime | None = None
 ) -> int:
@@ -195,3 +366,52 @@ async def delete_old_sent_outbox_events(
     )
     result = await session.execute(stmt)
     return result.rowcount
+
+
+async def create_outbox_partitions(
+    session: AsyncSession, first_day: date | None = None, days: int = 3
+) -> int:
+    """Create the missing daily partitions of the outbox table.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session used to create the partitions.
+    first_day : date
+        Optional first day to create a partition for. Defaults to today (UTC).
+    days : int
+        Number of consecutive days to create partitions for.
+
+    Returns
+    -------
+    int:
+        Number of partitions created.
+    """
+    first_day = first_day or datetime.now(timezone.utc).date()
+    result = await session.execute(select(func.dlm.create_outbox_partitions(first_day, days)))
+    return result.scalar_one()
+
+
+async def drop_old_outbox_partitions(session: AsyncSession, cutoff: date | None = None) -> int:
+    """Drop the daily outbox partitions ending before the retention cutoff.
+
+    Dropping a partition discards its events without the row by row delete
+    and vacuum work of ``delete_old_sent_outbox_events``. Partitions
+    still holding PENDING or FAILED events are kept.
+
+    Parameters
+    ----------
+    session : AsyncSession
+        Async SQLAlchemy session used to drop the partitions.
+    cutoff : date
+        Optional day; partitions of days before it are dropped. Defaults to
+        one week ago from today (UTC).
+
+    Returns
+    -------
+    int:
+        Number of partitions dropped.
+    """
+    cutoff = cutoff or (datetime.now(timezone.utc) - timedelta(days=7)).date()
+    result = await session.execute(select(func.dlm.drop_outbox_partitions(cutoff)))
+    return result.scalar_one()
@@ -2,7 +2,30 @@
 
 This module implements a long-running loop that reads pending events from the
 outbox table and publishes them to RabbitMQ. It also updates the outbox row
-status to SENT or FAILED based on delivery results.
+status to SENT or FAILED based on delivery results. Failed events are
+retried with a capped exponential backoff and marked DEAD after
+``DLM_OUTBOX_MAX_ATTEMPTS`` attempts.
+
+In batched mode every fetched batch is published concurrently, the publisher
+confirms of RabbitMQ are collected and the delivery state of the whole batch
+is written with one update for the sent and one for the failed events.
+
+Several relays can share the outbox: in claim mode every relay locks the
+batch it fetched until it committed its delivery state, so concurrent relays
+never publish the same event. In ordered mode a relay also claims all pending
+events of a routing key exclusively and publishes them in order, stopping at
+the first failure so that later events of the key are not published ahead of
+it. Later events of a key with a FAILED event are not fetched until that
+event is delivered or DEAD, also across batches while it waits for its retry.
+
+In listen mode the relay is woken up by PostgreSQL notifications of new
+outbox events and drains them immediately, the poll interval only bounds
+the delay when a notification is missed.
+
+Retention is handled by a separate maintenance task running every
+``DLM_OUTBOX_MAINTENANCE_INTERVAL`` seconds rather than by every relay
+iteration: it creates the daily outbox partitions of the coming days and
+drops the partitions older than ``DLM_OUTBOX_RETENTION_DAYS``.
 """
 
 import asyncio
@@ -16,11 +39,16 @@ from aio_pika import DeliveryMode, Exchange, ExchangeType, Message, connect_robu
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ska_dlm.dlm_db import Outbox, create_async_sql_engine, create_async_sql_session
+from ska_dlm.dlm_outbox.listener import OutboxListener, wait_any
 from ska_dlm.dlm_outbox.outbox import (
+    create_outbox_partitions,
     delete_old_sent_outbox_events,
+    drop_old_outbox_partitions,
     get_pending_outbox_events,
     mark_outbox_event_failed,
     mark_outbox_event_sent,
+    mark_outbox_events_failed,
+    mark_outbox_events_sent,
 )
 
 logger = logging.getLogger(__name__)
@@ -35,6 +63,28 @@ RABBITMQ_URL = os.getenv(
 OUTBOX_POLL_INTERVAL = int(os.getenv("DLM_OUTBOX_POLL_INTERVAL", "10"))
 OUTBOX_BATCH_SIZE = int(os.getenv("DLM_OUTBOX_BATCH_SIZE", "50"))
 DEFAULT_OUTBOX_EXCHANGE = os.getenv("DLM_OUTBOX_EXCHANGE", "dlm.outbox")
+_TRUE_VALUES = ("1", "true", "yes")
+OUTBOX_LISTEN = os.getenv("DLM_OUTBOX_LISTEN", "true").lower() in _TRUE_VALUES
+OUTBOX_BATCH_PUBLISH = os.getenv("DLM_OUTBOX_BATCH_PUBLISH", "true").lower() in _TRUE_VALUES
+OUTBOX_CLAIM = os.getenv("DLM_OUTBOX_CLAIM", "true").lower() in _TRUE_VALUES
+OUTBOX_ORDERED = os.getenv("DLM_OUTBOX_ORDERED", "false").lower() in _TRUE_VALUES
+# failed events are retried after a capped exponential backoff until DEAD
+OUTBOX_RETRY = {
+    "max_attempts": int(os.getenv("DLM_OUTBOX_MAX_ATTEMPTS", "10")),
+    "base_delay": float(os.getenv("DLM_OUTBOX_RETRY_BASE_DELAY", "1")),
+    "max_delay": float(os.getenv("DLM_OUTBOX_RETRY_MAX_DELAY", "300")),
+}
+OUTBOX_MAINTENANCE_INTERVAL = int(os.getenv("DLM_OUTBOX_MAINTENANCE_INTERVAL", "3600"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("DLM_OUTBOX_RETENTION_DAYS", "7"))
+OUTBOX_PARTITION_DAYS_AHEAD = int(os.getenv("DLM_OUTBOX_PARTITION_DAYS_AHEAD", "3"))
+
+_UNPUBLISHED = object()
+"""Publish result of an event held back behind a failed event of its routing key."""
+
+
+def _routing_key(event: Outbox) -> str:
+    """Return the routing key of an outbox event."""
+    return event.routing_key or event.event_type
 
 
 async def _publish_event(exchange: Exchange, event: Outbox) -> None:
@@ -50,7 +100,7 @@ async def _publish_event(exchange: Exchange, event: Outbox) -> None:
     event : Outbox
         Outbox event to publish.
     """
-    routing_key = event.routing_key or event.event_type
+    routing_key = _routing_key(event)
 
     headers = {
         "outbox_id": str(event.outbox_id),
@@ -85,12 +135,19 @@ async def _process_pending_events(exchange: Exchange, session: AsyncSession) ->
     int
         The number of events successfully published.
     """
-    events = await get_pending_outbox_events(session, limit=OUTBOX_BATCH_SIZE)
+    events = await get_pending_outbox_events(
+        session, limit=OUTBOX_BATCH_SIZE, claim=OUTBOX_CLAIM, ordered=OUTBOX_ORDERED
+    )
     if not events:
         return 0
 
+    # claimed events stay locked until the whole batch is committed
+    commit_each = not (OUTBOX_CLAIM or OUTBOX_ORDERED)
+    failed_keys = set()
     processed = 0
     for event in events:
+        if OUTBOX_ORDERED and _routing_key(event) in failed_keys:
+            continue
         try:
             await _publish_event(exchange, event)
             await mark_outbox_event_sent(
@@ -98,32 +155,199 @@ async def _process_pending_events(exchange: Exchange, session: AsyncSession) ->
                 str(event.outbox_id),
                 sent_at=datetime.now(timezone.utc),
             )
-            await session.commit()
+            if commit_each:
+                await session.commit()
             processed += 1
         except Exception:  # pylint: disable=broad-exception-caught
             logger.exception("Failed to publish outbox event %s", event.outbox_id)
+            failed_keys.add(_routing_key(event))
             await mark_outbox_event_failed(
                 session,
                 str(event.outbox_id),
                 last_attempt=datetime.now(timezone.utc),
+                **OUTBOX_RETRY,
             )
-            await session.commit()
+            if commit_each:
+                await session.commit()
+    if not commit_each:
+        await session.commit()
 
-    deleted = await delete_old_sent_outbox_events(
+    return processed
+
+
+async def _process_pending_events_batched(exchange: Exchange, session: AsyncSession) -> int:
+    """Fetch pending outbox events and publish them as one concurrent batch.
+
+    Every publish awaits its publisher confirm, the confirmed events are
+    marked SENT and the failed ones FAILED with one update each.
+
+    Parameters
+    ----------
+    exchange : Exchange
+        RabbitMQ exchange, on a channel with publisher confirms, to publish to.
+    session : AsyncSession
+        Async SQLAlchemy session used to persist the delivery state.
+
+    Returns
+    -------
+    int
+        The number of events successfully published.
+    """
+    events = await get_pending_outbox_events(
+        session, limit=OUTBOX_BATCH_SIZE, claim=OUTBOX_CLAIM, ordered=OUTBOX_ORDERED
+    )
+    if not events:
+        return 0
+
+    results = await _publish_batch(exchange, events)
+    sent = []
+    failed = []
+    for event, result in zip(events, results):
+        if result is _UNPUBLISHED:
+            continue
+        if isinstance(result, BaseException):
+            logger.error("Failed to publish outbox event %s: %r", event.outbox_id, result)
+            failed.append(str(event.outbox_id))
+        else:
+            sent.append(str(event.outbox_id))
+
+    now = datetime.now(timezone.utc)
+    if sent:
+        await mark_outbox_events_sent(session, sent, sent_at=now)
+    if failed:
+        await mark_outbox_events_failed(session, failed, last_attempt=now, **OUTBOX_RETRY)
+    await session.commit()
+
+    return len(sent)
+
+
+async def _publish_batch(exchange: Exchange, events: list[Outbox]) -> list:
+    """Publish events concurrently, returning None or the exception of every event.
+
+    In ordered mode the events of one routing key are published one after the
+    other, and the events following a failed one are left unpublished.
+
+    Parameters
+    ----------
+    exchange : Exchange
+        The exchange the events are published to.
+    events : list[Outbox]
+        The events to publish.
+
+    Returns
+    -------
+    list
+        None for every published event, the exception of every failed event
+        and ``_UNPUBLISHED`` for events left unpublished.
+    """
+    if not OUTBOX_ORDERED:
+        return await asyncio.gather(
+            *(_publish_event(exchange, event) for event in events), return_exceptions=True
+        )
+
+    chains: dict[str, list[int]] = {}
+    for index, event in enumerate(events):
+        chains.setdefault(_routing_key(event), []).append(index)
+    results: list = [_UNPUBLISHED] * len(events)
+
+    async def _publish_chain(indices: list[int]) -> None:
+        for index in indices:
+            try:
+                await _publish_event(exchange, events[index])
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                results[index] = exc
+                return
+            results[index] = None
+
+    await asyncio.gather(*(_publish_chain(indices) for indices in chains.values()))
+    return results
+
+
+async def _create_outbox_partitions(session: AsyncSession) -> None:
+    """Create the daily outbox partitions of today and the coming days."""
+    created = await create_outbox_partitions(
         session,
-        cutoff=datetime.now(timezone.utc) - timedelta(days=7),
+        first_day=datetime.now(timezone.utc).date(),
+        days=OUTBOX_PARTITION_DAYS_AHEAD + 1,
     )
-    if deleted:
-        await session.commit()
-        logger.info("Deleted %s old sent outbox event(s)", deleted)
-    return processed
+    await session.commit()
+    logger.info("Outbox maintenance created %s partition(s)", created)
+
+
+async def _purge_outbox(session: AsyncSession) -> None:
+    """Drop the outbox partitions and delete the sent events past retention."""
+    now = datetime.now(timezone.utc)
+    dropped = await drop_old_outbox_partitions(
+        session, cutoff=now.date() - timedelta(days=OUTBOX_RETENTION_DAYS)
+    )
+    # sent events in partitions kept for their undelivered events
+    deleted = await delete_old_sent_outbox_events(
+        session, cutoff=now - timedelta(days=OUTBOX_RETENTION_DAYS)
+    )
+    await session.commit()
+    logger.info(
+        "Outbox maintenance dropped %s partition(s), deleted %s event(s)", dropped, deleted
+    )
+
+
+async def outbox_maintenance_loop(engine, stop_event: asyncio.Event) -> None:
+    """Run the outbox maintenance every maintenance interval until stopped.
+
+    Creating partitions and purging run in separate transactions, so that a
+    failure of one does not prevent the other.
+
+    Parameters
+    ----------
+    engine : AsyncEngine
+        Engine of the DLM database.
+    stop_event : asyncio.Event
+        Event stopping the maintenance when set.
+    """
+    while not stop_event.is_set():
+        for step in (_create_outbox_partitions, _purge_outbox):
+            try:
+                async with create_async_sql_session(engine) as session:
+                    await step(session)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception(
+                    "Outbox maintenance %s failed; retrying next interval", step.__name__
+                )
+        await wait_any(stop_event, timeout=OUTBOX_MAINTENANCE_INTERVAL)
+
+
+def _start_background_tasks(
+    engine, stop_event: asyncio.Event
+) -> tuple[list[asyncio.Task], OutboxListener | None]:
+    """Start the outbox maintenance and, in listen mode, the outbox listener.
+
+    Parameters
+    ----------
+    engine : AsyncEngine
+        Engine of the DLM database.
+    stop_event : asyncio.Event
+        Event stopping the tasks when set.
+
+    Returns
+    -------
+    tuple[list[asyncio.Task], OutboxListener | None]
+        The started tasks and the listener, None if not in listen mode.
+    """
+    tasks = [asyncio.create_task(outbox_maintenance_loop(engine, stop_event))]
+    listener = None
+    if OUTBOX_LISTEN:
+        listener = OutboxListener(OUTBOX_DATABASE_URL)
+        tasks.append(asyncio.create_task(listener.run(stop_event)))
+    return tasks, listener
 
 
 async def outbox_relay_loop(stop_event: asyncio.Event) -> None:
     """Run the outbox relay until a stop event is triggered.
 
     The loop polls the outbox table at a fixed interval, publishes pending
-    messages to RabbitMQ, and updates their delivery state.
+    messages to RabbitMQ, one by one or in concurrent batches, and updates
+    their delivery state. In listen mode
+    it also wakes up on notifications of new events, and a full batch is
+    followed by the next one without waiting.
 
     Parameters
     ----------
@@ -137,13 +361,20 @@ async def outbox_relay_loop(stop_event: asyncio.Event) -> None:
     async with create_async_sql_engine(OUTBOX_DATABASE_URL) as engine:
         connection = await connect_robust(RABBITMQ_URL)
 
-        async with connection.channel() as channel:
+        async with connection.channel(publisher_confirms=True) as channel:
             exchange = await channel.declare_exchange(
                 DEFAULT_OUTBOX_EXCHANGE,
                 ExchangeType.TOPIC,
                 durable=True,
             )
 
+            tasks, listener = _start_background_tasks(engine, stop_event)
+
+            process_pending_events = (
+                _process_pending_events_batched
+                if OUTBOX_BATCH_PUBLISH
+                else _process_pending_events
+            )
             loop_counter = 0
             while not stop_event.is_set():
                 start = datetime.now(timezone.utc)
@@ -151,15 +382,21 @@ async def outbox_relay_loop(stop_event: asyncio.Event) -> None:
                 logger.debug(
                     "Outbox relay loop %s starting at %s", loop_counter, start.isoformat()
                 )
+                if listener is not None:
+                    # notifications from now on trigger the next iteration
+                    listener.wakeup.clear()
                 try:
                     async with create_async_sql_session(engine) as session:
-                        processed = await _process_pending_events(exchange, session)
+                        processed = await process_pending_events(exchange, session)
 
                     elapsed = (datetime.now(timezone.utc) - start).total_seconds()
                     sleep_time = max(0, OUTBOX_POLL_INTERVAL - elapsed)
                     if processed > 0:
                         logger.info("Published %s outbox event(s)", processed)
-                    await asyncio.wait_for(stop_event.wait(), timeout=sleep_time)
+                    if listener is None:
+                        await asyncio.wait_for(stop_event.wait(), timeout=sleep_time)
+                    elif processed < OUTBOX_BATCH_SIZE:
+                        await listener.wait(stop_event, timeout=sleep_time)
                 except asyncio.TimeoutError:
                     continue
                 except asyncio.CancelledError:
@@ -168,6 +405,10 @@ async def outbox_relay_loop(stop_event: asyncio.Event) -> None:
                 except Exception:  # pylint: disable=broad-exception-caught
                     logger.exception("Outbox relay iteration failed; continuing")
 
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
 
 def _configure_signals(stop_event: asyncio.Event):
     """Bind SIGINT and SIGTERM to stop the relay cleanly."""
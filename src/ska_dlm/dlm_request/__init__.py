@@ -1,6 +1,8 @@
 """DLM request module for ska-data-lifecycle."""
 
 from .dlm_request_requests import (
+    iter_data_items,
+    iter_expired,
     query_data_item,
     query_deleted,
     query_exists,
@@ -11,6 +13,8 @@ from .dlm_request_requests import (
 )
 
 __all__ = [
+    "iter_data_items",
+    "iter_expired",
     "query_data_item",
     "query_deleted",
     "query_exists",
@@ -1,6 +1,7 @@
 """DLM Request API module."""
 
 import logging
+from collections.abc import Iterator
 from datetime import datetime, timedelta, timezone
 
 import ska_ser_logging
@@ -8,9 +9,11 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
 import ska_dlm
-from ska_dlm.common_types import ItemState, PhaseType
-from ska_dlm.data_item.data_item_requests import query_data_item
+from ska_dlm import CONFIG
+from ska_dlm.common_types import ConfigType, ItemState, PhaseType
+from ska_dlm.data_item.data_item_requests import iter_data_items, query_data_item
 from ska_dlm.data_item.data_item_requests import rest as data_item_requests
+from ska_dlm.dlm_db.db_access import DB
 from ska_dlm.exception_handling_typer import ExceptionHandlingTyper
 from ska_dlm.fastapi_utils import fastapi_auto_annotate
 
@@ -46,6 +49,8 @@ def invalidquery_exception_handler(request: Request, exc: InvalidQueryParameters
 def query_expired(offset: timedelta | None = None) -> list[dict]:
     """Query for all expired data_items using the uid_expiration timestamp.
 
+    At most 1000 data_items are returned, iter_expired returns all of them.
+
     Parameters
     ----------
     offset
@@ -55,18 +60,40 @@ def query_expired(offset: timedelta | None = None) -> list[dict]:
     -------
     list[dict]
     """
+    return query_data_item(params=_expired_params(offset))
+
+
+def iter_expired(offset: timedelta | None = None, page_size: int = 1000) -> Iterator[dict]:
+    """Iterate over all expired data_items, querying them page by page.
+
+    Parameters
+    ----------
+    offset
+        optional offset for the query
+    page_size
+        number of data_items queried per page.
+
+    Returns
+    -------
+    Iterator[dict]
+        the uid, uid_expiration and item_type of the expired data_items.
+    """
+    return iter_data_items(params=_expired_params(offset), page_size=page_size)
+
+
+def _expired_params(offset: timedelta | None) -> dict:
+    """Build the query params of the expired data_items."""
     now = datetime.now(timezone.utc)
     if offset:
         if not isinstance(offset, timedelta):
             raise InvalidQueryParameters("Specified offset invalid type! Should be timedelta.")
         now += offset
     iso_now = now.replace(tzinfo=None).isoformat()
-    params = {
+    return {
         "select": "uid,uid_expiration,item_type",
         "uid_expiration": f"lt.{iso_now}",
         "item_state": f"eq.{ItemState.READY.value}",
     }
-    return query_data_item(params=params)
 
 
 @cli.command()
@@ -153,8 +180,7 @@ def query_exists(item_name: str = "", oid: str = "", uid: str = "", ready: bool
         params["item_name"] = f"eq.{item_name}"
     if ready:
         params["item_state"] = f"eq.{ItemState.READY.value}"
-    # TODO: select COUNT(*) only instead of all data columns
-    return bool(query_data_item(params=params))
+    return DB.exists(CONFIG.DLM.dlm_table, key="uid", params=params)
 
 
 @cli.command()
@@ -179,6 +205,13 @@ def query_exists_and_ready(item_name: str = "", oid: str = "", uid: str = "") ->
     return query_exists(item_name, oid, uid, ready=True)
 
 
+_ITEM_STORAGE_SELECT = (
+    "oid,uid,item_name,item_type,storage_id,uri,"
+    "storage(storage_name,root_directory,storage_phase,storage_checked,storage_last_checked,"
+    "storage_config(config))"
+)
+
+
 @cli.command()
 @rest.get("/request/query_item_storage", response_model=list[dict])
 def query_item_storage(item_name: str = "", oid: str = "", uid: str = "") -> list[dict]:
@@ -201,19 +234,73 @@ def query_item_storage(item_name: str = "", oid: str = "", uid: str = "") -> lis
     list[dict]
         list of storage infos
     """
-    if not query_exists_and_ready(item_name, oid, uid):
-        logger.warning("data_item does not exists or is not READY.")
-        return []
+    if not item_name and not oid and not uid:
+        raise InvalidQueryParameters("Either an item_name or an OID or an UID have to be provided")
     params = {
         "select": "oid,uid,item_name,storage_id,uri",
         "item_state": f"eq.{ItemState.READY.value}",
     }
+    if item_name:
+        params["item_name"] = f"eq.{item_name}"
+    elif oid:
+        params["oid"] = f"eq.{oid}"
+    elif uid:
+        params["uid"] = f"eq.{uid}"
+    storages = query_data_item(params=params)
+    if not storages:
+        logger.warning("data_item does not exists or is not READY.")
+    return storages
+
+
+def resolve_item_storage(item_name: str = "", oid: str = "", uid: str = "") -> list[dict]:
+    """
+    Resolve the storages and rclone configs of all copies of a data_item.
+
+    Either an item_name or a OID have to be provided. The READY data_items,
+    their storage and its rclone config are resolved in a single query. The
+    rclone configs hold credentials, the function is not exposed by the REST
+    and CLI interfaces.
+
+    Parameters
+    ----------
+    item_name
+        optional item_name
+    oid
+        the oid to be searched for
+    uid
+        this returns only one storage_id
+
+    Returns
+    -------
+    list[dict]
+        list of storage infos with the oid, uid, item_name, item_type, uri,
+        storage_id, storage_name, root_directory, storage_phase and the health
+        status storage_checked and storage_last_checked of every copy and the
+        rclone config of its storage, None without config.
+    """
     if not item_name and not oid and not uid:
         raise InvalidQueryParameters("Either an item_name or an OID or an UID have to be provided")
+    params = {
+        "select": _ITEM_STORAGE_SELECT,
+        "item_state": f"eq.{ItemState.READY.value}",
+        "storage_id": "not.is.null",
+        "storage.storage_config.config_type": f"eq.{ConfigType.RCLONE.value}",
+        "limit": 1000,
+    }
     if item_name:
         params["item_name"] = f"eq.{item_name}"
     elif oid:
         params["oid"] = f"eq.{oid}"
     elif uid:
         params["uid"] = f"eq.{uid}"
-    return query_data_item(params=params)
+    rows = DB.select(CONFIG.DLM.dlm_table, params=params)
+    if not rows:
+        logger.warning("data_item does not exists or is not READY.")
+    return [_flatten_item_storage(row) for row in rows]
+
+
+def _flatten_item_storage(row: dict) -> dict:
+    """Merge the embedded storage and its first rclone config into the item row."""
+    storage = row.pop("storage", None) or {}
+    configs = storage.pop("storage_config", None) or []
+    return {**row, **storage, "config": configs[0]["config"] if configs else None}
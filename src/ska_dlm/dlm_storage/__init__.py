@@ -1,5 +1,6 @@
 """DLM storage module for ska-data-lifecycle."""
 
+from .deletion_executor import DeletionExecutor
 from .dlm_storage_requests import (
     check_item_on_storage,
     check_storage_access,
@@ -10,12 +11,16 @@ from .dlm_storage_requests import (
     get_storage_config,
     init_location,
     init_storage,
+    query_cache_stats,
     query_location,
     query_storage,
     rclone_access,
+    rclone_volume,
 )
+from .storage_cache import resolve_storage
 
 __all__ = [
+    "DeletionExecutor",
     "check_item_on_storage",
     "check_storage_access",
     "create_storage_config",
@@ -24,8 +29,11 @@ __all__ = [
     "get_storage_config",
     "init_location",
     "init_storage",
+    "query_cache_stats",
     "query_location",
     "query_storage",
     "rclone_access",
+    "rclone_volume",
+    "resolve_storage",
     "create_rclone_config",
 ]
@@ -0,0 +1,158 @@
+"""Concurrent deletion of data_item payloads through the rclone RC API.
+
+The executor runs the rclone ``operations/stat`` and ``operations/deletefile``
+(or ``operations/purge`` for containers) calls of many payload deletions
+concurrently on the event loop. The total number of in-flight deletions is
+bounded, and every storage gets its own concurrency limit so that a large
+batch of deletions on one backend can not overwhelm it or starve the others.
+
+The executor does not touch the database, callers receive one result per
+deletion and are responsible for the data_item state updates.
+"""
+
+import asyncio
+import logging
+import random
+from collections import defaultdict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionExecutor:
+    """Bounded async worker pool deleting payloads via the rclone RC API."""
+
+    def __init__(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        rclone_urls: list[str],
+        max_workers: int = 32,
+        max_per_storage: int = 4,
+        storage_limits: dict[str, int] | None = None,
+        timeout: int | float = 10,
+    ):
+        """Create the deletion executor.
+
+        Parameters
+        ----------
+        rclone_urls : list[str]
+            URLs of the rclone RC servers, one is picked at random per request.
+        max_workers : int
+            Maximum number of deletions in flight across all storages.
+        max_per_storage : int
+            Default maximum number of deletions in flight per storage.
+        storage_limits : dict[str, int] | None
+            Optional per storage_id overrides of max_per_storage.
+        timeout : int | float
+            Timeout in seconds of every rclone request.
+        """
+        if not rclone_urls:
+            raise ValueError("No Rclone URLs")
+        self.rclone_urls = list(rclone_urls)
+        self._timeout = timeout
+        self._workers = asyncio.Semaphore(max_workers)
+        self._storage_limits = dict(storage_limits or {})
+        self._storage_semaphores: dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_per_storage)
+        )
+        for storage_id, limit in self._storage_limits.items():
+            self._storage_semaphores[str(storage_id)] = asyncio.Semaphore(limit)
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self):
+        """Open the pooled HTTP client."""
+        self._client = httpx.AsyncClient(verify=False, timeout=self._timeout)
+        return self
+
+    async def __aexit__(self, _exc_type, _exc_value, _traceback) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, endpoint: str, post_data: dict) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError("DeletionExecutor used outside of its context")
+        url = random.choice(self.rclone_urls)
+        request_url = f"{url}/{endpoint}"
+        logger.debug("rclone request: %s, %s", request_url, post_data)
+        return await self._client.post(request_url, data=post_data)
+
+    async def _delete(self, volume: str, path: str, item_type: str) -> tuple[bool, str]:
+        response = await self._post("operations/stat", {"fs": volume, "remote": path})
+        if response.status_code != 200 or not response.json().get("item"):
+            return False, f"rclone can not access {path} on {volume}"
+        if item_type.lower() == "container":
+            endpoint = "operations/purge"
+        else:
+            endpoint = "operations/deletefile"
+        response = await self._post(endpoint, {"fs": volume, "remote": path})
+        if response.status_code != 200:
+            return False, f"rclone deletion of {path} on {volume} failed: {response.status_code}"
+        return True, f"Deleted {path} from {volume}"
+
+    async def delete_payload(
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        uid: str,
+        storage_id: str,
+        volume: str,
+        path: str,
+        item_type: str = "file",
+    ) -> dict:
+        """Delete a single payload, waiting for a free worker and storage slot.
+
+        Parameters
+        ----------
+        uid : str
+            The UID of the data_item owning the payload.
+        storage_id : str
+            The storage holding the payload, used to select the concurrency limit.
+        volume : str
+            The configured rclone volume name hosting the payload.
+        path : str
+            The payload path on the volume.
+        item_type : str
+            The type of the data_item [file|container].
+
+        Returns
+        -------
+        dict
+            uid, success and message of the deletion.
+        """
+        async with self._storage_semaphores[str(storage_id)], self._workers:
+            try:
+                success, message = await self._delete(volume, path, item_type)
+            except (httpx.HTTPError, ValueError) as exc:
+                success, message = False, f"rclone request failed: {exc}"
+        if success:
+            logger.info("Deleted payload of %s: %s", uid, message)
+        else:
+            logger.warning("Unable to delete payload of %s: %s", uid, message)
+        return {"uid": uid, "success": success, "message": message}
+
+    async def delete_payloads(self, jobs: list[dict]) -> list[dict]:
+        """Delete many payloads concurrently.
+
+        Parameters
+        ----------
+        jobs : list[dict]
+            Keyword arguments of ``delete_payload`` for every deletion.
+
+        Returns
+        -------
+        list[dict]
+            One result per job, in the order of the jobs. A job raising an
+            unexpected error is reported as failed without affecting the others.
+        """
+        results = []
+        outcomes = await asyncio.gather(
+            *(self.delete_payload(**job) for job in jobs), return_exceptions=True
+        )
+        for job, result in zip(jobs, outcomes):
+            if isinstance(result, Exception):
+                logger.error("Deletion of the payload of %s failed: %s", job["uid"], result)
+                result = {"uid": job["uid"], "success": False, "message": str(result)}
+            results.append(result)
+        return results
@@ -1,10 +1,12 @@
 """DLM Storage API module."""
 
+import asyncio
 import json
 import logging
 import os
 import random
 from contextlib import asynccontextmanager
+from enum import Enum
 
 import requests
 from fastapi import FastAPI, Request
@@ -20,20 +22,22 @@ from ska_dlm.common_types import (
     StorageType,
 )
 from ska_dlm.dlm_db.db_access import DB
-from ska_dlm.dlm_request.dlm_request_requests import query_exists
+from ska_dlm.dlm_request.dlm_request_requests import query_exists, resolve_item_storage
 from ska_dlm.exception_handling_typer import ExceptionHandlingTyper
 from ska_dlm.fastapi_utils import fastapi_auto_annotate
 from ska_dlm.typer_types import JsonObjectArg, JsonObjectOption
 
 from .. import CONFIG
 from ..data_item import set_state
-from ..dlm_request import query_expired, query_item_storage
+from ..dlm_request import iter_expired
 from ..exceptions import (
     DatabaseOperationError,
     InvalidQueryParameters,
     UnmetPreconditionForOperation,
     ValueAlreadyInDB,
 )
+from .storage_cache import STORAGE_CACHE, resolve_storage, start_storage_cache_invalidator
+from .storage_health import STORAGE_HEALTH_INTERVAL, StorageHealthProber, storage_status
 
 logger = logging.getLogger(__name__)
 
@@ -63,7 +67,14 @@ async def lifespan(_: FastAPI):
         for storage in storage_json_config:
             _setup_storage(storage)
 
+    stop_event = asyncio.Event()
+    tasks = [start_storage_cache_invalidator(stop_event)]
+    if STORAGE_HEALTH_INTERVAL > 0:
+        prober = StorageHealthProber(check_storage_config, interval=STORAGE_HEALTH_INTERVAL)
+        tasks.append(asyncio.create_task(prober.run(stop_event)))
     yield  # Application runs here
+    stop_event.set()
+    await asyncio.gather(*(task for task in tasks if task is not None))
 
 
 cli = ExceptionHandlingTyper()
@@ -276,7 +287,20 @@ def query_location(location_name: str = "", location_id: str = "") -> list[dict]
             params["location_name"] = f"eq.{location_name}"
         elif location_id:
             params["location_id"] = f"eq.{location_id}"
-    return DB.select(CONFIG.DLM.location_table, params=params)
+    return STORAGE_CACHE.get(
+        ("location", *sorted(params.items())),
+        lambda: DB.select(CONFIG.DLM.location_table, params=params),
+    )
+
+
+def _check_enum(enum_type: type[Enum], value, description: str) -> None:
+    """Raise a ValueError listing the valid values if the value is not one of the enum."""
+    try:
+        enum_type(value)
+    except ValueError as exc:
+        raise ValueError(
+            f"Invalid {description} {value}. Must be one of {[e.value for e in enum_type]}"
+        ) from exc
 
 
 @cli.command()
@@ -361,29 +385,13 @@ def init_storage(
             else:
                 raise InvalidQueryParameters(f"Argument {k} is mandatory!")
 
-    try:
-        StorageType(storage_type)  # Check that the input is a valid enum
-    except ValueError as exc:
-        raise ValueError(
-            f"Invalid storage type {storage_type}. Must be one of {[e.value for e in StorageType]}"
-        ) from exc
-
-    try:
-        StorageInterface(storage_interface)  # Check that the input is a valid enum
-    except ValueError as exc:
-        raise ValueError(
-            f"Invalid storage interface {storage_interface}. "
-            f"Must be one of {[e.value for e in StorageInterface]}"
-        ) from exc
-
-    try:
-        PhaseType(storage_phase)  # Check that the input is a valid enum
-    except ValueError as exc:
-        raise ValueError(
-            f"Invalid storage phase {storage_phase}. Must be one of {[e.value for e in PhaseType]}"
-        ) from exc
+    _check_enum(StorageType, storage_type, "storage type")
+    _check_enum(StorageInterface, storage_interface, "storage interface")
+    _check_enum(PhaseType, storage_phase, "storage phase")
 
-    return DB.insert(CONFIG.DLM.storage_table, json=post_data)[0]["storage_id"]
+    storage_id = DB.insert(CONFIG.DLM.storage_table, json=post_data)[0]["storage_id"]
+    STORAGE_CACHE.invalidate()
+    return storage_id
 
 
 def set_storage_availability(storage_name: str, available: bool):
@@ -404,7 +412,9 @@ def set_storage_availability(storage_name: str, available: bool):
     """
     params = {"storage_name": f"eq.{storage_name}"}
     json_data = {"storage_available": available}
-    return DB.update(CONFIG.DLM.storage_table, params=params, json=json_data)[0]
+    storage = DB.update(CONFIG.DLM.storage_table, params=params, json=json_data)[0]
+    STORAGE_CACHE.invalidate()
+    return storage
 
 
 @cli.command()
@@ -458,7 +468,9 @@ def create_storage_config(
         "config_type": config_type,
     }
     if create_rclone_config(config):
-        return DB.insert(CONFIG.DLM.storage_config_table, json=post_data)[0]["config_id"]
+        config_id = DB.insert(CONFIG.DLM.storage_config_table, json=post_data)[0]["config_id"]
+        STORAGE_CACHE.invalidate()
+        return config_id
     raise UnmetPreconditionForOperation("Configuring rclone server failed!")
 
 
@@ -513,7 +525,10 @@ def get_storage_config(
             "storage_id": f"eq.{storage_id}",
             "config_type": f"eq.{config_type.value}",
         }
-    result = DB.select(CONFIG.DLM.storage_config_table, params=params)
+    result = STORAGE_CACHE.get(
+        ("storage_config", *sorted(params.items())),
+        lambda: DB.select(CONFIG.DLM.storage_config_table, params=params),
+    )
     return [entry["config"] for entry in result] if result else []
 
 
@@ -573,19 +588,29 @@ def check_storage_access(
     bool
         True is accessible
     """
-    storages = query_storage(storage_name=storage_name, storage_id=storage_id)
+    storages = resolve_storage(storage_name=storage_name, storage_id=storage_id)
     if not storages:
         logger.error("The requested storage is unknown: %s [%s]", storage_name, storage_id)
         return False
-    storage_id = storages[0]["storage_id"]
-    storage_name = storages[0]["storage_name"]
-    config = get_storage_config(storage_id=storage_id, storage_name=storage_name)
-    if not config:
+    if not storages[0]["config"]:
         raise UnmetPreconditionForOperation(
-            "No valid configuration for storage found!", storage_name
+            "No valid configuration for storage found!", storages[0]["storage_name"]
         )
-    volume_name = f"{config[0]['name']}:{config[0].get('root_path', '/')}"
-    return rclone_remote_check(volume_name)
+    # the status recorded by the storage health prober saves the round trip
+    status = storage_status(storages[0])
+    if status is not None:
+        return status
+    return check_storage_config(storages[0]["config"])
+
+
+def rclone_volume(config: dict) -> str:
+    """Return the rclone volume name of a storage's rclone config."""
+    return f"{config['name']}:{config.get('root_path', '/')}"
+
+
+def check_storage_config(config: dict) -> bool:
+    """Check whether the rclone remote of a storage's rclone config is alive."""
+    return rclone_remote_check(rclone_volume(config))
 
 
 def rclone_remote_check(volume: str, config: dict | None = None) -> bool:
@@ -745,7 +770,9 @@ def init_location(
     if location_facility:
         post_data["location_facility"] = location_facility
 
-    return DB.insert(CONFIG.DLM.location_table, json=post_data)[0]["location_id"]
+    location_id = DB.insert(CONFIG.DLM.location_table, json=post_data)[0]["location_id"]
+    STORAGE_CACHE.invalidate()
+    return location_id
 
 
 @cli.command()
@@ -771,7 +798,24 @@ def query_storage(storage_name: str = "", storage_id: str = "") -> list[dict]:
         params["storage_name"] = f"eq.{storage_name}"
     elif storage_id:
         params["storage_id"] = f"eq.{storage_id}"
-    return DB.select(CONFIG.DLM.storage_table, params=params)
+    return STORAGE_CACHE.get(
+        ("storage", *sorted(params.items())),
+        lambda: DB.select(CONFIG.DLM.storage_table, params=params),
+    )
+
+
+@cli.command()
+@rest.get("/storage/query_cache_stats", response_model=dict)
+def query_cache_stats() -> dict:
+    """
+    Query the counters of the storage, location and storage_config lookup cache.
+
+    Returns
+    -------
+    dict
+        The TTL, number of entries and the hit, miss and invalidation counters.
+    """
+    return STORAGE_CACHE.stats()
 
 
 def check_item_on_storage(
@@ -800,7 +844,7 @@ def check_item_on_storage(
     -------
     list
     """
-    storages = query_item_storage(item_name, oid, uid)
+    storages = resolve_item_storage(item_name, oid, uid)
     if not storages:
         if not uid:
             logger.error("Unable to identify a storage volume holding this data_item!")
@@ -841,7 +885,7 @@ def delete_data_item_payload(uid: str, item_type: str = "file", item_name: str =
     bool
         True if successful
     """
-    storages = query_item_storage(uid=uid)
+    storages = resolve_item_storage(uid=uid)
     logger.info("Storage for this uid: %s", storages)
     if not storages:
         logger.error("No storage found keeping a READY version of UID: %s, %s", uid, item_name)
@@ -850,16 +894,15 @@ def delete_data_item_payload(uid: str, item_type: str = "file", item_name: str =
         # This is a really bad place to be in!
         logger.error("More than one storage volume keeping UID: %s, %s", uid, item_name)
     storage = storages[0]
-    config = get_storage_config(storage["storage_id"])[0]
-    volume_name = f"{config['name']}:{config.get('root_path', '/')}"
-    if not rclone_access(volume_name):
-        return False
-    source_storage = query_storage(storage_id=storage["storage_id"])
-    if not source_storage:
+    if not storage["config"]:
         raise UnmetPreconditionForOperation(
-            f"Unable to get source storage: {storage['storage_id']}."
+            "No valid configuration for storage found!", storage["storage_name"]
         )
-    delete_path = f"{source_storage[0]['root_directory']}/{storage['uri']}".replace("//", "/")
+    volume_name = rclone_volume(storage["config"])
+    status = storage_status(storage)
+    if not (rclone_access(volume_name) if status is None else status):
+        return False
+    delete_path = f"{storage['root_directory']}/{storage['uri']}".replace("//", "/")
     if not rclone_delete(volume_name, delete_path, item_type):
         logger.warning(
             "rclone unable to delete data item payload: %s %s of type %s",
@@ -875,12 +918,9 @@ def delete_data_item_payload(uid: str, item_type: str = "file", item_name: str =
 
 def delete_uids():
     """Check for expired data items and trigger deletion."""
-    expired_data_items = query_expired()
-
-    if len(expired_data_items) > 0:
-        logger.info("Found %s expired data items", len(expired_data_items))
-
-    for data_item in expired_data_items:
+    count = 0
+    for data_item in iter_expired():
+        count += 1
         uid = data_item["uid"]
         item_type = data_item.get("item_type", "file")
 
@@ -889,6 +929,9 @@ def delete_uids():
         if not success:
             logger.warning("Unable to delete data item payload: %s", uid)
 
+    if count > 0:
+        logger.info("Processed %s expired data items", count)
+
 
 def check_storage_capacity():
     """Check remaining capacity of all storage items."""
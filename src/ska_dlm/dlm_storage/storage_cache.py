@@ -0,0 +1,250 @@
+"""Read-through cache of the storage, location and storage_config lookups.
+
+Storages, locations and their configs change rarely but are looked up on
+every registration, copy and deletion. The lookups are cached in-process for
+``DLM.storage_manager.cache.ttl`` seconds and the whole cache is invalidated
+when this process writes one of the tables. ``resolve_storage`` resolves a
+storage with its rclone config through the cache.
+
+Writes of other processes are published as ``storage.changed`` events by a
+trigger on the tables through the outbox. When
+``DLM.storage_manager.cache.rabbitmq_url`` is configured, a
+``StorageCacheInvalidator`` subscribes to these events on the outbox
+exchange and invalidates the cache of its process, otherwise such writes are
+seen once the cached entries expire.
+"""
+
+import asyncio
+import copy
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from aio_pika import ExchangeType, connect_robust
+from aio_pika.abc import AbstractIncomingMessage
+
+from ska_dlm.common_types import ConfigType
+from ska_dlm.dlm_db.db_access import DB
+
+from .. import CONFIG
+from ..dlm_outbox.listener import wait_any
+from ..exceptions import InvalidQueryParameters
+
+logger = logging.getLogger(__name__)
+
+STORAGE_CHANGED_EVENT = "storage.changed"
+"""Outbox event type of writes to the storage, storage_config and location tables."""
+
+
+class TTLCache:
+    """Thread-safe read-through cache whose entries expire after a time to live."""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        """Create the cache.
+
+        Parameters
+        ----------
+        ttl : float
+            Seconds an entry is served from the cache, 0 disables the cache.
+        clock : Callable[[], float]
+            Monotonic clock returning seconds.
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value of the key, loading and caching it when missing or expired.
+
+        Values are copied in and out of the cache, so callers may modify them.
+
+        Parameters
+        ----------
+        key : Hashable
+            Key of the value.
+        loader : Callable[[], Any]
+            Function loading the value.
+
+        Returns
+        -------
+        Any
+            The value of the key.
+        """
+        if self.ttl <= 0:
+            return loader()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            self.misses += 1
+            generation = self.invalidations
+        value = loader()
+        with self._lock:
+            # a value loaded before an invalidation may already be stale
+            if generation == self.invalidations:
+                self._entries[key] = (self._clock() + self.ttl, copy.deepcopy(value))
+        return value
+
+    def invalidate(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Return the hit, miss and invalidation counters and the number of entries."""
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+STORAGE_CACHE = TTLCache(CONFIG.get("DLM.storage_manager.cache.ttl", 60))
+"""Cache of the storage, location and storage_config lookups of this process."""
+
+
+def resolve_storage(storage_name: str = "", storage_id: str = "") -> list[dict]:
+    """
+    Query a storage together with its rclone config in a single query.
+
+    The rclone config holds credentials, the function is not exposed by the
+    REST and CLI interfaces.
+
+    Parameters
+    ----------
+    storage_name
+        Name of the storage to query.
+    storage_id
+        ID of the storage to query. Ignored if storage_name is provided.
+
+    Returns
+    -------
+    list[dict]
+        The matching storage with its rclone config as config, None without config.
+    """
+    if not storage_name and not storage_id:
+        raise InvalidQueryParameters("Either storage_name or storage_id is required.")
+    params = {
+        "select": "*,storage_config(config)",
+        "storage_config.config_type": f"eq.{ConfigType.RCLONE.value}",
+    }
+    if storage_name:
+        params["storage_name"] = f"eq.{storage_name}"
+    else:
+        params["storage_id"] = f"eq.{storage_id}"
+    return STORAGE_CACHE.get(
+        ("resolved_storage", *sorted(params.items())), lambda: _select_storages(params)
+    )
+
+
+def _select_storages(params: dict) -> list[dict]:
+    """Select storages with their embedded rclone config as config."""
+    storages = DB.select(CONFIG.DLM.storage_table, params=params)
+    for storage in storages:
+        configs = storage.pop("storage_config", None) or []
+        storage["config"] = configs[0]["config"] if configs else None
+    return storages
+
+
+class StorageCacheInvalidator:
+    """Invalidate a cache on the storage.changed events of the outbox exchange."""
+
+    def __init__(
+        self,
+        cache: TTLCache,
+        rabbitmq_url: str,
+        exchange: str = "dlm.outbox",
+        reconnect_interval: float = 5,
+    ):
+        """Create the invalidator.
+
+        Parameters
+        ----------
+        cache : TTLCache
+            The cache to invalidate.
+        rabbitmq_url : str
+            URL of the RabbitMQ broker the outbox relay publishes to.
+        exchange : str
+            Name of the outbox exchange.
+        reconnect_interval : float
+            Seconds to wait before reconnecting after a failed connection.
+        """
+        self.cache = cache
+        self.rabbitmq_url = rabbitmq_url
+        self.exchange = exchange
+        self.reconnect_interval = reconnect_interval
+
+    async def on_message(self, message: AbstractIncomingMessage) -> None:
+        """Invalidate the cache on an event.
+
+        Parameters
+        ----------
+        message : AbstractIncomingMessage
+            The storage.changed event.
+        """
+        async with message.process():
+            self.cache.invalidate()
+            logger.debug("Storage cache invalidated by %s", message.headers.get("outbox_id"))
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Consume the events until the stop event is set.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event stopping the invalidator when set.
+        """
+        while not stop_event.is_set():
+            try:
+                connection = await connect_robust(self.rabbitmq_url)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Failed to connect the storage cache invalidator")
+                await wait_any(stop_event, timeout=self.reconnect_interval)
+                continue
+            async with connection:
+                channel = await connection.channel()
+                exchange = await channel.declare_exchange(
+                    self.exchange, ExchangeType.TOPIC, durable=True
+                )
+                queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+                await queue.bind(exchange, routing_key=STORAGE_CHANGED_EVENT)
+                await queue.consume(self.on_message)
+                # events published while not subscribed are missed
+                self.cache.invalidate()
+                logger.info("Invalidating the storage cache on %s events", STORAGE_CHANGED_EVENT)
+                await stop_event.wait()
+
+
+def start_storage_cache_invalidator(stop_event: asyncio.Event) -> asyncio.Task | None:
+    """Start the configured invalidator of the storage cache.
+
+    Parameters
+    ----------
+    stop_event : asyncio.Event
+        Event stopping the invalidator when set.
+
+    Returns
+    -------
+    asyncio.Task | None
+        The task running the invalidator, None if not configured.
+    """
+    rabbitmq_url = CONFIG.get("DLM.storage_manager.cache.rabbitmq_url", "")
+    if not rabbitmq_url or STORAGE_CACHE.ttl <= 0:
+        return None
+    invalidator = StorageCacheInvalidator(
+        STORAGE_CACHE,
+        rabbitmq_url,
+        exchange=CONFIG.get("DLM.storage_manager.cache.exchange", "dlm.outbox"),
+    )
+    return asyncio.create_task(invalidator.run(stop_event))
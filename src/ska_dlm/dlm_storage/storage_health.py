@@ -0,0 +1,154 @@
+"""Background health checks of the configured storages.
+
+The storage manager probes the rclone remote of every storage which is not
+retired every ``DLM.storage_manager.health.interval`` seconds, several
+storages concurrently, and records the result in the ``storage_checked`` and
+``storage_last_checked`` columns of the storage.
+
+The access checks of ingest, deletion and the heuristic engine use the
+recorded status while it is younger than
+``DLM.storage_manager.health.max_age`` seconds and only check the remote
+themselves when the status is missing or outdated, so their latency does not
+depend on the response time of rclone.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+from .. import CONFIG
+from ..common_types import ConfigType
+from ..dlm_db.db_access import ASYNC_DB
+from ..dlm_outbox.listener import wait_any
+
+logger = logging.getLogger(__name__)
+
+STORAGE_HEALTH_INTERVAL = CONFIG.get("DLM.storage_manager.health.interval", 60)
+STORAGE_HEALTH_MAX_AGE = CONFIG.get("DLM.storage_manager.health.max_age", 300)
+STORAGE_HEALTH_CONCURRENCY = CONFIG.get("DLM.storage_manager.health.concurrency", 8)
+
+
+def _utcnow() -> datetime:
+    """Return the current UTC time without time zone, as stored by the database."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def storage_status(storage: dict, max_age: float | None = None) -> bool | None:
+    """Return the recorded accessibility of a storage if it is recent enough.
+
+    Parameters
+    ----------
+    storage : dict
+        The storage with its storage_checked and storage_last_checked fields.
+    max_age : float | None
+        Maximum age in seconds of the recorded status, by default
+        ``DLM.storage_manager.health.max_age``, 0 to never use it.
+
+    Returns
+    -------
+    bool | None
+        The recorded status, None if missing or older than max_age.
+    """
+    max_age = STORAGE_HEALTH_MAX_AGE if max_age is None else max_age
+    last_checked = storage.get("storage_last_checked")
+    if max_age <= 0 or not last_checked or storage.get("storage_checked") is None:
+        return None
+    if isinstance(last_checked, str):
+        last_checked = datetime.fromisoformat(last_checked)
+    if (_utcnow() - last_checked).total_seconds() > max_age:
+        return None
+    return bool(storage["storage_checked"])
+
+
+class StorageHealthProber:
+    """Probe the rclone remotes of all storages and record their status."""
+
+    def __init__(
+        self,
+        check: Callable[[dict], bool],
+        interval: float = STORAGE_HEALTH_INTERVAL,
+        concurrency: int = STORAGE_HEALTH_CONCURRENCY,
+    ):
+        """Create the prober.
+
+        Parameters
+        ----------
+        check : Callable[[dict], bool]
+            Blocking check whether the rclone remote of a storage config is accessible.
+        interval : float
+            Seconds between the starts of two probe rounds.
+        concurrency : int
+            Maximum number of storages probed concurrently.
+        """
+        self.check = check
+        self.interval = interval
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def _probe(self, storage: dict) -> bool:
+        """Probe one storage and record its status."""
+        configs = storage.get("storage_config") or []
+        accessible = False
+        if not configs:
+            logger.warning("No rclone config for storage %s", storage["storage_name"])
+        else:
+            async with self._slots:
+                try:
+                    accessible = bool(await asyncio.to_thread(self.check, configs[0]["config"]))
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Health check of storage %s failed", storage["storage_name"])
+        await ASYNC_DB.update(
+            CONFIG.DLM.storage_table,
+            params={"storage_id": f"eq.{storage['storage_id']}"},
+            json={"storage_checked": accessible, "storage_last_checked": _utcnow().isoformat()},
+        )
+        return accessible
+
+    async def probe_all(self) -> dict[str, bool]:
+        """Probe all storages which are not retired concurrently.
+
+        Returns
+        -------
+        dict[str, bool]
+            The accessibility of every probed storage by storage name.
+        """
+        storages = await ASYNC_DB.select(
+            CONFIG.DLM.storage_table,
+            params={
+                "select": "storage_id,storage_name,storage_config(config)",
+                "storage_config.config_type": f"eq.{ConfigType.RCLONE.value}",
+                "storage_retired": "is.false",
+            },
+        )
+        results = await asyncio.gather(
+            *(self._probe(storage) for storage in storages), return_exceptions=True
+        )
+        status = {}
+        for storage, result in zip(storages, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    "Unable to record the health of storage %s: %s",
+                    storage["storage_name"],
+                    result,
+                )
+            else:
+                status[storage["storage_name"]] = result
+        return status
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Probe the storages every interval until the stop event is set.
+
+        Parameters
+        ----------
+        stop_event : asyncio.Event
+            Event stopping the prober when set.
+        """
+        loop = asyncio.get_running_loop()
+        while not stop_event.is_set():
+            start = loop.time()
+            try:
+                status = await self.probe_all()
+                logger.info("Storage health: %s", status)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Storage health probe failed")
+            await wait_any(stop_event, timeout=max(0, self.interval - (loop.time() - start)))
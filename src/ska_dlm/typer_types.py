@@ -30,6 +30,28 @@ def json_array(value: str) -> list:
     return value
 
 
+def json_array_or_ndjson(value: str) -> list:
+    """Parse shell string to a JSON array of objects, accepting JSON or NDJSON.
+
+    Parameters
+    ----------
+    value : str
+        A JSON array, NDJSON with one object per line, or ``@`` followed by the
+        path of a file holding either.
+
+    Returns
+    -------
+    list
+        The parsed items.
+    """
+    if value.startswith("@"):
+        with open(value[1:], encoding="utf-8") as file:
+            value = file.read()
+    if value.lstrip().startswith("["):
+        return json_array(value)
+    return [json_object(line) for line in value.splitlines() if line.strip()]
+
+
 JsonObjectArg = Annotated[dict, typer.Argument(parser=json_object)]
 """dict literal type alias for typer."""
 
@@ -42,6 +64,9 @@ JsonArrayArg = Annotated[list, typer.Argument(parser=json_array)]
 JsonArrayOption = Annotated[Optional[list], typer.Option(parser=json_array)]
 """Optional[list] literal type alias for typer."""
 
+JsonArrayOrNdjsonArg = Annotated[list, typer.Argument(parser=json_array_or_ndjson)]
+"""list literal type alias for typer accepting a JSON array, NDJSON or @file."""
+
 JsonContainerArg = Annotated[Any, typer.Argument(parser=json_object_or_array)]
 """dict | list literal type alias for typer.
 
@@ -2,7 +2,9 @@
 
 import copy
 import inspect
+import json
 import typing
+from collections.abc import Iterator
 from typing import ParamSpec, TypeVar
 
 import typer
@@ -26,6 +28,15 @@ def dump_short_stacktrace(ex: Exception):
     return 1
 
 
+def print_result(result):
+    """Print the result of a command, iterators as newline-delimited JSON."""
+    if isinstance(result, Iterator):
+        for item in result:
+            print(json.dumps(item, default=str))
+    else:
+        print(result)
+
+
 def create_typer_parameter(
     kind: type,
     **param_kwargs,
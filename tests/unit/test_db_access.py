@@ -1,9 +1,21 @@
 """DB Access tests."""
 
+import asyncio
+
+import httpx
 import pytest
+import requests
 
 from ska_dlm import CONFIG
-from ska_dlm.dlm_db.db_access import DB
+from ska_dlm.dlm_db.db_access import (
+    DB,
+    AsyncPostgRESTAccess,
+    DBQueryError,
+    PostgRESTAccess,
+    encode_cursor,
+    keyset_params,
+)
+from ska_dlm.exceptions import DatabaseOperationError, InvalidQueryParameters
 
 
 # pylint: disable=unused-argument
@@ -18,3 +30,145 @@ def test_query_expired():
     """Test the query expired returning records."""
     res = DB.select(CONFIG.DLM.dlm_table, params={"limit": 1000})
     assert isinstance(res, list)
+
+
+def _async_db(handler) -> AsyncPostgRESTAccess:
+    """Async DB access answering requests with the given handler."""
+    db = AsyncPostgRESTAccess("http://postgrest.local")
+    # pylint: disable=protected-access
+    db._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    db._loop = asyncio.get_running_loop()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_async_select_and_update():
+    """The async client issues the same PostgREST requests as the sync one."""
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append(request)
+        return httpx.Response(200, json=[{"uid": "1"}])
+
+    async with _async_db(handler) as db:
+        assert await db.select("data_item", params={"uid": "eq.1"}) == [{"uid": "1"}]
+        assert await db.update("data_item", params={"uid": "eq.1"}, json={"a": 1})
+
+    assert [r.method for r in received] == ["GET", "PATCH"]
+    assert received[0].url.params["uid"] == "eq.1"
+    assert received[1].content == b'{"a":1}'
+
+
+@pytest.mark.asyncio
+async def test_async_delete_without_content():
+    """Deletions answered without a body do not fail."""
+    async with _async_db(lambda request: httpx.Response(204)) as db:
+        assert await db.delete("data_item", params={"uid": "eq.1"}) is None
+
+
+@pytest.mark.asyncio
+async def test_async_query_errors():
+    """Bad requests and conflicts are mapped to the DLM exceptions."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            return httpx.Response(400, json={"message": "bad", "details": "column"})
+        return httpx.Response(409, json={"message": "duplicate key"})
+
+    async with _async_db(handler) as db:
+        with pytest.raises(DBQueryError):
+            await db.select("data_item")
+        with pytest.raises(DatabaseOperationError):
+            await db.insert("data_item", json={"uid": "1"})
+
+
+def test_query_errors(monkeypatch):
+    """The sync client maps bad requests and conflicts like the async one."""
+
+    def request(method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 400 if method == "GET" else 409
+        response.url = url
+        response._content = b'{"message": "bad"}'  # pylint: disable=protected-access
+        return response
+
+    db = PostgRESTAccess("http://postgrest.local")
+    monkeypatch.setattr(db._session, "request", request)  # pylint: disable=protected-access
+
+    with pytest.raises(DBQueryError):
+        db.select("data_item")
+    with pytest.raises(DatabaseOperationError):
+        db.insert("data_item", json={"uid": "1"})
+
+
+def test_keyset_params():
+    """Pages are ordered by the key, which is selected and filtered after the cursor."""
+    params = keyset_params("uid", {"select": "item_name", "uid": "neq.0"}, 10)
+    assert params == {"select": "item_name,uid", "uid": "neq.0", "order": "uid.asc", "limit": 10}
+
+    params = keyset_params("uid", params, 10, encode_cursor("uid", "b"))
+    assert params["uid"] == ["neq.0", "gt.b"]
+
+    with pytest.raises(InvalidQueryParameters):
+        keyset_params("uid", None, 10, "not a cursor")
+    with pytest.raises(InvalidQueryParameters):
+        keyset_params("uid", None, 10, encode_cursor("oid", "b"))
+
+
+def test_iter_select_pages(monkeypatch):
+    """All rows are iterated page by page, following the cursors."""
+    rows = [{"uid": f"{i:04}"} for i in range(25)]
+    queries = []
+
+    def select(_table, *, params):
+        queries.append(params)
+        after = params["uid"][3:] if "uid" in params else ""
+        return [row for row in rows if row["uid"] > after][: params["limit"]]
+
+    db = PostgRESTAccess("http://postgrest.local")
+    monkeypatch.setattr(db, "select", select)
+
+    page, cursor = db.select_page("data_item", key="uid", limit=10)
+    assert page == rows[:10] and cursor
+    assert list(db.iter_select("data_item", key="uid", page_size=10)) == rows
+    assert len(queries) == 4
+
+
+def test_exists_and_count(monkeypatch):
+    """Existence checks fetch one key only, counts use a HEAD request."""
+    calls = []
+
+    def request(method, url, params=None, **kwargs):
+        calls.append((method, params, kwargs.get("headers")))
+        response = requests.Response()
+        response.status_code = 200
+        if method == "HEAD":
+            response.headers["Content-Range"] = "*/42"
+        else:
+            response._content = b"[]"  # pylint: disable=protected-access
+        return response
+
+    db = PostgRESTAccess("http://postgrest.local")
+    monkeypatch.setattr(db._session, "request", request)  # pylint: disable=protected-access
+
+    assert db.exists("data_item", key="uid", params={"oid": "eq.1"}) is False
+    assert db.count("data_item", params={"oid": "eq.1"}) == 42
+    assert calls[0] == ("GET", {"oid": "eq.1", "select": "uid", "limit": 1}, None)
+    assert calls[1][0] == "HEAD"
+    assert calls[1][2] == {"Prefer": "count=exact"}
+
+
+@pytest.mark.asyncio
+async def test_async_exists_and_count():
+    """The async client checks existence and counts without fetching rows."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "HEAD":
+            assert request.headers["Prefer"] == "count=exact"
+            return httpx.Response(200, headers={"Content-Range": "0-0/7"})
+        assert request.url.params["select"] == "uid"
+        return httpx.Response(200, json=[{"uid": "1"}])
+
+    async with _async_db(handler) as db:
+        assert await db.exists("data_item", key="uid") is True
+        assert await db.count("data_item") == 7
@@ -0,0 +1,132 @@
+# pylint: disable=W0212
+"""Deletion executor tests."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from ska_dlm.dlm_storage import DeletionExecutor
+
+
+def _executor(handler, **kwargs) -> DeletionExecutor:
+    executor = DeletionExecutor(["http://rclone.local"], **kwargs)
+    executor._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return executor
+
+
+def test_no_rclone_urls():
+    """An executor without rclone servers can not be created."""
+    with pytest.raises(ValueError):
+        DeletionExecutor([])
+
+
+@pytest.mark.asyncio
+async def test_delete_payloads():
+    """Files are deleted with deletefile, containers with purge, in job order."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path == "/operations/stat":
+            return httpx.Response(200, json={"item": {"Path": "x"}})
+        return httpx.Response(200, json={})
+
+    executor = _executor(handler)
+    results = await executor.delete_payloads(
+        [
+            {"uid": "a", "storage_id": "s1", "volume": "vol:/", "path": "/a"},
+            {
+                "uid": "b",
+                "storage_id": "s1",
+                "volume": "vol:/",
+                "path": "/b",
+                "item_type": "container",
+            },
+        ]
+    )
+
+    assert [r["uid"] for r in results] == ["a", "b"]
+    assert all(r["success"] for r in results)
+    assert calls.count("/operations/stat") == 2
+    assert "/operations/deletefile" in calls
+    assert "/operations/purge" in calls
+
+
+@pytest.mark.asyncio
+async def test_delete_payload_not_accessible():
+    """A payload rclone can not stat is reported as failed and not deleted."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"item": None})
+
+    executor = _executor(handler)
+    result = await executor.delete_payload("a", "s1", "vol:/", "/a")
+
+    assert result["success"] is False
+    assert calls == ["/operations/stat"]
+
+
+@pytest.mark.asyncio
+async def test_delete_payload_request_error():
+    """Transport errors are returned as failed deletions instead of raised."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("boom", request=request)
+
+    executor = _executor(handler)
+    result = await executor.delete_payload("a", "s1", "vol:/", "/a")
+
+    assert result["success"] is False
+    assert "boom" in result["message"]
+
+
+@pytest.mark.asyncio
+async def test_delete_payloads_unexpected_error():
+    """An unexpected error of one job fails that job only."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/operations/stat":
+            return httpx.Response(200, json={"item": {"Path": "x"}})
+        if b"remote=%2Fb" in request.content:
+            raise RuntimeError("unexpected")
+        return httpx.Response(200, json={})
+
+    executor = _executor(handler)
+    results = await executor.delete_payloads(
+        [
+            {"uid": "a", "storage_id": "s1", "volume": "vol:/", "path": "/a"},
+            {"uid": "b", "storage_id": "s1", "volume": "vol:/", "path": "/b"},
+        ]
+    )
+
+    assert [(r["uid"], r["success"]) for r in results] == [("a", True), ("b", False)]
+    assert "unexpected" in results[1]["message"]
+
+
+@pytest.mark.asyncio
+async def test_per_storage_limit():
+    """No more than max_per_storage deletions run on one storage at a time."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        if request.url.path == "/operations/stat":
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"item": {"Path": "x"}})
+        in_flight -= 1
+        return httpx.Response(200, json={})
+
+    executor = _executor(handler, max_workers=8, max_per_storage=2)
+    jobs = [
+        {"uid": str(i), "storage_id": "s1", "volume": "vol:/", "path": f"/{i}"} for i in range(6)
+    ]
+    results = await executor.delete_payloads(jobs)
+
+    assert all(r["success"] for r in results)
+    assert peak == 2
@@ -59,3 +59,39 @@ def test_rclone_remote_check_failure_logs_warning(monkeypatch, caplog):
     assert result is False
     # ensure a warning message was logged indicating inability to reach
     assert any("rclone can not reach" in rec.message for rec in caplog.records)
+
+
+def test_delete_uids_handles_all_pages(monkeypatch):
+    """delete_uids deletes every expired data item, not only the first page."""
+    expired = [{"uid": str(i), "item_type": "file"} for i in range(1500)]
+    deleted = []
+    monkeypatch.setattr(ds, "iter_expired", lambda: iter(expired))
+    monkeypatch.setattr(
+        ds, "delete_data_item_payload", lambda uid, item_type: deleted.append(uid) or True
+    )
+
+    ds.delete_uids()
+
+    assert len(deleted) == 1500
+
+
+def test_delete_data_item_payload_uses_resolved_storage(monkeypatch):
+    """The payload path and rclone volume come from the resolved item storage."""
+    storage = {
+        "uid": "1",
+        "uri": "/item",
+        "storage_id": "s1",
+        "storage_name": "store",
+        "root_directory": "/data",
+        "config": {"name": "store", "root_path": "/"},
+    }
+    deleted = []
+    monkeypatch.setattr(ds, "resolve_item_storage", lambda uid: [storage])
+    monkeypatch.setattr(ds, "rclone_access", lambda volume: True)
+    monkeypatch.setattr(
+        ds, "rclone_delete", lambda volume, path, item_type: deleted.append((volume, path)) or True
+    )
+    monkeypatch.setattr(ds, "set_state", lambda uid, state: None)
+
+    assert ds.delete_data_item_payload("1") is True
+    assert deleted == [("store:/", "/data/item")]
@@ -0,0 +1,131 @@
+# pylint: disable=W0212
+"""Heuristic scheduler tests."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from ska_dlm.dlm_heuristics import scheduler as scheduler_module
+from ska_dlm.dlm_heuristics.heuristics import HeuristicResult
+from ska_dlm.dlm_heuristics.scheduler import HeuristicScheduler, _PrioritySlots
+
+
+@pytest.fixture(name="sessions")
+def sessions_fixture():
+    """Patch the sessions of the scheduler, returning the created sessions."""
+    sessions = []
+
+    def _session(_):
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        session.__aexit__.return_value = False
+        sessions.append(session)
+        return session
+
+    create_session = MagicMock(side_effect=_session)
+    with patch.object(scheduler_module, "create_async_sql_session", create_session):
+        yield sessions
+
+
+def test_register():
+    """Heuristics need a positive interval and a unique name."""
+    scheduler = HeuristicScheduler(None)
+    scheduler.register("a", AsyncMock(), 1)
+    with pytest.raises(ValueError):
+        scheduler.register("a", AsyncMock(), 1)
+    with pytest.raises(ValueError):
+        scheduler.register("b", AsyncMock(), 0)
+
+
+@pytest.mark.asyncio
+async def test_run_once_in_own_session(sessions):
+    """Every run gets its own session, committed on success, and records its runtime."""
+    scheduler = HeuristicScheduler(None)
+    run = AsyncMock(return_value=HeuristicResult(True, "done"))
+    heuristic = scheduler.register("a", run, 10)
+
+    heuristic.active = 1
+    assert (await scheduler.run_once(heuristic)).message == "done"
+    heuristic.active = 1
+    await scheduler.run_once(heuristic)
+
+    assert len(sessions) == 2
+    assert run.await_args_list[0].args[0] is sessions[0]
+    sessions[0].commit.assert_awaited_once()
+    stats = scheduler.stats()["a"]
+    assert stats["runs"] == 2
+    assert stats["failures"] == 0
+    assert stats["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_once_timeout_and_failure(sessions):
+    """Timed out and failed runs are not committed and counted."""
+    scheduler = HeuristicScheduler(None)
+
+    async def _slow(_):
+        await asyncio.sleep(1)
+
+    slow = scheduler.register("slow", _slow, 10, timeout=0.01)
+    failing = scheduler.register("failing", AsyncMock(side_effect=RuntimeError("boom")), 10)
+
+    slow.active = failing.active = 1
+    assert await scheduler.run_once(slow) is None
+    assert await scheduler.run_once(failing) is None
+
+    assert slow.statistics.timeouts == 1
+    assert failing.statistics.failures == 1
+    for session in sessions:
+        session.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_overrunning_heuristic_does_not_starve_others(sessions):
+    """A heuristic running past its interval skips ticks while others keep running."""
+    scheduler = HeuristicScheduler(None)
+    stop_event = asyncio.Event()
+    blocked = asyncio.Event()
+
+    async def _blocking(_):
+        await blocked.wait()
+
+    fast = AsyncMock(return_value=None)
+    slow = scheduler.register("slow", _blocking, 0.01)
+    scheduler.register("fast", fast, 0.01)
+
+    task = asyncio.create_task(scheduler.run(stop_event))
+
+    async def _overrun():
+        while fast.await_count <= 2 or slow.statistics.skipped <= 2:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_overrun(), 5)
+    stop_event.set()
+    await asyncio.wait_for(task, 1)
+
+    assert fast.await_count > 2
+    assert slow.statistics.skipped > 2
+    assert slow.active == 0
+    assert len(sessions) >= fast.await_count + 1
+
+
+@pytest.mark.asyncio
+async def test_priority_slots():
+    """Freed slots go to the waiter with the highest priority."""
+    slots = _PrioritySlots(1)
+    await slots.acquire(0)
+    order = []
+
+    async def _wait(priority):
+        await slots.acquire(priority)
+        order.append(priority)
+        slots.release()
+
+    waiters = [asyncio.create_task(_wait(priority)) for priority in (1, 5, 3)]
+    await asyncio.sleep(0)
+    slots.release()
+    await asyncio.gather(*waiters)
+
+    assert order == [5, 3, 1]
+    assert slots._free == 1
@@ -0,0 +1,112 @@
+"""Heuristic engine replica sharding tests."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from ska_dlm.dlm_db.models import DataItem
+from ska_dlm.dlm_heuristics import dlm_heuristics
+from ska_dlm.dlm_heuristics.heuristics import OidExpiryHeuristic
+from ska_dlm.dlm_heuristics.sharding import OidShard, ReplicaSlot
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_shard_condition():
+    """Shards select OIDs by hash, the first shard also selects items without OID."""
+    with pytest.raises(ValueError):
+        OidShard(3, 3)
+
+    sql = _sql(select(DataItem.UID).where(OidShard(1, 3).where(DataItem.OID)))
+    assert "hashtext(CAST(dlm.data_item.oid AS TEXT))" in sql
+    assert "IS NULL" not in sql
+    assert OidShard(0, 3).is_leader
+    assert "dlm.data_item.oid IS NULL" in _sql(
+        select(DataItem.UID).where(OidShard(0, 3).where(DataItem.OID))
+    )
+
+
+@pytest.mark.asyncio
+async def test_sharded_oid_expiry():
+    """The OID expiry only queries the OIDs of its shard."""
+    session = AsyncMock()
+    session.execute.return_value = MagicMock(fetchall=MagicMock(return_value=[]))
+
+    result = await OidExpiryHeuristic(session, shard=OidShard(2, 4)).execute()
+
+    assert result.success is True
+    assert "hashtext(" in _sql(session.execute.await_args.args[0])
+
+
+def _engine(claims: list[bool]):
+    """Mock an engine whose connection answers the advisory lock attempts."""
+    connection = AsyncMock()
+    connection.execute.side_effect = [
+        MagicMock(scalar_one=MagicMock(return_value=claim)) for claim in claims
+    ]
+    engine = MagicMock()
+    engine.connect = AsyncMock(return_value=connection)
+    return engine, connection
+
+
+@pytest.mark.asyncio
+async def test_replica_slot_claims_first_free_slot():
+    """A replica claims the first slot whose advisory lock is free."""
+    engine, connection = _engine([False, True])
+    slot = ReplicaSlot(engine, 3)
+
+    await slot.refresh()
+
+    assert slot.index == 1
+    assert slot.shard().count == 3
+    assert "pg_try_advisory_lock" in _sql(connection.execute.await_args.args[0])
+
+    await slot.release()
+    assert slot.shard() is None
+    connection.invalidate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_replica_slot_standby_and_lost_connection():
+    """Without free slot the replica stands by, a lost connection drops its slot."""
+    engine, connection = _engine([False, False])
+    slot = ReplicaSlot(engine, 2)
+    await slot.refresh()
+    assert slot.index is None
+
+    slot.index = 0
+    connection.execute.side_effect = ConnectionError("lost")
+    await slot.refresh()
+    assert slot.index is None
+    connection.invalidate.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_without_slot():
+    """Sharded heuristics are skipped without slot and use the shard of the slot."""
+    slot = MagicMock()
+    slot.shard.return_value = None
+    scheduler = dlm_heuristics.create_scheduler(None, slot=slot)
+    uid_expiry = scheduler.heuristics["uid_expiry"]
+    session = AsyncMock()
+
+    with patch.object(dlm_heuristics, "UidExpiryHeuristic") as heuristic:
+        assert await uid_expiry.run(session) is None
+        heuristic.assert_not_called()
+
+        shard = OidShard(1, 2)
+        slot.shard.return_value = shard
+        heuristic.return_value.execute = AsyncMock(return_value=None)
+        await uid_expiry.run(session)
+        assert heuristic.call_args.kwargs["shard"] is shard
+
+    with patch.object(dlm_heuristics, "check_storage_capacity") as check:
+        await scheduler.heuristics["storage_capacity"].run(session)
+        check.assert_not_called()
+        slot.shard.return_value = OidShard(0, 2)
+        await scheduler.heuristics["storage_capacity"].run(session)
+        check.assert_called_once()
@@ -6,23 +6,29 @@
 """Unit tests for DLM heuristics."""
 
 import uuid
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
+import numpy as np
 import pytest
+from sqlalchemy.dialects import postgresql
 
-from ska_dlm.common_types import PhaseType
+from ska_dlm.common_types import ItemState, PhaseType
 from ska_dlm.dlm_heuristics.heuristics import (
     BaseHeuristic,
     ChangeOidPhaseHeuristic,
     CombineUidPhasesHeuristic,
     DecreaseOidPhaseHeuristic,
     DeleteUidHeuristic,
+    ExpiryWatermark,
     HeuristicResult,
     IdentifyTargetStorageHeuristic,
     IncreaseOidPhaseHeuristic,
     OidExpiryHeuristic,
     OidPhaseEnforceHeuristic,
+    OidPhaseSweepHeuristic,
     UidExpiryHeuristic,
+    _UidDeletion,
 )
 from ska_dlm.dlm_storage import dlm_storage_requests
 
@@ -147,6 +153,30 @@ class TestCombineUidPhasesHeuristic:
         assert result.success is True
         assert result.data == {"actual_phase": PhaseType.GAS}
 
+    @pytest.mark.asyncio
+    async def test_combine_batch_matches_execute(self, heuristic):
+        """Test the batch API combines every OID like execute."""
+        oids = [
+            [PhaseType.LIQUID],
+            [PhaseType.GAS, PhaseType.LIQUID],
+            [PhaseType.GAS, PhaseType.GAS],
+            [PhaseType.LIQUID, PhaseType.LIQUID, PhaseType.SOLID],
+            [PhaseType.PLASMA, PhaseType.GAS],
+        ]
+        oid_index = np.array([i for i, phases in enumerate(oids) for _ in phases])
+        codes = heuristic.encode_phases([phase for phases in oids for phase in phases])
+
+        combined = heuristic.decode_phases(heuristic.combine_batch(oid_index, codes))
+
+        for phases, phase in zip(oids, combined):
+            assert (await heuristic.execute(phases)).data == {"actual_phase": phase}
+
+    def test_combine_batch_oids_without_uids(self, heuristic):
+        """Test OIDs without UIDs combine to PLASMA."""
+        codes = heuristic.combine_batch(np.array([1]), heuristic.encode_phases(["GAS"]), 3)
+        phases = heuristic.decode_phases(codes)
+        assert phases == [PhaseType.PLASMA, PhaseType.GAS, PhaseType.PLASMA]
+
 
 class TestIncreaseOidPhaseHeuristic:
     """Test IncreaseOidPhaseHeuristic class."""
@@ -749,6 +779,318 @@ class TestUidExpiryHeuristic:
         assert result.data["deletion_results"][1]["success"] is False
 
 
+class TestUidExpiryHeuristicBatched:
+    """Test the batched mode of the UidExpiryHeuristic class."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async session."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def heuristic(self, mock_session):
+        """Create batched UidExpiryHeuristic instance."""
+        return UidExpiryHeuristic(mock_session, batch_size=10)
+
+    @staticmethod
+    def _expired_row(uid, oid, storage_id, target_phase=PhaseType.GAS, item_state="READY"):
+        row = MagicMock()
+        row.UID = uid
+        row.OID = oid
+        row.storage_id = storage_id
+        row.target_phase = target_phase
+        row.item_state = item_state
+        row.item_type = "file"
+        row.item_name = f"item-{uid}"
+        return row
+
+    @pytest.mark.asyncio
+    async def test_no_expired_uids(self, heuristic, mock_session):
+        """Test when there are no expired UIDs to process."""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_session.execute.return_value = mock_result
+
+        result = await heuristic.execute()
+
+        assert result.success is True
+        assert result.message == "No expired UIDs found"
+        mock_session.commit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_batch_deletes_expired_uids(self, heuristic, mock_session, monkeypatch):
+        """Expired replicas of one OID are deleted while the remaining one keeps GAS."""
+        oid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2, uid3 = sorted([uuid.uuid4(), uuid.uuid4(), uuid.uuid4()])
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [
+            self._expired_row(uid1, oid, storage_id),
+            self._expired_row(uid2, oid, storage_id),
+        ]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [
+            (oid, uid1, PhaseType.GAS),
+            (oid, uid2, PhaseType.GAS),
+            (oid, uid3, PhaseType.GAS),
+        ]
+        mock_session.execute.side_effect = [
+            batch_result,
+            sibling_result,
+            MagicMock(),  # multi-row UID update
+            MagicMock(),  # OID phase update
+        ]
+
+        access_check = MagicMock(return_value=True)
+        delete_payload = MagicMock(return_value=True)
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            access_check,
+        )
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            delete_payload,
+        )
+        result = await heuristic.execute()
+
+        assert result.data["expired_uids"] == [uid1, uid2]
+        assert [r["success"] for r in result.data["deletion_results"]] == [True, True]
+        # storage access is checked once per storage, not once per UID
+        access_check.assert_called_once_with(storage_id=str(storage_id))
+        assert delete_payload.call_count == 2
+        assert mock_session.execute.call_count == 4
+        mock_session.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_deletion_error(self, heuristic, mock_session, monkeypatch):
+        """A failing payload deletion does not lose the flags of the successful ones."""
+        oid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2, uid3 = sorted([uuid.uuid4(), uuid.uuid4(), uuid.uuid4()])
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [
+            self._expired_row(uid1, oid, storage_id),
+            self._expired_row(uid2, oid, storage_id),
+        ]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [
+            (oid, uid1, PhaseType.GAS),
+            (oid, uid2, PhaseType.GAS),
+            (oid, uid3, PhaseType.GAS),
+        ]
+        mock_session.execute.side_effect = [
+            batch_result,
+            sibling_result,
+            MagicMock(),  # multi-row UID update
+            MagicMock(),  # OID phase update
+        ]
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            lambda **kwargs: True,
+        )
+
+        def _delete(uid, **_kwargs):
+            if uid == str(uid1):
+                raise ConnectionError("rclone unreachable")
+            return True
+
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            _delete,
+        )
+
+        result = await heuristic.execute()
+
+        assert [r["success"] for r in result.data["deletion_results"]] == [False, True]
+        uid_update = mock_session.execute.await_args_list[2].args[0]
+        assert uid_update.compile().params["uid_1"] == [uid2]
+        mock_session.commit.assert_called_once()
+        mock_session.rollback.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_batch_update_error_commits_flags(self, heuristic, mock_session, monkeypatch):
+        """The DELETED flags are committed even if the OID phase update fails."""
+        oid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2 = sorted([uuid.uuid4(), uuid.uuid4()])
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [self._expired_row(uid1, oid, storage_id)]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [
+            (oid, uid1, PhaseType.GAS),
+            (oid, uid2, PhaseType.GAS),
+        ]
+        mock_session.execute.side_effect = [
+            batch_result,
+            sibling_result,
+            MagicMock(),  # multi-row UID update
+            RuntimeError("connection lost"),  # OID phase update
+            MagicMock(),  # multi-row UID update, flags only
+        ]
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            lambda **kwargs: True,
+        )
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            MagicMock(return_value=True),
+        )
+
+        result = await heuristic.execute()
+
+        assert result.success is False
+        assert "connection lost" in result.message
+        flags_update = mock_session.execute.await_args_list[4].args[0]
+        assert flags_update.compile().params["uid_1"] == [uid1]
+        mock_session.commit.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_resilience_violation(self, heuristic, mock_session, monkeypatch):
+        """Deleting the second to last replica is rejected within the same batch."""
+        oid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2 = sorted([uuid.uuid4(), uuid.uuid4()])
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [
+            self._expired_row(uid1, oid, storage_id, target_phase=PhaseType.LIQUID),
+            self._expired_row(uid2, oid, storage_id, target_phase=PhaseType.LIQUID),
+        ]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [
+            (oid, uid1, PhaseType.LIQUID),
+            (oid, uid2, PhaseType.LIQUID),
+        ]
+        mock_session.execute.side_effect = [
+            batch_result,
+            sibling_result,
+            MagicMock(),
+            MagicMock(),
+        ]
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            lambda **kwargs: True,
+        )
+        delete_payload = MagicMock(return_value=True)
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            delete_payload,
+        )
+
+        result = await heuristic.execute()
+
+        assert result.success is False
+        assert result.message == "Some expired UID deletions failed"
+        deletion_results = result.data["deletion_results"]
+        assert deletion_results[0]["success"] is True
+        assert deletion_results[1]["success"] is False
+        assert deletion_results[1]["message"] == "Deletion would violate resilience policy"
+        delete_payload.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_batch_inaccessible_storage(self, heuristic, mock_session, monkeypatch):
+        """UIDs on an inaccessible storage are neither deleted nor marked deleted."""
+        oid = uuid.uuid4()
+        uid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [self._expired_row(uid, oid, storage_id)]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [(oid, uid, PhaseType.GAS)]
+        mock_session.execute.side_effect = [batch_result, sibling_result]
+
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            lambda **kwargs: False,
+        )
+        delete_payload = MagicMock(side_effect=AssertionError("delete should not be attempted"))
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            delete_payload,
+        )
+
+        result = await heuristic.execute()
+
+        assert result.success is False
+        assert "not accessible" in result.data["deletion_results"][0]["message"]
+        assert mock_session.execute.call_count == 2
+        delete_payload.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_batch_skips_initialised_items(self, heuristic, mock_session):
+        """Expired items which are not READY, e.g. in-flight copies, are not selected."""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = []
+        mock_session.execute.return_value = mock_result
+
+        await heuristic.execute()
+
+        statement = mock_session.execute.await_args_list[0].args[0]
+        compiled = statement.compile(dialect=postgresql.dialect())
+        assert "dlm.data_item.item_state IN" in str(compiled)
+        states = [value for value in compiled.params.values() if isinstance(value, list)]
+        assert states == [[ItemState.READY, ItemState.DELETED]]
+
+    @pytest.mark.asyncio
+    async def test_batch_deletes_with_executor(self, mock_session, monkeypatch):
+        """Approved deletions of a batch are handed to the executor in one call."""
+        oid = uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2, uid3 = sorted([uuid.uuid4(), uuid.uuid4(), uuid.uuid4()])
+
+        batch_result = MagicMock()
+        batch_result.fetchall.return_value = [
+            self._expired_row(uid1, oid, storage_id),
+            self._expired_row(uid2, oid, storage_id),
+        ]
+        sibling_result = MagicMock()
+        sibling_result.fetchall.return_value = [
+            (oid, uid1, PhaseType.GAS),
+            (oid, uid2, PhaseType.GAS),
+            (oid, uid3, PhaseType.GAS),
+        ]
+        jobs_result = MagicMock()
+        jobs_result.fetchall.return_value = [
+            (uid, storage_id, f"file-{uid}", "/data", {"name": "vol"}) for uid in (uid1, uid2)
+        ]
+        mock_session.execute.side_effect = [
+            batch_result,
+            sibling_result,
+            jobs_result,
+            MagicMock(),  # multi-row UID update
+            MagicMock(),  # OID phase update
+        ]
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.check_storage_access",
+            lambda **kwargs: True,
+        )
+        monkeypatch.setattr(
+            "ska_dlm.dlm_heuristics.heuristics.dlm_storage_requests.delete_data_item_payload",
+            MagicMock(side_effect=AssertionError("synchronous delete should not be used")),
+        )
+        executor = MagicMock()
+        executor.delete_payloads = AsyncMock(
+            return_value=[
+                {"uid": str(uid1), "success": True, "message": ""},
+                {"uid": str(uid2), "success": False, "message": "rclone request failed"},
+            ]
+        )
+        heuristic = UidExpiryHeuristic(mock_session, batch_size=10, executor=executor)
+
+        result = await heuristic.execute()
+
+        jobs = executor.delete_payloads.await_args.args[0]
+        assert [job["uid"] for job in jobs] == [str(uid1), str(uid2)]
+        assert jobs[0]["volume"] == "vol:/"
+        assert jobs[0]["path"] == f"/data/file-{uid1}"
+        assert [r["success"] for r in result.data["deletion_results"]] == [True, False]
+        assert mock_session.execute.call_count == 5
+
+
 class TestOidExpiryHeuristic:
     """Test OidExpiryHeuristic class."""
 
@@ -842,6 +1184,93 @@ class TestOidExpiryHeuristic:
         assert result.data["deletion_results"][0]["success"] is False
 
 
+class TestExpiryWatermark:
+    """Test incremental expiry scans with ExpiryWatermark."""
+
+    @staticmethod
+    def _sql(session) -> str:
+        stmt = session.execute.await_args_list[0].args[0]
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+    def test_start_rescans(self, monkeypatch):
+        """Test a scan continues from the watermark until a rescan is due."""
+        clock = MagicMock(return_value=0.0)
+        monkeypatch.setattr("ska_dlm.dlm_heuristics.heuristics.time.monotonic", clock)
+        watermark = ExpiryWatermark(rescan_interval=60)
+        position = (datetime(2026, 1, 1), uuid.uuid4())
+
+        assert watermark.start() is None
+        watermark.advance(*position)
+        clock.return_value = 30.0
+        assert watermark.start() == position
+        assert watermark.start(scope=1) is None
+        watermark.advance(*position)
+        clock.return_value = 90.0
+        assert watermark.start(scope=1) is None
+
+    @pytest.mark.asyncio
+    async def test_uid_expiry_scans_after_watermark(self):
+        """Test the UID expiry only scans UIDs expired after the previous run."""
+        watermark = ExpiryWatermark()
+        uid = uuid.uuid4()
+        expiration = datetime(2026, 1, 1)
+        session = AsyncMock()
+        session.execute.return_value = MagicMock(fetchall=MagicMock(return_value=[]))
+        heuristic = UidExpiryHeuristic(session, watermark=watermark)
+
+        await heuristic.execute()
+        assert "ORDER BY dlm.data_item.uid_expiration, dlm.data_item.uid" in self._sql(session)
+        assert "(dlm.data_item.uid_expiration, dlm.data_item.uid) >" not in self._sql(session)
+
+        watermark.advance(expiration, uid)
+        session.execute.reset_mock()
+        await heuristic.execute()
+        assert "(dlm.data_item.uid_expiration, dlm.data_item.uid) >" in self._sql(session)
+
+    @pytest.mark.asyncio
+    async def test_uid_expiry_advances_watermark_after_deletions(self):
+        """Test the UID expiry advances after its deletions, up to the first failed one."""
+        watermark = ExpiryWatermark()
+        uids = [uuid.uuid4() for _ in range(3)]
+        expirations = [datetime(2026, 1, day) for day in (1, 2, 3)]
+        session = AsyncMock()
+        session.execute.return_value = MagicMock(
+            fetchall=MagicMock(return_value=list(zip(uids, expirations)))
+        )
+        delete_heuristic = MagicMock()
+
+        async def _execute_many(_uids):
+            assert watermark.position is None
+            return [HeuristicResult(success, "") for success in (True, False, True)]
+
+        delete_heuristic.execute_many = _execute_many
+        heuristic = UidExpiryHeuristic(session, watermark=watermark)
+        heuristic.delete_heuristic = delete_heuristic
+
+        result = await heuristic.execute()
+
+        assert not result.success
+        assert watermark.position == (expirations[0], uids[0])
+
+    @pytest.mark.asyncio
+    async def test_oid_expiry_advances_watermark(self):
+        """Test the OID expiry records the last expired OID it handled."""
+        watermark = ExpiryWatermark()
+        oid = uuid.uuid4()
+        expiration = datetime(2026, 1, 1)
+        session = AsyncMock()
+        session.execute.side_effect = [
+            MagicMock(fetchall=MagicMock(return_value=[(oid, expiration)])),
+            MagicMock(fetchall=MagicMock(return_value=[])),
+        ]
+
+        result = await OidExpiryHeuristic(session, watermark=watermark).execute()
+
+        assert result.data["expired_oids"] == [oid]
+        assert watermark.position == (expiration, oid)
+        assert "ORDER BY dlm.data_item.oid_expiration, dlm.data_item.oid" in self._sql(session)
+
+
 class TestOidPhaseEnforceHeuristic:
     """Test OidPhaseEnforceHeuristic class."""
 
@@ -1052,6 +1481,84 @@ class TestOidPhaseEnforceHeuristic:
         mock_session.rollback.assert_called_once()
 
 
+class TestOidPhaseSweepHeuristic:
+    """Test OidPhaseSweepHeuristic class."""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock async session."""
+        return AsyncMock()
+
+    @pytest.fixture
+    def heuristic(self, mock_session):
+        """Create OidPhaseSweepHeuristic instance."""
+        return OidPhaseSweepHeuristic(mock_session)
+
+    @staticmethod
+    def _rows(*rows):
+        """Mock the result of the grouped phase query."""
+        mock_result = MagicMock()
+        mock_result.fetchall.return_value = [
+            MagicMock(OID=oid, actual_order=actual, target_order=target)
+            for oid, actual, target in rows
+        ]
+        return mock_result
+
+    @pytest.mark.asyncio
+    async def test_all_consistent(self, heuristic, mock_session):
+        """Test one grouped query when all OIDs are consistent."""
+        mock_session.execute.return_value = self._rows()
+
+        result = await heuristic.execute()
+
+        assert result.success is True
+        assert result.message == "All OID phases are consistent"
+        mock_session.execute.assert_awaited_once()
+        sql = str(mock_session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "GROUP BY dlm.data_item.oid" in sql
+        assert "sum(CASE dlm.storage.storage_phase" in sql
+
+    @pytest.mark.asyncio
+    async def test_dispatch_inconsistent_oids(self, heuristic, mock_session):
+        """Test only inconsistent OIDs are changed and stale OID phases updated in bulk."""
+        stale, low, high = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        mock_session.execute.side_effect = [
+            self._rows((stale, 2, 2), (low, 1, 4), (high, 4, 0)),
+            MagicMock(),
+        ]
+        heuristic.increase_heuristic.execute = AsyncMock(
+            return_value=BaseHeuristic.success_result("Increased")
+        )
+        heuristic.decrease_heuristic.execute = AsyncMock(
+            return_value=BaseHeuristic.success_result("Decreased")
+        )
+
+        result = await heuristic.execute()
+
+        assert result.success is True
+        assert result.data["updated_oids"] == [stale]
+        assert [change["oid"] for change in result.data["changes"]] == [low, high]
+        heuristic.increase_heuristic.execute.assert_awaited_once_with(
+            low, PhaseType.GAS, PhaseType.SOLID
+        )
+        heuristic.decrease_heuristic.execute.assert_awaited_once_with(
+            high, PhaseType.SOLID, PhaseType.PLASMA
+        )
+        assert mock_session.execute.await_count == 2
+        mock_session.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_exception_handling(self, heuristic, mock_session):
+        """Test rollback when the grouped query fails."""
+        mock_session.execute.side_effect = Exception("Database error")
+
+        result = await heuristic.execute()
+
+        assert result.success is False
+        assert "Database error" in result.message
+        mock_session.rollback.assert_awaited_once()
+
+
 class TestDeleteUidHeuristic:
     """Test DeleteUidHeuristic class."""
 
@@ -1186,6 +1693,46 @@ class TestDeleteUidHeuristic:
         assert "Failed to delete payload" in result.message
         mock_session.commit.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_execute_many_with_executor(self, mock_session):
+        """Payloads are deleted concurrently, one deletion per OID at a time."""
+        oid1, oid2 = uuid.uuid4(), uuid.uuid4()
+        storage_id = uuid.uuid4()
+        uid1, uid2, uid3 = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        oids = {uid1: oid1, uid2: oid1, uid3: oid2}
+
+        def _jobs_result(uids):
+            result = MagicMock()
+            result.fetchall.return_value = [
+                (uid, storage_id, f"file-{uid}", "/data", {"name": "vol"}) for uid in uids
+            ]
+            return result
+
+        mock_session.execute.side_effect = [_jobs_result([uid1, uid3]), _jobs_result([uid2])]
+        executor = MagicMock()
+        executor.delete_payloads = AsyncMock(
+            side_effect=lambda jobs: [
+                {"uid": job["uid"], "success": job["uid"] != str(uid3), "message": ""}
+                for job in jobs
+            ]
+        )
+        heuristic = DeleteUidHeuristic(mock_session, executor=executor)
+        heuristic._plan_deletion = AsyncMock(
+            side_effect=lambda uid: _UidDeletion(uid, oids[uid], MagicMock(), PhaseType.GAS)
+        )
+        heuristic._finish_deletion = AsyncMock(
+            side_effect=lambda deletion, success: HeuristicResult(success, str(deletion.uid))
+        )
+
+        results = await heuristic.execute_many([uid1, uid2, uid3])
+
+        assert [r.success for r in results] == [True, True, False]
+        rounds = [call.args[0] for call in executor.delete_payloads.await_args_list]
+        assert [[job["uid"] for job in jobs] for jobs in rounds] == [
+            [str(uid1), str(uid3)],
+            [str(uid2)],
+        ]
+
     @pytest.mark.asyncio
     async def test_inaccessible_storage_does_not_mark_uid_deleted(
         self, heuristic, mock_session, monkeypatch
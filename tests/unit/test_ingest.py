@@ -5,9 +5,12 @@ import uuid
 from datetime import datetime
 
 import pytest
+from fastapi.testclient import TestClient
 from pytest_mock import MockerFixture
 
 from ska_dlm import dlm_ingest
+from ska_dlm.dlm_db.db_access import DBQueryError
+from ska_dlm.dlm_ingest import dlm_ingest_requests
 from ska_dlm.exceptions import UnmetPreconditionForOperation, ValueAlreadyInDB
 
 
@@ -44,30 +47,25 @@ def fixture_mock_query_data_item(mocker: MockerFixture):
     )
 
 
-@pytest.fixture(name="mock_init_data_item")
-def fixture_mock_init_data_item(mocker: MockerFixture):
-    """Fixture for mocking init_data_item."""
-    return mocker.patch(
-        "ska_dlm.dlm_ingest.dlm_ingest_requests.init_data_item", return_value="test-uid"
-    )
-
+@pytest.fixture(name="mock_db")
+def fixture_mock_db(mocker: MockerFixture):
+    """Fixture for mocking the PostgREST access of dlm_ingest_requests."""
+    mock_db = mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.DB")
+    mock_db.insert.side_effect = lambda table, json, **kwargs: [json]
+    return mock_db
 
-@pytest.fixture(name="mock_update_data_item")
-def fixture_mock_update_data_item(mocker: MockerFixture):
-    """Fixture for mocking update_data_item."""
-    return mocker.patch("ska_dlm.data_item.data_item_requests.update_data_item")
 
-
-def test_register_data_item(caplog, mock_init_data_item, mock_update_data_item):
+def test_register_data_item(caplog, mocker: MockerFixture, mock_db):
     """Test the registration of a data item with provided client metadata."""
     caplog.set_level(logging.INFO)
+    mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.query_data_item", return_value=[])
 
     metadata = {"execution_block": "eb123"}  # Client-provided metadata
     item_name = "test-item"
     uri = "test-uri"
     oid_expiration = datetime(2099, 12, 31, 23, 59, 59)
 
-    dlm_ingest.register_data_item(
+    uid = dlm_ingest.register_data_item(
         metadata=metadata, item_name=item_name, uri=uri, oid_expiration=oid_expiration
     )
 
@@ -78,14 +76,15 @@ def test_register_data_item(caplog, mock_init_data_item, mock_update_data_item):
             "ERROR",
         ], f"Unexpected log level {record.levelname}: {record.message}"
 
-    assert mock_init_data_item.call_count == 1
-    assert mock_update_data_item.call_count > 1
-    mock_update_data_item.assert_any_call(
-        uid="test-uid",
-        post_data={
-            "metadata": {"execution_block": "eb123", "uid": "test-uid", "item_name": "test-item"}
-        },
-    )
+    # the complete READY row is written with a single insert and no updates
+    assert mock_db.insert.call_count == 1
+    mock_db.update.assert_not_called()
+    row = mock_db.insert.call_args.kwargs["json"]
+    assert row["uid"] == uid
+    assert row["uri"] == uri
+    assert row["item_state"] == "READY"
+    assert row["oid_expiration"] == oid_expiration
+    assert row["metadata"] == {"execution_block": "eb123", "uid": uid, "item_name": "test-item"}
 
 
 def test_register_data_item_no_rclone_access(
@@ -115,3 +114,89 @@ def test_register_data_item_no_rclone_access(
     # Assert that the check_storage_access mock was called
     assert mock_storage_rclone_access_false.call_count == 1
     assert mock_query_data_item.call_count == 1
+
+
+def test_register_data_items(mocker: MockerFixture):
+    """Bulk registration checks existence once and inserts the new rows in one statement."""
+    mock_db = mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.DB")
+    mock_db.select.return_value = [{"item_name": "b"}]
+
+    results = dlm_ingest.register_data_items(
+        items=[
+            {"item_name": "a", "uri": "a.ms", "metadata": {"eb": "eb1"}},
+            {"item_name": "b", "uri": "b.ms"},
+            {"item_name": "c"},
+            {"item_name": "a", "uri": "a2.ms"},
+            {"item_name": "d", "uri": "d.ms", "item_type": "container"},
+        ]
+    )
+
+    assert [r["item_name"] for r in results] == ["a", "b", "c", "a", "d"]
+    assert results[0]["uid"] and results[4]["uid"]
+    assert "already registered" in results[1]["error"]
+    assert results[2]["error"] == "item_name and uri are required"
+    assert results[3]["error"] == "Duplicate item in request: a"
+
+    assert mock_db.select.call_count == 1
+    assert mock_db.select.call_args.kwargs["params"]["item_name"] == 'in.("a","b","d")'
+    assert mock_db.insert.call_count == 1
+    rows = mock_db.insert.call_args.kwargs["json"]
+    assert [row["item_name"] for row in rows] == ["a", "d"]
+    assert rows[0]["uid"] == results[0]["uid"]
+    assert rows[0]["item_state"] == "READY"
+    assert rows[0]["uri"] == "a.ms"
+    assert rows[0]["metadata"] == {"eb": "eb1", "uid": results[0]["uid"], "item_name": "a"}
+
+
+def test_register_data_items_ndjson(mocker: MockerFixture):
+    """The bulk REST endpoint accepts NDJSON request bodies."""
+    mock_db = mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.DB")
+    mock_db.select.return_value = []
+    client = TestClient(dlm_ingest_requests.rest)
+
+    response = client.post(
+        "/ingest/register_data_items",
+        content=b'{"item_name": "a", "uri": "a.ms"}\n{"item_name": "b", "uri": "b.ms"}\n',
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert [r["item_name"] for r in response.json()] == ["a", "b"]
+    assert all(r["error"] is None for r in response.json())
+
+
+def test_register_data_items_insert_fallback(mocker: MockerFixture):
+    """A rejected multi-row insert is retried row by row, failing only the invalid rows."""
+    mock_db = mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.DB")
+    mock_db.select.return_value = []
+
+    def insert(_table, *, json, params=None):
+        if isinstance(json, list) or json["item_name"] == "b":
+            raise DBQueryError(url="", method="POST", params=params, json=None)
+        return [json]
+
+    mock_db.insert.side_effect = insert
+
+    results = dlm_ingest.register_data_items(
+        items=[{"item_name": name, "uri": f"{name}.ms"} for name in ("a", "b", "c")]
+    )
+
+    assert [r["uid"] is not None for r in results] == [True, False, True]
+    assert results[1]["error"].startswith("DBQueryError")
+    assert mock_db.insert.call_count == 4
+
+
+def test_register_data_items_invalid_ndjson(mocker: MockerFixture):
+    """A malformed NDJSON line is rejected naming the line."""
+    mock_db = mocker.patch("ska_dlm.dlm_ingest.dlm_ingest_requests.DB")
+    client = TestClient(dlm_ingest_requests.rest)
+
+    response = client.post(
+        "/ingest/register_data_items",
+        content=b'{"item_name": "a", "uri": "a.ms"}\n\n{"item_name": "b",\n',
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 422
+    assert "line 3" in response.json()["message"]
+    mock_db.insert.assert_not_called()
@@ -0,0 +1,572 @@
+# pylint: disable=W0212
+"""Unit tests for the migration manager rclone polling, scheduling and queue."""
+
+import asyncio
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from ska_dlm.common_types import MigrationState
+from ska_dlm.dlm_db import Migration
+from ska_dlm.dlm_db.db_access import DBQueryError
+from ska_dlm.dlm_migration import bulk_copy, dlm_migration_requests, status_poller
+from ska_dlm.dlm_migration.queue import MigrationQueue
+from ska_dlm.dlm_migration.scheduler import RcloneScheduler, SchedulingPolicy
+from ska_dlm.dlm_migration.status_poller import RcloneStatusPoller
+from ska_dlm.exceptions import UnmetPreconditionForOperation
+
+
+def _poller(handler, **kwargs) -> RcloneStatusPoller:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return RcloneStatusPoller(client, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_poll_jobs():
+    """Status and stats of every job are returned in job order."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/job/status":
+            job_id = int(request.content.decode().split("=")[1])
+            return httpx.Response(200, json={"group": f"job/{job_id}", "finished": True})
+        return httpx.Response(200, json={"bytes": 1, "group": request.content.decode()})
+
+    poller = _poller(handler)
+    results = await poller.poll_jobs([("http://rclone0", 1), ("http://rclone1", 2)])
+
+    assert [status["group"] for status, _ in results] == ["job/1", "job/2"]
+    assert results[1][1]["group"] == "group=job%2F2"
+
+
+@pytest.mark.asyncio
+async def test_poll_job_failures_are_tolerated():
+    """A hanging or failing rclone only fails its own jobs."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow":
+            await asyncio.sleep(1)
+        if request.url.host == "broken":
+            return httpx.Response(500)
+        if request.url.path == "/job/status":
+            return httpx.Response(200, json={"group": "job/1"})
+        return httpx.Response(200, json={})
+
+    poller = _poller(handler, timeout=0.05)
+    results = await poller.poll_jobs(
+        [("http://slow", 1), ("http://broken", 2), ("http://rclone", 3)]
+    )
+
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2] == ({"group": "job/1"}, {})
+
+
+@pytest.mark.asyncio
+async def test_poll_concurrency_per_url():
+    """No more than max_per_url jobs are polled at once on one rclone URL."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        if request.url.path == "/job/status":
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"group": "g"})
+        in_flight -= 1
+        return httpx.Response(200, json={})
+
+    poller = _poller(handler, max_per_url=3)
+    results = await poller.poll_jobs([("http://rclone", job_id) for job_id in range(10)])
+
+    assert all(results)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_poll_changed_jobs():
+    """Only new, finished or unlisted jobs are polled after one job/list per instance."""
+    paths = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append((request.url.host, request.url.path, request.content.decode()))
+        if request.url.path == "/job/list":
+            return httpx.Response(200, json={"jobids": [1, 2, 3], "runningIds": [1, 2]})
+        if request.url.path == "/job/status":
+            return httpx.Response(200, json={"group": "g", "finished": True})
+        return httpx.Response(200, json={})
+
+    poller = _poller(handler)
+    results = await poller.poll_changed_jobs(
+        [
+            ("http://rclone", 1, True),  # running, polled before: skipped
+            ("http://rclone", 2, False),  # running, never polled
+            ("http://rclone", 3, True),  # finished
+            ("http://rclone", 4, True),  # no longer listed
+        ]
+    )
+
+    assert results[0] is None
+    assert all(results[1:])
+    assert [path for _, path, _ in paths].count("/job/list") == 1
+    polled = {content for _, path, content in paths if path == "/job/status"}
+    assert polled == {"jobid=2", "jobid=3", "jobid=4"}
+
+
+URLS = ["http://rclone0", "http://rclone1", "http://rclone2"]
+
+
+def _session(outstanding: dict) -> AsyncMock:
+    """Session returning the outstanding migrations per rclone URL."""
+    result = MagicMock()
+    result.all.return_value = list(outstanding.items())
+    session = AsyncMock()
+    session.execute.return_value = result
+    return session
+
+
+def test_select_least_loaded():
+    """The instance with the fewest jobs is selected, ties broken by throughput."""
+    scheduler = RcloneScheduler(URLS)
+    scheduler.record_stats("http://rclone2", {"speed": 100.0})
+
+    active = Counter({"http://rclone0": 2, "http://rclone1": 1})
+    assert scheduler.select(active) == "http://rclone2"
+    assert scheduler.select(Counter({"http://rclone0": 2})) == "http://rclone2"
+
+
+def test_select_weighted_and_capped():
+    """Weights scale the load and instances at their cap are skipped."""
+    scheduler = RcloneScheduler(
+        URLS,
+        policy=SchedulingPolicy.WEIGHTED,
+        max_jobs_per_instance=4,
+        weights={"http://rclone0": 4.0},
+    )
+    active = Counter({"http://rclone0": 2, "http://rclone1": 1, "http://rclone2": 4})
+
+    assert scheduler.select(active) == "http://rclone0"
+    active["http://rclone0"] = 4
+    assert scheduler.select(active) == "http://rclone1"
+    active["http://rclone1"] = 4
+    assert scheduler.select(active) is None
+
+
+def test_select_locality():
+    """Instances close to the source and destination storages are preferred."""
+    scheduler = RcloneScheduler(
+        URLS,
+        policy=SchedulingPolicy.LOCALITY,
+        affinity={"http://rclone1": ["src"], "http://rclone2": ["src", "dst"]},
+    )
+    active = Counter({"http://rclone2": 5})
+
+    assert scheduler.select(active, {"src"}, {"dst"}) == "http://rclone2"
+    assert scheduler.select(active, {"src"}, {"other"}) == "http://rclone1"
+    assert scheduler.select(active, {"other"}, {"other"}) in URLS[:2]
+
+
+def test_scheduler_per_event_loop():
+    """Every event loop gets its own scheduler, bound to that loop."""
+
+    async def schedulers():
+        return dlm_migration_requests.get_scheduler(), dlm_migration_requests.get_scheduler()
+
+    first, again = asyncio.run(schedulers())
+    second, _ = asyncio.run(schedulers())
+
+    assert first is again
+    assert first is not second
+
+
+@pytest.mark.asyncio
+async def test_reserve_queues_at_capacity():
+    """A copy waits while all instances are at capacity and is rejected on timeout."""
+    scheduler = RcloneScheduler(URLS[:1], max_jobs_per_instance=1, queue_timeout=0.1)
+    session = _session({})
+
+    async with scheduler.reserve(session) as url:
+        assert url == "http://rclone0"
+        with pytest.raises(UnmetPreconditionForOperation):
+            async with scheduler.reserve(session):
+                pass
+
+    # the released reservation wakes up a queued copy
+    scheduler.settings.queue_timeout = 5
+    queued = scheduler.reserve(session)
+    async with scheduler.reserve(session):
+        waiting = asyncio.create_task(queued.__aenter__())  # pylint: disable=no-member
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+    assert await asyncio.wait_for(waiting, 1) == "http://rclone0"
+    await queued.__aexit__(None, None, None)  # pylint: disable=no-member
+
+
+@pytest.mark.asyncio
+async def test_reserve_counts_outside_lock():
+    """A slow count of the outstanding jobs does not block other reservations."""
+    scheduler = RcloneScheduler(URLS[:1])
+    counted = asyncio.Event()
+    session = _session({})
+    slow_session = _session({})
+    result = session.execute.return_value
+
+    async def slow_execute(*_args):
+        await counted.wait()
+        return result
+
+    slow_session.execute.side_effect = slow_execute
+    slow = asyncio.create_task(
+        scheduler.reserve(slow_session).__aenter__()  # pylint: disable=no-member
+    )
+    await asyncio.sleep(0.01)
+
+    reservation = scheduler.reserve(session)
+    # pylint: disable-next=no-member
+    assert await asyncio.wait_for(reservation.__aenter__(), 1) == "http://rclone0"
+    await reservation.__aexit__(None, None, None)  # pylint: disable=no-member
+    assert not slow.done()
+    counted.set()
+    assert await asyncio.wait_for(slow, 1) == "http://rclone0"
+
+
+def _queued(migration_id: int, source: str = "src", destination: str = "dst") -> Migration:
+    return Migration(
+        migration_id=migration_id,
+        oid="00000000-0000-0000-0000-000000000000",
+        source_storage_id=source,
+        destination_storage_id=destination,
+        state=MigrationState.QUEUED.value,
+        request={"uid": f"uid{migration_id}", "rclone": {"src_fs": "a", "dst_fs": "b"}},
+    )
+
+
+def _queue_session(pairs: dict, queued: list[Migration], instances: dict) -> AsyncMock:
+    """Session returning the active storage pairs, queued rows and rclone jobs."""
+    pair_result = MagicMock()
+    pair_result.all.return_value = [(*pair, count) for pair, count in pairs.items()]
+    queued_result = MagicMock()
+    queued_result.scalars.return_value.all.return_value = queued
+    instance_result = MagicMock()
+    instance_result.all.return_value = list(instances.items())
+    session = AsyncMock()
+    session.add = MagicMock()
+    session.execute.side_effect = [pair_result, queued_result, instance_result]
+    return session
+
+
+@pytest.mark.asyncio
+async def test_admit_storage_pair_and_global_limits():
+    """Queued migrations are admitted in order under the pair and global limits."""
+    queue = MigrationQueue(max_active=4, max_per_storage_pair=2)
+    queued = [_queued(1), _queued(2), _queued(3), _queued(4, source="other")]
+    session = _queue_session({("src", "dst"): 1, ("x", "y"): 1}, queued, {})
+
+    admitted = await queue.admit(session, RcloneScheduler(URLS[:1]))
+
+    assert [migration.migration_id for migration, _ in admitted] == [1, 4]
+    assert {url for _, url in admitted} == {"http://rclone0"}
+
+
+@pytest.mark.asyncio
+async def test_admit_rclone_capacity():
+    """Admission stops when every rclone instance is at its job cap."""
+    queue = MigrationQueue()
+    queued = [_queued(i) for i in range(5)]
+    session = _queue_session({}, queued, {"http://rclone0": 1})
+
+    admitted = await queue.admit(session, RcloneScheduler(URLS[:1], max_jobs_per_instance=3))
+
+    assert [migration.migration_id for migration, _ in admitted] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_admit_global_limit_reached():
+    """No queued rows are read while the global limit is reached."""
+    queue = MigrationQueue(max_active=2)
+    session = _queue_session({("src", "dst"): 2}, [_queued(1)], {})
+
+    assert not await queue.admit(session, RcloneScheduler(URLS[:1]))
+    assert session.execute.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_queued_migrations():
+    """Accepted copies are submitted, refused ones failed and their items deleted."""
+    ok, refused = _queued(1), _queued(2)
+    queue = MagicMock()
+    queue.admit = AsyncMock(return_value=[(ok, "http://rclone0"), (refused, "http://rclone0")])
+    session = AsyncMock()
+    session.add = MagicMock()
+
+    def copy(_url, **kwargs):
+        assert kwargs == {"src_fs": "a", "dst_fs": "b"}
+        if copy.calls:
+            return 500, {"error": "oom"}, "cmd"
+        copy.calls += 1
+        return 200, {"jobid": 7}, "cmd"
+
+    copy.calls = 0
+    with (
+        patch.object(dlm_migration_requests, "rclone_copy", copy),
+        patch.object(dlm_migration_requests, "ASYNC_DB") as async_db,
+        patch.object(dlm_migration_requests, "add_outbox_event", AsyncMock()) as outbox,
+    ):
+        async_db.delete = AsyncMock()
+        await dlm_migration_requests._submit_queued_migrations(session, queue)
+
+    assert (ok.state, ok.job_id, ok.url) == ("SUBMITTED", 7, "http://rclone0")
+    assert (refused.state, refused.complete) == ("FAILED", True)
+    assert refused.job_status["success"] is False
+    async_db.delete.assert_awaited_once()
+    assert async_db.delete.await_args.kwargs["params"] == {"uid": 'in.("uid2")'}
+    assert outbox.await_count == 2
+    session.commit.assert_awaited_once()
+
+
+def _submitted(migration_id: int, job_id: int) -> Migration:
+    migration = _queued(migration_id)
+    migration.state = MigrationState.SUBMITTED.value
+    migration.url = "http://rclone0"
+    migration.job_id = job_id
+    return migration
+
+
+@pytest.mark.asyncio
+async def test_update_statuses_retries_failed_finalisation():
+    """A finished migration whose data item could not be finalised is not completed."""
+    finalised, unfinalised = _submitted(1, 1), _submitted(2, 2)
+    migrations_result = MagicMock()
+    migrations_result.scalars.return_value.all.return_value = [finalised, unfinalised]
+    session = AsyncMock()
+    session.execute.side_effect = [migrations_result, MagicMock(), MagicMock()]
+    poller = RcloneStatusPoller(MagicMock())
+    poller.poll_jobs = AsyncMock(
+        return_value=[({"finished": True, "success": True}, {}) for _ in range(2)]
+    )
+
+    async def finalise(migration, _status_json):
+        if migration is unfinalised:
+            raise IOError("PostgREST unavailable")
+
+    with (
+        patch.object(status_poller, "finalise_migrated_item", finalise),
+        patch.object(dlm_migration_requests, "get_scheduler") as scheduler,
+        patch.object(dlm_migration_requests, "add_outbox_event", AsyncMock()),
+    ):
+        scheduler.return_value.notify = AsyncMock()
+        await dlm_migration_requests._update_migration_statuses(session, poller)
+
+    updates = session.execute.await_args_list[1].args[1]
+    assert [values["b_migration_id"] for values in updates] == [1]
+    assert updates[0]["b_state"] == MigrationState.COMPLETED.value
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_update_statuses_failed_transfer():
+    """A finished rclone job without success fails its migration."""
+    failed, running = _submitted(1, 1), _submitted(2, 2)
+    migrations_result = MagicMock()
+    migrations_result.scalars.return_value.all.return_value = [failed, running]
+    session = AsyncMock()
+    session.execute.side_effect = [migrations_result, MagicMock(), MagicMock()]
+    poller = RcloneStatusPoller(MagicMock())
+    poller.poll_jobs = AsyncMock(
+        return_value=[({"finished": True, "success": False}, {}), ({"finished": False}, {})]
+    )
+
+    with (
+        patch.object(status_poller, "finalise_migrated_item", AsyncMock()),
+        patch.object(dlm_migration_requests, "get_scheduler") as scheduler,
+        patch.object(dlm_migration_requests, "add_outbox_event", AsyncMock()),
+    ):
+        scheduler.return_value.notify = AsyncMock()
+        await dlm_migration_requests._update_migration_statuses(session, poller)
+
+    updates = session.execute.await_args_list[1].args[1]
+    assert [(values["b_complete"], values["b_state"]) for values in updates] == [
+        (True, MigrationState.FAILED.value),
+        (False, MigrationState.SUBMITTED.value),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_poll_migrations_once_per_job():
+    """Grouped migrations sharing an rclone job poll it once."""
+    grouped = [_submitted(1, 1), _submitted(2, 1), _submitted(3, 2)]
+    poller = RcloneStatusPoller(MagicMock())
+    poller.poll_jobs = AsyncMock(return_value=[({"finished": False}, {}), None])
+
+    polls = await poller.poll_migrations(grouped)
+
+    poller.poll_jobs.assert_awaited_once_with([("http://rclone0", 1), ("http://rclone0", 2)])
+    assert polls == {("http://rclone0", 1): ({"finished": False}, {}), ("http://rclone0", 2): None}
+    updates = status_poller.migration_updates(grouped, polls, skipped={2})
+    assert [values["b_migration_id"] for values in updates] == [1]
+
+
+def test_rclone_copy_include_filter():
+    """Files of a group are copied with one filtered directory copy."""
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"jobid": 1}
+    with patch.object(dlm_migration_requests.requests, "post", return_value=response) as post:
+        dlm_migration_requests.rclone_copy(
+            "http://rclone0", "src:", "dir", "/root", "dst:", "dir", "/dest", "file", ["a*.ms"]
+        )
+
+    url, data = post.call_args.args
+    assert url == "http://rclone0/sync/copy"
+    assert data["srcFs"] == "src:/root/dir"
+    assert data["dstFs"] == "dst:/dest/dir"
+    assert data["_filter"] == '{"IncludeRule": ["/a\\\\*.ms"]}'
+
+
+STORAGES = {
+    "s1": {
+        "storage_id": "s1",
+        "storage_name": "Source",
+        "storage_phase": "GAS",
+        "root_directory": "/src",
+    },
+    "d1": {
+        "storage_id": "d1",
+        "storage_name": "Dest",
+        "storage_phase": "LIQUID",
+        "root_directory": "/dst",
+    },
+}
+
+
+def _source_item(name: str, uri: str, item_type: str = "file") -> dict:
+    return {
+        "uid": f"uid-{name}",
+        "oid": f"oid-{name}",
+        "item_name": name,
+        "storage_id": "s1",
+        "uri": uri,
+        "item_type": item_type,
+        "target_phase": "SOLID",
+        "uid_expiration": None,
+        "oid_expiration": None,
+        "metadata": {},
+    }
+
+
+async def _select(table: str, params: dict) -> list[dict]:
+    """Answer the PostgREST lookups of copy_data_items."""
+    if table == "storage":
+        if "storage_name" in params:
+            return [STORAGES["d1"]]
+        return [storage for sid, storage in STORAGES.items() if sid in params["storage_id"]]
+    if table == "storage_config":
+        return [
+            {"storage_id": sid, "config": {"name": sid, "root_path": "/"}}
+            for sid in STORAGES
+            if sid in params["storage_id"]
+        ]
+    items = [
+        _source_item("a", "eb/a.dat"),
+        _source_item("b", "eb/b.dat"),
+        _source_item("c", "eb/c.ms", item_type="container"),
+    ]
+    return [item for item in items if f'"{item["item_name"]}"' in params.get("item_name", "")]
+
+
+@pytest.mark.asyncio
+async def test_copy_data_items():
+    """Items are resolved and initialised in bulk and queued, files of a directory grouped."""
+    session = AsyncMock()
+    session.add_all = MagicMock(
+        side_effect=lambda records: [
+            setattr(record, "migration_id", i) for i, record in enumerate(records)
+        ]
+    )
+    with patch.object(bulk_copy, "ASYNC_DB") as async_db:
+        async_db.select = AsyncMock(side_effect=_select)
+        async_db.insert = AsyncMock()
+        results = await bulk_copy.copy_data_items(
+            session,
+            [
+                {"item_name": "a"},
+                {"item_name": "b"},
+                {"item_name": "c"},
+                {"item_name": "missing"},
+                {"uid": "x", "oid": "y"},
+            ],
+            destination_name="Dest",
+        )
+
+    assert [result["migration_id"] for result in results] == [0, 1, 2, None, None]
+    assert results[3]["error"] == "No data item found for copying"
+    assert "Either" in results[4]["error"]
+    # one lookup for the destination, item names, storages and configs
+    assert async_db.select.await_count == 4
+    rows = async_db.insert.await_args.kwargs["json"]
+    assert [row["item_state"] for row in rows] == ["INITIALISED"] * 3
+    assert {row["storage_id"] for row in rows} == {"d1"}
+
+    records = session.add_all.call_args.args[0]
+    assert all(record.state == "QUEUED" for record in records)
+    grouped, container = records[:2], records[2]
+    assert grouped[0].request["group"] == grouped[1].request["group"]
+    assert grouped[0].request["rclone"]["include"] == ["a.dat", "b.dat"]
+    assert grouped[0].request["rclone"]["src_remote"] == "eb"
+    assert "group" not in container.request
+    assert container.request["rclone"]["src_remote"] == "eb/c.ms"
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_copy_data_items_insert_fallback():
+    """A rejected multi-row insert is retried row by row, failing only the invalid rows."""
+    session = AsyncMock()
+    session.add_all = MagicMock(
+        side_effect=lambda records: [
+            setattr(record, "migration_id", i) for i, record in enumerate(records)
+        ]
+    )
+
+    async def _insert(_table, json, params=None):
+        if isinstance(json, list) or json["item_name"] == "b":
+            raise DBQueryError(url="", method="POST", params=params, json=json)
+
+    with patch.object(bulk_copy, "ASYNC_DB") as async_db:
+        async_db.select = AsyncMock(side_effect=_select)
+        async_db.insert = AsyncMock(side_effect=_insert)
+        results = await bulk_copy.copy_data_items(
+            session, [{"item_name": "a"}, {"item_name": "b"}], destination_name="Dest"
+        )
+
+    assert async_db.insert.await_count == 3
+    assert results[0]["migration_id"] == 0
+    assert results[1]["migration_id"] is None
+    assert results[1]["error"]
+    records = session.add_all.call_args.args[0]
+    assert [record.request["uid"] for record in records] == [results[0]["uid"]]
+
+
+@pytest.mark.asyncio
+async def test_admit_group_as_one_job():
+    """Migrations of a group are admitted together and count as one job."""
+    queue = MigrationQueue(batch_size=2)
+    grouped = [_queued(i) for i in range(3)]
+    for migration in grouped:
+        migration.request["group"] = "g"
+    pair_result = MagicMock()
+    pair_result.all.return_value = []
+    queued_result = MagicMock()
+    queued_result.scalars.return_value.all.return_value = [grouped[0], grouped[1], _queued(9)]
+    group_result = MagicMock()
+    group_result.scalars.return_value.all.return_value = [grouped[2]]
+    instance_result = MagicMock()
+    instance_result.all.return_value = []
+    session = AsyncMock()
+    session.execute.side_effect = [pair_result, queued_result, group_result, instance_result]
+
+    admitted = await queue.admit(session, RcloneScheduler(URLS[:1], max_jobs_per_instance=1))
+
+    assert [migration.migration_id for migration, _ in admitted] == [0, 1, 2]
@@ -51,3 +51,54 @@ def test_query_expired(mock_data_items):
 def test_query_expired_empty():
     """Test the query expired returning an empty set."""
     assert len(dlm_request.query_expired()) == 0
+
+
+def test_resolve_item_storage_single_query(monkeypatch):
+    """The item, its storage and rclone config are resolved in one query."""
+    queries = []
+
+    def select(table, *, params):
+        queries.append((table, params))
+        return [
+            {
+                "uid": "1",
+                "uri": "item",
+                "storage_id": "s1",
+                "storage": {
+                    "storage_name": "store",
+                    "root_directory": "/data",
+                    "storage_config": [{"config": {"name": "store"}}],
+                },
+            }
+        ]
+
+    monkeypatch.setattr(dlm_request.DB, "select", select)
+
+    storages = dlm_request.resolve_item_storage(uid="1")
+
+    assert len(queries) == 1
+    assert "storage(" in queries[0][1]["select"]
+    assert storages == [
+        {
+            "uid": "1",
+            "uri": "item",
+            "storage_id": "s1",
+            "storage_name": "store",
+            "root_directory": "/data",
+            "config": {"name": "store"},
+        }
+    ]
+
+
+def test_query_item_storage_without_config(monkeypatch):
+    """The public query returns the item storage fields only, no rclone config."""
+    queries = []
+
+    def select(table, *, params):
+        queries.append((table, params))
+        return []
+
+    monkeypatch.setattr(dlm_request.DB, "select", select)
+    dlm_request.query_item_storage(uid="1")
+
+    assert queries[0][1]["select"] == "oid,uid,item_name,storage_id,uri"
@@ -7,6 +7,7 @@ import pytest
 
 from ska_dlm import CONFIG, dlm_storage
 from ska_dlm.dlm_db.db_access import DB
+from ska_dlm.dlm_storage.storage_cache import STORAGE_CACHE
 from ska_dlm.exceptions import InvalidQueryParameters
 
 
@@ -26,6 +27,7 @@ def test_location_init(request):
 
     def cleanup():
         DB.delete(CONFIG.DLM.location_table, params={"location_id": f"eq.{location_id}"})
+        STORAGE_CACHE.invalidate()
 
     request.addfinalizer(cleanup)
 
@@ -57,6 +59,7 @@ def test_initialise_storage_config(request):
         DB.delete(CONFIG.DLM.storage_config_table, params={"config_id": f"eq.{config_id}"})
         DB.delete(CONFIG.DLM.storage_table, params={"storage_id": f"eq.{uuid}"})
         DB.delete(CONFIG.DLM.location_table, params={"location_id": f"eq.{location_id}"})
+        STORAGE_CACHE.invalidate()
 
     request.addfinalizer(cleanup)
 
@@ -79,5 +82,6 @@ def test_invalid_storage_type(request):
 
     def cleanup():
         DB.delete(CONFIG.DLM.location_table, params={"location_id": f"eq.{location_id}"})
+        STORAGE_CACHE.invalidate()
 
     request.addfinalizer(cleanup)
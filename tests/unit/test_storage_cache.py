@@ -0,0 +1,79 @@
+"""Storage lookup cache tests."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from ska_dlm.dlm_storage import dlm_storage_requests as ds
+from ska_dlm.dlm_storage.storage_cache import STORAGE_CACHE, StorageCacheInvalidator, TTLCache
+
+
+@pytest.fixture(name="storage_cache", autouse=True)
+def storage_cache_fixture(monkeypatch):
+    """Start every test with an empty enabled storage cache."""
+    monkeypatch.setattr(STORAGE_CACHE, "ttl", 60)
+    STORAGE_CACHE.invalidate()
+    yield STORAGE_CACHE
+    STORAGE_CACHE.invalidate()
+
+
+def test_ttl_cache_expiry_and_counters():
+    """Entries are served until they expire, hits and misses are counted."""
+    clock = MagicMock(return_value=0.0)
+    cache = TTLCache(10, clock=clock)
+    loader = MagicMock(side_effect=lambda: [{"storage_id": "1"}])
+
+    value = cache.get("key", loader)
+    value[0]["storage_id"] = "changed"
+    assert cache.get("key", loader) == [{"storage_id": "1"}]
+    clock.return_value = 11.0
+    cache.get("key", loader)
+
+    assert loader.call_count == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_cache_invalidation():
+    """Invalidation drops the entries and values loaded meanwhile are not cached."""
+    cache = TTLCache(10)
+
+    def _load_and_invalidate():
+        cache.invalidate()
+        return "stale"
+
+    assert cache.get("key", _load_and_invalidate) == "stale"
+    assert cache.get("key", lambda: "fresh") == "fresh"
+    assert cache.get("key", lambda: "other") == "fresh"
+    cache.invalidate()
+    assert cache.get("key", lambda: "other") == "other"
+    assert TTLCache(0).get("key", lambda: "uncached") == "uncached"
+
+
+def test_storage_lookups_cached_until_written(monkeypatch):
+    """Storage lookups are cached and invalidated by storage writes."""
+    select = MagicMock(return_value=[{"storage_id": "1", "storage_name": "store"}])
+    monkeypatch.setattr(ds.DB, "select", select)
+    monkeypatch.setattr(ds.DB, "update", MagicMock(return_value=[{"storage_id": "1"}]))
+
+    ds.query_storage(storage_name="store")
+    ds.query_storage(storage_name="store")
+    ds.query_storage(storage_id="1")
+    assert select.call_count == 2
+
+    ds.set_storage_availability("store", False)
+    ds.query_storage(storage_name="store")
+    assert select.call_count == 3
+    assert ds.query_cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidator_invalidates_on_event():
+    """Storage changed events invalidate the cache."""
+    cache = MagicMock()
+    message = MagicMock(headers={"outbox_id": "1"})
+    message.process.return_value = AsyncMock()
+
+    await StorageCacheInvalidator(cache, "amqp://broker").on_message(message)
+
+    cache.invalidate.assert_called_once()
@@ -0,0 +1,73 @@
+# pylint: disable=W0212
+"""Storage health prober tests."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from ska_dlm.dlm_storage import dlm_storage_requests as ds
+from ska_dlm.dlm_storage import storage_health
+from ska_dlm.dlm_storage.storage_health import StorageHealthProber, storage_status
+
+
+def _storage(checked, age: float | None) -> dict:
+    last_checked = None
+    if age is not None:
+        last_checked = (storage_health._utcnow() - timedelta(seconds=age)).isoformat()
+    return {
+        "storage_id": "1",
+        "storage_name": "store",
+        "storage_checked": checked,
+        "storage_last_checked": last_checked,
+        "config": {"name": "remote", "type": "local"},
+    }
+
+
+def test_storage_status():
+    """The recorded status is used while younger than max_age."""
+    assert storage_status(_storage(True, 10), max_age=60) is True
+    assert storage_status(_storage(False, 10), max_age=60) is False
+    assert storage_status(_storage(True, 120), max_age=60) is None
+    assert storage_status(_storage(True, None), max_age=60) is None
+    assert storage_status(_storage(True, 10), max_age=0) is None
+
+
+@pytest.mark.asyncio
+async def test_probe_all_records_status(monkeypatch):
+    """All storages are probed and their status recorded, failed checks are inaccessible."""
+    storages = [
+        {"storage_id": "1", "storage_name": "up", "storage_config": [{"config": {"name": "a"}}]},
+        {"storage_id": "2", "storage_name": "down", "storage_config": [{"config": {"name": "b"}}]},
+        {"storage_id": "3", "storage_name": "unconfigured", "storage_config": []},
+    ]
+    db = MagicMock(select=AsyncMock(return_value=storages), update=AsyncMock())
+    monkeypatch.setattr(storage_health, "ASYNC_DB", db)
+
+    def _check(config: dict) -> bool:
+        if config["name"] == "b":
+            raise ConnectionError("unreachable")
+        return True
+
+    status = await StorageHealthProber(_check, concurrency=2).probe_all()
+
+    assert status == {"up": True, "down": False, "unconfigured": False}
+    recorded = {
+        call.kwargs["params"]["storage_id"]: call.kwargs["json"]["storage_checked"]
+        for call in db.update.await_args_list
+    }
+    assert recorded == {"eq.1": True, "eq.2": False, "eq.3": False}
+
+
+def test_check_storage_access_uses_recorded_status(monkeypatch):
+    """A fresh recorded status saves the live check, an outdated one does not."""
+    check = MagicMock(return_value=True)
+    monkeypatch.setattr(ds, "rclone_remote_check", check)
+    monkeypatch.setattr(ds, "resolve_storage", MagicMock(return_value=[_storage(False, 10)]))
+
+    assert ds.check_storage_access(storage_id="1") is False
+    check.assert_not_called()
+
+    monkeypatch.setattr(ds, "resolve_storage", MagicMock(return_value=[_storage(False, 3600)]))
+    assert ds.check_storage_access(storage_id="1") is True
+    check.assert_called_once_with("remote:/")